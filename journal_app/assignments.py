@@ -0,0 +1,166 @@
+# assignments.py
+
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Article, DepartmentFacet, DepartmentSettings, Review
+from .notifications import NotificationManager
+
+# Statuses an article leaves for UNDER_REVIEW when reviewers are assigned
+REVIEWABLE_STATUSES = ('SUBMITTED', 'REVISION_REQUIRED')
+
+
+@dataclass
+class AssignmentResult:
+    created: list = field(default_factory=list)
+    # (article, reviewer, reason) for each pair that was not assigned
+    skipped: list = field(default_factory=list)
+
+
+def department_limits(department_ids):
+    """{department id: (max reviewers per article, review deadline days)}, from one query"""
+    defaults = tuple(
+        DepartmentSettings._meta.get_field(name).default
+        for name in ('max_reviewers_per_article', 'review_deadline_days')
+    )
+    limits = dict.fromkeys(department_ids, defaults)
+    limits.update(
+        (department_id, (max_reviewers, deadline_days))
+        for department_id, max_reviewers, deadline_days in DepartmentSettings.objects.filter(
+            department_id__in=department_ids
+        ).values_list('department_id', 'max_reviewers_per_article', 'review_deadline_days')
+    )
+    return limits
+
+
+def assign_reviewers(pairs, due_date=None, message=''):
+    """Create reviews for (article, reviewer) pairs in bulk; returns an AssignmentResult
+
+    Pairs already assigned, reviewers who wrote the article and reviewers
+    beyond an article's max_reviewers_per_article are skipped; existing
+    assignments are read in one query, with the articles locked; pairs
+    another request assigned first are reported as already assigned rather
+    than failing the batch. Without a due_date, each review is
+    due review_deadline_days from now, computed once per department.
+    Nothing is emailed here: the reviews are flagged and
+    `manage.py send_review_invitations` invites them.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    articles = {article.pk: article for article, _ in pairs}
+    if not pairs:
+        return AssignmentResult()
+
+    result = AssignmentResult()
+    with transaction.atomic():
+        # Locking the articles makes concurrent assignments to them wait, so the
+        # reviewers read below are still the only ones when the new rows go in
+        list(Article.objects.select_for_update().filter(pk__in=articles).values_list('pk'))
+        assigned = defaultdict(set)
+        for article_id, reviewer_id in Review.objects.filter(article_id__in=articles).values_list('article_id', 'reviewer_id'):
+            assigned[article_id].add(reviewer_id)
+        limits = department_limits({article.department_id for article in articles.values()})
+        now = timezone.now()
+
+        for article, reviewer in pairs:
+            max_reviewers, deadline_days = limits[article.department_id]
+            reviewers = assigned[article.pk]
+            if reviewer.pk in reviewers:
+                result.skipped.append((article, reviewer, 'already assigned'))
+            elif reviewer.pk == article.author_id:
+                result.skipped.append((article, reviewer, 'author of the article'))
+            elif len(reviewers) >= max_reviewers:
+                result.skipped.append((article, reviewer, f'article already has {max_reviewers} reviewers'))
+            else:
+                reviewers.add(reviewer.pk)
+                result.created.append(Review(
+                    article=article,
+                    reviewer=reviewer,
+                    due_date=due_date or now + timedelta(days=deadline_days),
+                    invitation_pending=True,
+                    invitation_message=message
+                ))
+
+        # New reviews are incomplete, so no statistics counter depends on them
+        try:
+            with transaction.atomic():
+                Review.objects.bulk_create(result.created, batch_size=500)
+        except IntegrityError:
+            # A database without row locks (SQLite) let another request assign
+            # some of the same pairs first: insert one by one and report those
+            created, result.created = result.created, []
+            for review in created:
+                try:
+                    with transaction.atomic():
+                        Review.objects.bulk_create([review])
+                    result.created.append(review)
+                except IntegrityError:
+                    result.skipped.append((review.article, review.reviewer, 'already assigned'))
+        start_review({review.article for review in result.created})
+    return result
+
+
+def start_review(articles):
+    """Move articles that were waiting for reviewers to UNDER_REVIEW, keeping the status facets in step
+
+    Runs in assign_reviewers' transaction, after its inserts. Statuses are
+    read from the database rather than the instances, so an article whose
+    status changed in the meantime is neither moved nor miscounted.
+    """
+    articles = {article.pk: article for article in articles}
+    if not articles:
+        return
+    moving = list(Article.objects.filter(
+        pk__in=articles, status__in=REVIEWABLE_STATUSES
+    ).values_list('pk', 'department_id', 'status'))
+    if not moving:
+        return
+    Article.objects.filter(
+        pk__in=[pk for pk, _, _ in moving], status__in=REVIEWABLE_STATUSES
+    ).update(status='UNDER_REVIEW')
+    deltas = defaultdict(lambda: defaultdict(int))
+    for pk, department_id, status in moving:
+        deltas[department_id][(DepartmentFacet.STATUS, status)] -= 1
+        deltas[department_id][(DepartmentFacet.STATUS, 'UNDER_REVIEW')] += 1
+        articles[pk].status = 'UNDER_REVIEW'
+    for department_id, changes in deltas.items():
+        DepartmentFacet.apply_deltas(department_id, changes)
+
+
+def send_review_invitations(batch_size=None):
+    """Queue invitations for every review flagged by assign_reviewers; returns how many
+
+    Reviews are taken batch_size at a time, and each article's invitation
+    is rendered once per editor message. Each batch is claimed with a
+    conditional update, as outbox.claim_batch does, in the transaction that
+    queues its emails: overlapping runs invite each reviewer once, also on
+    databases without row locks.
+    """
+    batch_size = batch_size or settings.EMAIL_BATCH_SIZE
+    pending = Review.objects.filter(invitation_pending=True).order_by('article_id', 'pk')
+    manager = NotificationManager()
+    sent = 0
+    while True:
+        with transaction.atomic():
+            ids = list(pending.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return sent
+            claim = uuid.uuid4()
+            Review.objects.filter(pk__in=ids, invitation_pending=True).update(
+                invitation_pending=False, invitation_claim=claim
+            )
+            # Only the reviews this run unflagged; another run may have taken the rest
+            batch = Review.objects.filter(pk__in=ids, invitation_claim=claim).select_related(
+                'article__department__settings', 'reviewer'
+            ).order_by('article_id', 'pk')
+            groups = defaultdict(list)
+            for review in batch:
+                groups[review.article_id, review.invitation_message].append(review)
+            for (_, message), reviews in groups.items():
+                manager.send_review_invitations(reviews[0].article, reviews, message)
+            sent += sum(len(reviews) for reviews in groups.values())
@@ -0,0 +1,158 @@
+# benchmarks.py
+
+import math
+import statistics
+import time
+import tracemalloc
+
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from .instrumentation import QueryRecorder
+from .models import Article, ArticleFile, Profile, Review, Upload
+from .uploads import discard_upload
+from .urls import urlpatterns
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class ViewBenchmark:
+    """Drive every named route in journal_app/urls.py through the test client
+
+    URL arguments are taken from existing data (see the seed_benchmark_data
+    command) and requests are made as an administrator of the sampled
+    department, who may open every route. POST-only routes are sent a
+    valid POST. A route answering with an error status is not measured:
+    the run stops with a ValueError naming it.
+    """
+
+    def __init__(self, iterations=20, warmup=2):
+        self.iterations = iterations
+        self.warmup = warmup
+
+    def sample_objects(self):
+        article = Article.objects.filter(
+            status='PUBLISHED'
+        ).select_related('department', 'journal').order_by('pk').first()
+        if article is None:
+            raise ValueError("No published articles found; run seed_benchmark_data first")
+
+        admin = Profile.objects.filter(
+            departments=article.department,
+            role='DEPT_ADMIN'
+        ).select_related('user').order_by('pk').first()
+        if admin is None:
+            raise ValueError(f"No administrator for {article.department.slug}; run seed_benchmark_data first")
+        objects = {
+            'department': article.department,
+            'journal': article.journal,
+            'article': article,
+            'review': Review.objects.filter(article__department=article.department).order_by('pk').first(),
+            'file': ArticleFile.objects.filter(article=article, is_active=True).order_by('pk').first(),
+            'upload': Upload.objects.filter(owner=admin.user).order_by('pk').first(),
+            'user': admin.user,
+        }
+        missing = [name for name, obj in objects.items() if obj is None]
+        if missing:
+            raise ValueError(f"No {', '.join(missing)} found for {article.department.slug}; "
+                             f"run seed_benchmark_data first")
+        return objects
+
+    def routes(self, objects):
+        values = {
+            'dept_slug': objects['department'].slug,
+            'slug': objects['journal'].slug,
+            'article_id': objects['article'].pk,
+            'review_id': objects['review'].pk,
+            'file_id': objects['file'].pk,
+            'uidb64': 'MQ',
+            'token': 'set-password',
+            'upload_id': objects['upload'].token,
+        }
+        for pattern in urlpatterns:
+            if pattern.name:
+                kwargs = {name: values[name] for name in pattern.pattern.converters}
+                yield pattern.name, reverse(f'journal_app:{pattern.name}', kwargs=kwargs)
+
+    def request(self, client, name, url):
+        """The request a client would usually make; POST-only routes get a valid POST"""
+        if name == 'upload_create':
+            return client.post(url, {'filename': 'manuscript.pdf', 'size': 1024})
+        if name == 'api_review_assign':
+            return client.post(url, {'assignments': {}}, content_type='application/json')
+        return client.get(url)
+
+    def measure(self, client, name, url):
+        for _ in range(self.warmup):
+            self.request(client, name, url)
+
+        timings = []
+        for _ in range(self.iterations):
+            with QueryRecorder() as recorder:
+                start = time.perf_counter()
+                response = self.request(client, name, url)
+                timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                raise ValueError(f"{name} ({url}) answered {response.status_code}; it cannot be benchmarked")
+
+        tracemalloc.start()
+        self.request(client, name, url)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            'url': url,
+            'status': response.status_code,
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'mean_ms': round(statistics.fmean(timings), 2),
+            'queries': recorder.count,
+            'duplicate_queries': sum(recorder.duplicates().values()),
+            'db_time_ms': round(recorder.total_time * 1000, 2),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+
+    def run(self, only=None):
+        objects = self.sample_objects()
+        client = Client()
+        client.force_login(objects['user'])
+
+        uploads = set(Upload.objects.filter(owner=objects['user']).values_list('pk', flat=True))
+        try:
+            results = {
+                name: self.measure(client, name, url)
+                for name, url in self.routes(objects)
+                if not only or name in only
+            }
+        finally:
+            # upload_create starts a new upload every time it is measured
+            for upload in Upload.objects.filter(owner=objects['user']).exclude(pk__in=uploads):
+                discard_upload(upload)
+
+        return {
+            'generated_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'iterations': self.iterations,
+            'articles': Article.objects.count(),
+            'routes': results,
+        }
+
+
+def compare(previous, current, tolerance=0.1):
+    """List routes whose p95 latency or query count grew beyond the tolerance"""
+    regressions = []
+    for name, result in current['routes'].items():
+        before = previous.get('routes', {}).get(name)
+        if not before:
+            continue
+        if result['queries'] > before['queries']:
+            regressions.append(f"{name}: queries {before['queries']} -> {result['queries']}")
+        if result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {result['p95_ms']}ms")
+    return regressions
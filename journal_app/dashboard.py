@@ -0,0 +1,68 @@
+# dashboard.py
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Article
+
+
+class DepartmentDashboard:
+    """Collect the editor dashboard data for a department in a fixed number of queries"""
+
+    # Rows shown per table; the counters always cover every article
+    LIST_LIMIT = 25
+    REVIEWS_DUE_DAYS = 7
+
+    def __init__(self, department):
+        self.department = department
+        self.articles = Article.objects.filter(department=department)
+
+    def counters(self):
+        """All dashboard counters in one conditional aggregation"""
+        now = timezone.now()
+        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        return self.articles.aggregate(
+            new_submissions=Count('id', filter=Q(status='SUBMITTED'), distinct=True),
+            under_review=Count('id', filter=Q(status='UNDER_REVIEW'), distinct=True),
+            published_this_month=Count(
+                'id',
+                filter=Q(status='PUBLISHED', publication_date__gte=month_start),
+                distinct=True
+            ),
+            reviews_due=Count(
+                'article_reviews',
+                filter=Q(
+                    article_reviews__is_complete=False,
+                    article_reviews__due_date__lte=now + timezone.timedelta(days=self.REVIEWS_DUE_DAYS)
+                )
+            ),
+        )
+
+    def new_submissions(self):
+        return self.articles.filter(
+            status='SUBMITTED'
+        ).select_related('author').order_by('-submission_date')[:self.LIST_LIMIT]
+
+    def articles_under_review(self):
+        """Articles in review, annotated with their complete/pending review counts"""
+        return self.articles.filter(
+            status='UNDER_REVIEW'
+        ).annotate(
+            reviews_total=Count('article_reviews'),
+            reviews_complete=Count('article_reviews', filter=Q(article_reviews__is_complete=True)),
+            reviews_pending=Count('article_reviews', filter=Q(article_reviews__is_complete=False)),
+        ).order_by('-submission_date')[:self.LIST_LIMIT]
+
+    def recent_publications(self, limit=5):
+        return self.articles.filter(
+            status='PUBLISHED'
+        ).select_related('journal').order_by('-publication_date')[:limit]
+
+    def get_context(self):
+        return {
+            'stats': self.counters(),
+            # Lists are evaluated here so the template never re-queries them
+            'new_submissions': list(self.new_submissions()),
+            'pending_reviews': list(self.articles_under_review()),
+            'recent_publications': list(self.recent_publications()),
+        }
@@ -0,0 +1,144 @@
+# departments.py
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches, DEFAULT_CACHE_ALIAS
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import Http404
+
+from .models import Department, DepartmentSettings
+
+# Bumped whenever a Department or DepartmentSettings row changes; every cached
+# entry records the generation it was read at and is ignored once it moves on
+GENERATION_KEY = 'journal_app:departments:generation'
+LOCAL_CACHE_SIZE = 128
+
+# Backends that live inside one process: another worker's invalidations never reach them
+PER_PROCESS_BACKENDS = (LocMemCache, DummyCache)
+
+
+class DepartmentCache:
+    """Departments and their settings, read through a per-process LRU and then a Django cache
+
+    With a shared backend (Redis, Memcached, database, file) every process
+    sees the generation counter move as soon as a department changes.
+    Local entries expire after DEPARTMENT_LOCAL_CACHE_TIMEOUT seconds either
+    way; with a per-process backend, which cannot carry a change to other
+    workers, that is the only layer and the timeout bounds how stale it gets.
+    """
+
+    def __init__(self, backend=None):
+        # None: the default cache, looked up per call since Django's caches are per thread
+        self._backend = backend
+        # (field, value) -> (generation, expires at, Department or None), most recently used last
+        self.local = OrderedDict()
+        self.lock = threading.Lock()
+
+    @property
+    def backend(self):
+        return self._backend if self._backend is not None else caches[DEFAULT_CACHE_ALIAS]
+
+    @property
+    def shared(self):
+        return not isinstance(self.backend, PER_PROCESS_BACKENDS)
+
+    def generation(self):
+        backend = self.backend
+        value = backend.get(GENERATION_KEY)
+        if value is None:
+            # Seeded from the clock, so an evicted generation never comes back
+            # and revives entries that per-process caches still hold
+            seed = time.time_ns()
+            backend.add(GENERATION_KEY, seed, timeout=None)
+            # Without a working cache every call gets a new seed, i.e. no hits
+            value = backend.get(GENERATION_KEY, seed)
+        return value
+
+    def invalidate(self):
+        """Make every process sharing the backend drop its cached departments"""
+        try:
+            self.backend.incr(GENERATION_KEY)
+        except ValueError:
+            # Evicted or never set: any value other than the old one will do
+            self.backend.set(GENERATION_KEY, time.time_ns(), timeout=None)
+
+    def get(self, slug=None, pk=None):
+        """The Department with `slug` (or `pk`) and its settings, or None
+
+        Each caller gets its own copy, so views may modify and save it.
+        """
+        lookup = ('slug', slug) if slug is not None else ('pk', pk)
+        current = self.generation()
+        now = time.monotonic()
+        with self.lock:
+            entry = self.local.get(lookup)
+            if entry is not None and entry[0] == current and entry[1] > now:
+                self.local.move_to_end(lookup)
+                return copy.deepcopy(entry[2])
+
+        # A per-process backend would only repeat the LRU, and keep entries longer
+        backend = self.backend if self.shared else None
+        department = backend.get(self.key(current, lookup)) if backend else None
+        lookups = [lookup]
+        if department is None:
+            department = Department.objects.select_related('settings').filter(**dict([lookup])).first()
+            # A department is cached under both its slug and pk; unknown slugs are
+            # cached too, as False, since bots probe plenty of them
+            if department is not None:
+                lookups = [('slug', department.slug), ('pk', department.pk)]
+            if backend:
+                backend.set_many({self.key(current, key): department or False for key in lookups},
+                                 settings.DEPARTMENT_CACHE_TIMEOUT)
+        department = department or None
+
+        with self.lock:
+            for key in lookups:
+                self.local[key] = (current, now + settings.DEPARTMENT_LOCAL_CACHE_TIMEOUT, department)
+                self.local.move_to_end(key)
+            while len(self.local) > LOCAL_CACHE_SIZE:
+                self.local.popitem(last=False)
+        return copy.deepcopy(department)
+
+    @staticmethod
+    def key(current, lookup):
+        return f'journal_app:department:{current}:{lookup[0]}:{lookup[1]}'
+
+
+department_cache = DepartmentCache()
+
+
+def invalidate_departments():
+    department_cache.invalidate()
+
+
+def get_department(slug=None, pk=None):
+    return department_cache.get(slug=slug, pk=pk)
+
+
+def get_department_or_404(slug):
+    department = get_department(slug=slug)
+    if department is None:
+        raise Http404("No Department matches the given query.")
+    return department
+
+
+def get_department_settings(department_id):
+    """A department's DepartmentSettings, or None when it has none, from the cache"""
+    department = get_department(pk=department_id)
+    try:
+        return department.settings if department is not None else None
+    except DepartmentSettings.DoesNotExist:
+        return None
+
+
+def department_setting(department_id, name):
+    """One DepartmentSettings field of a department, or the field's default when it has no settings"""
+    dept_settings = get_department_settings(department_id)
+    if dept_settings is None:
+        return DepartmentSettings._meta.get_field(name).get_default()
+    return getattr(dept_settings, name)
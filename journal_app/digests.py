@@ -0,0 +1,98 @@
+# digests.py
+
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .departments import get_department_settings
+from .emails import render_email
+from .models import DepartmentSettings, DigestEvent
+from .outbox import enqueue_batch
+
+# DepartmentSettings.notification_settings['editor_digest'] -> how long events wait for a digest
+DIGEST_INTERVALS = {
+    'hourly': timedelta(hours=1),
+    'daily': timedelta(days=1),
+}
+
+
+def digest_interval(department):
+    """The department's editor digest interval, or None when editors are emailed per event"""
+    dept_settings = get_department_settings(department.pk)
+    if dept_settings is None:
+        return None
+    return DIGEST_INTERVALS.get((dept_settings.notification_settings or {}).get('editor_digest'))
+
+
+def record_event(department, kind, recipients, article, review=None):
+    """Hold an event for the next digest of each recipient; one INSERT"""
+    now = timezone.now()
+    DigestEvent.objects.bulk_create([
+        DigestEvent(department=department, recipient=recipient, kind=kind, article=article, review=review,
+                    created_at=now)
+        for recipient in recipients
+    ])
+
+
+def due_departments(now=None, force=False):
+    """Departments whose oldest pending event has waited a full digest interval"""
+    now = now or timezone.now()
+    oldest = dict(DigestEvent.objects.values_list('department').annotate(oldest=Min('created_at')))
+    due = []
+    for dept_settings in DepartmentSettings.objects.filter(department__in=oldest).select_related('department'):
+        interval = DIGEST_INTERVALS.get((dept_settings.notification_settings or {}).get('editor_digest'))
+        # Events left over from a department that has since turned digests off go out now
+        if force or interval is None or oldest[dept_settings.department_id] <= now - interval:
+            due.append(dept_settings.department)
+    return due
+
+
+def build_digests(department):
+    """Group every pending event of a department by recipient, from one query
+
+    Returns ([(recipient, submissions, reviews)], event ids), each list in
+    the order the events happened.
+    """
+    events = list(
+        DigestEvent.objects.filter(department=department)
+        .select_related('recipient', 'article__author', 'review__reviewer')
+        .order_by('recipient_id', 'created_at', 'pk')
+    )
+    digests = []
+    for recipient_id, group in groupby(events, key=lambda event: event.recipient_id):
+        group = list(group)
+        digests.append((
+            group[0].recipient,
+            [event.article for event in group if event.kind == DigestEvent.NEW_SUBMISSION],
+            [event.review for event in group if event.kind == DigestEvent.REVIEW_COMPLETED and event.review],
+        ))
+    return digests, [event.pk for event in events]
+
+
+def send_digest(department):
+    """Queue one summary email per editor with pending events; returns how many"""
+    digests, event_ids = build_digests(department)
+    messages = [
+        (recipient.email, render_email('editor_digest', {
+            'department': department,
+            'recipient_name': recipient.get_full_name(),
+            'submissions': submissions,
+            'reviews': reviews,
+            'site_url': settings.SITE_URL,
+        }))
+        for recipient, submissions, reviews in digests
+    ]
+    with transaction.atomic():
+        count = enqueue_batch(department, f'Editorial digest: {department}', messages)
+        # Only the events read above; ones recorded meanwhile wait for the next digest
+        DigestEvent.objects.filter(pk__in=event_ids).delete()
+    return count
+
+
+def send_digests(now=None, force=False):
+    """Queue the digests of every department that is due; returns how many emails"""
+    return sum(send_digest(department) for department in due_departments(now, force))
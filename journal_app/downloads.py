@@ -0,0 +1,131 @@
+# downloads.py
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+CHUNK_SIZE = 64 * 1024
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_etag(size, modified):
+    """Validator derived from size and modification time, like nginx, without reading the file"""
+    return quote_etag(f'{size:x}-{int(modified.timestamp()):x}')
+
+
+def parse_range(header, size):
+    """(start, end) for a single satisfiable byte range, None to send the whole file
+
+    Raises ValueError for a range that cannot be satisfied. Multiple ranges
+    are answered with the whole file, which RFC 9110 allows.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    """Whether a Range request still applies, i.e. If-Range is absent or matches"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(last_modified.timestamp())
+
+
+def iter_range(f, start, length):
+    """Yield `length` bytes of `f` from `start` in chunks, closing it afterwards"""
+    try:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+def serve_file(request, field_file):
+    """Send a stored file as an attachment without reading it into memory
+
+    Answers conditional requests (ETag / Last-Modified) with 304 or 412,
+    single byte ranges with 206, and hands the transfer to the front-end
+    server when settings.DOWNLOAD_SENDFILE is 'x-accel-redirect' or
+    'x-sendfile'. Returns (response, full_body) where full_body says
+    whether the response delivers the file from its first byte, which is
+    what download counters should count.
+    """
+    storage, name = field_file.storage, field_file.name
+    size = storage.size(name)
+    modified = storage.get_modified_time(name)
+    etag = file_etag(size, modified)
+    last_modified = int(modified.timestamp())
+    filename = os.path.basename(name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response, False
+
+    sendfile = getattr(settings, 'DOWNLOAD_SENDFILE', '')
+    if sendfile:
+        response = HttpResponse(content_type=content_type)
+        if sendfile == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = quote(settings.DOWNLOAD_ACCEL_PREFIX.rstrip('/') + '/' + name)
+        else:
+            response['X-Sendfile'] = storage.path(name)
+        # The web server applies Range itself
+        range_header = request.META.get('HTTP_RANGE', '')
+        full_body = not range_header or range_header.startswith('bytes=0-')
+    else:
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response, False
+        if byte_range and not if_range_matches(request, etag, modified):
+            byte_range = None
+
+        if byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                iter_range(field_file.open('rb'), start, end - start + 1),
+                status=206,
+                content_type=content_type
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
+            full_body = start == 0
+        else:
+            response = FileResponse(field_file.open('rb'), content_type=content_type)
+            full_body = True
+
+    response['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(filename)}"
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response, full_body
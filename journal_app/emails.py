@@ -0,0 +1,76 @@
+# emails.py
+
+import time
+from html import unescape
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import mark_safe
+
+# Per-recipient fields are rendered as these markers in the shared copy, then swapped for each recipient's values
+MARKER_START, MARKER_END = '\ue000', '\ue001'
+
+# template name -> [renders, total seconds], for this process
+render_timings = defaultdict(lambda: [0, 0.0])
+
+
+@dataclass
+class RenderedEmail:
+    html: str
+    text: str
+    seconds: float = 0.0
+
+
+@lru_cache(maxsize=None)
+def email_templates(name):
+    """Compiled (html, text) templates of an email, loaded once per process; text is None without a .txt"""
+    html = get_template(f'journal_app/emails/{name}.html')
+    try:
+        text = get_template(f'journal_app/emails/{name}.txt')
+    except TemplateDoesNotExist:
+        text = None
+    return html, text
+
+
+def render_email(name, context):
+    start = time.perf_counter()
+    html_template, text_template = email_templates(name)
+    html = html_template.render(context)
+    # Most emails only have an HTML template; its text copy must not keep the entities
+    text = text_template.render(context) if text_template else unescape(strip_tags(html))
+    seconds = time.perf_counter() - start
+
+    timing = render_timings[name]
+    timing[0] += 1
+    timing[1] += seconds
+    return RenderedEmail(html, text, seconds)
+
+
+def render_batch(name, context, recipients):
+    """Render an email once for a shared context, then fill in each recipient's own fields
+
+    `recipients` maps addresses to their fields, e.g. {'recipient_name': ...};
+    templates must output those fields as plain {{ recipient_name }}. Yields
+    (address, RenderedEmail). A copy whose markers were altered by a filter
+    is rendered in full instead. The shared render time is split evenly.
+    """
+    fields = set().union(*recipients.values()) if recipients else set()
+    markers = {field: f'{MARKER_START}{field}{MARKER_END}' for field in fields}
+    shared = render_email(name, {**context, **{field: mark_safe(marker) for field, marker in markers.items()}})
+    share = shared.seconds / max(len(recipients), 1)
+
+    for address, values in recipients.items():
+        start = time.perf_counter()
+        html, text = shared.html, shared.text
+        for field, marker in markers.items():
+            value = values.get(field, '')
+            html = html.replace(marker, escape(value))
+            text = text.replace(marker, str(value))
+        if MARKER_START in html or MARKER_START in text:
+            yield address, render_email(name, {**context, **values})
+        else:
+            yield address, RenderedEmail(html, text, share + time.perf_counter() - start)
@@ -5,8 +5,11 @@ from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
+import uuid
 from .models import (Department, DepartmentSettings, Profile, Journal, Article, 
-                    ArticleFile, Review, ReviewAttachment, CustomUser)
+                    ArticleFile, Review, ReviewAttachment, CustomUser, Upload, normalize_keyword)
+from .recommendations import recommend_reviewers
+from .uploads import attach_upload
 
 class DepartmentForm(forms.ModelForm):
     class Meta:
@@ -90,6 +93,10 @@ class JournalForm(forms.ModelForm):
         }
 
 class ArticleSubmissionForm(forms.ModelForm):
+    # Tokens of finished resumable uploads (journal_app.uploads), used instead of posting the files
+    manuscript_upload = forms.CharField(required=False, widget=forms.HiddenInput)
+    supplementary_uploads = forms.CharField(required=False, widget=forms.HiddenInput)
+
     class Meta:
         model = Article
         fields = ['journal', 'title', 'abstract', 'keywords', 'co_authors',
@@ -110,15 +117,49 @@ class ArticleSubmissionForm(forms.ModelForm):
             'funding_information': forms.Textarea(attrs={'rows': 4, 'class': 'form-control'}),
         }
 
-    def __init__(self, *args, department=None, **kwargs):
+    def __init__(self, *args, department=None, user=None, **kwargs):
         super().__init__(*args, **kwargs)
+        # Journal.__str__ shows the department name
+        self.fields['journal'].queryset = Journal.objects.select_related('department')
         if department:
-            self.fields['journal'].queryset = Journal.objects.filter(department=department)
+            self.fields['journal'].queryset = Journal.objects.filter(
+                department=department
+            ).select_related('department')
             self.fields['co_authors'].queryset = CustomUser.objects.filter(
                 profile__departments=department
             ).exclude(id=kwargs.get('initial', {}).get('author'))
+        self.user = user
+        # The manuscript may instead have been sent beforehand through the resumable upload API
+        self.fields['manuscript_file'].required = False
+
+    def clean_manuscript_upload(self):
+        token = self.cleaned_data['manuscript_upload']
+        return completed_uploads(self.user, [token])[0] if token else None
+
+    def clean_supplementary_uploads(self):
+        return completed_uploads(self.user, self.cleaned_data['supplementary_uploads'].split(','))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not (cleaned_data.get('manuscript_file') or cleaned_data.get('manuscript_upload')
+                or 'manuscript_upload' in self.errors):
+            self.add_error('manuscript_file', ValidationError(
+                self.fields['manuscript_file'].error_messages['required'], code='required'
+            ))
+        return cleaned_data
+
+    def save(self, commit=True):
+        article = super().save(commit=False)
+        if self.cleaned_data.get('manuscript_upload'):
+            attach_upload(self.cleaned_data['manuscript_upload'], article.manuscript_file)
+        if commit:
+            article.save()
+            self._save_m2m()
+        return article
 
 class ArticleFileForm(forms.ModelForm):
+    upload = forms.CharField(required=False, widget=forms.HiddenInput)
+
     class Meta:
         model = ArticleFile
         fields = ['file', 'file_type', 'description']
@@ -128,6 +169,46 @@ class ArticleFileForm(forms.ModelForm):
             'description': forms.Textarea(attrs={'rows': 3, 'class': 'form-control'}),
         }
 
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+        self.fields['file'].required = False
+
+    def clean_upload(self):
+        token = self.cleaned_data['upload']
+        return completed_uploads(self.user, [token])[0] if token else None
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not (cleaned_data.get('file') or cleaned_data.get('upload') or 'upload' in self.errors):
+            self.add_error('file', ValidationError(self.fields['file'].error_messages['required'], code='required'))
+        return cleaned_data
+
+    def save(self, commit=True):
+        article_file = super().save(commit=False)
+        if self.cleaned_data.get('upload'):
+            attach_upload(self.cleaned_data['upload'], article_file.file)
+        if commit:
+            article_file.save()
+        return article_file
+
+def completed_uploads(user, tokens):
+    """The finished resumable uploads of `user` with the given tokens"""
+    try:
+        tokens = {uuid.UUID(token.strip()) for token in tokens if token.strip()}
+    except ValueError:
+        raise ValidationError("Invalid upload token.")
+    if not tokens:
+        return []
+    uploads = list(Upload.objects.filter(
+        token__in=tokens,
+        owner_id=getattr(user, 'pk', None),
+        completed_at__isnull=False
+    ))
+    if len(uploads) != len(tokens):
+        raise ValidationError("The upload is unfinished or has expired; please upload the file again.")
+    return uploads
+
 class MultipleFileInput(forms.ClearableFileInput):
     allow_multiple_selected = True
 
@@ -225,13 +306,15 @@ class ReviewAssignmentForm(forms.Form):
         required=False
     )
 
-    def __init__(self, *args, department=None, **kwargs):
+    def __init__(self, *args, department=None, article=None, **kwargs):
         super().__init__(*args, **kwargs)
         if department:
-            self.fields['reviewers'].queryset = User.objects.filter(
+            self.fields['reviewers'].queryset = CustomUser.objects.filter(
                 profile__role='REVIEWER',
                 profile__departments=department
             )
+        # Suggestions to show above the full list; only needed when the form is displayed
+        self.recommendations = recommend_reviewers(article) if article is not None else []
 
 class ReviewResponseForm(forms.Form):
     decision = forms.ChoiceField(
@@ -272,4 +355,47 @@ class BulkArticleActionForm(forms.Form):
     def __init__(self, *args, department=None, **kwargs):
         super().__init__(*args, **kwargs)
         if department:
-            self.fields['articles'].queryset = Article.objects.filter(department=department)
\ No newline at end of file
+            self.fields['articles'].queryset = Article.objects.filter(department=department)
+
+class ArticleSearchForm(forms.Form):
+    q = forms.CharField(
+        max_length=200,
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Search articles'})
+    )
+    department = forms.ModelChoiceField(
+        queryset=Department.objects.filter(is_active=True),
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    journal = forms.ModelChoiceField(
+        queryset=Journal.objects.select_related('department'),
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    status = forms.ChoiceField(
+        choices=[('', 'Any status')] + Article.STATUS_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    year = forms.IntegerField(
+        min_value=1900,
+        max_value=2100,
+        required=False,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Year'})
+    )
+    keyword = forms.CharField(
+        max_length=200,
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Keyword'})
+    )
+
+    def get_filters(self):
+        data = self.cleaned_data
+        return {
+            'department_id': data['department'].pk if data.get('department') else None,
+            'journal_id': data['journal'].pk if data.get('journal') else None,
+            'status': data.get('status') or None,
+            'year': data.get('year'),
+            'keyword': normalize_keyword(data.get('keyword') or '') or None,
+        }
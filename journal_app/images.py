@@ -0,0 +1,153 @@
+# images.py
+
+import io
+import json
+import logging
+import posixpath
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_ROOT = 'derivatives'
+# Pillow format name and file extension for each variant format, preferred first
+FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'jpeg': ('JPEG', 'jpg'),
+}
+
+# name -> manifest, most recently used last; a manifest never changes for a name because
+# storage never reuses one. Misses are not kept: the variants may appear at any time.
+MANIFEST_CACHE_SIZE = 1024
+_manifests = OrderedDict()
+_manifests_lock = threading.Lock()
+
+
+def remember(name, manifest):
+    with _manifests_lock:
+        _manifests[name] = manifest
+        _manifests.move_to_end(name)
+        while len(_manifests) > MANIFEST_CACHE_SIZE:
+            _manifests.popitem(last=False)
+
+
+def derivative_dir(name):
+    """derivatives/journal_covers/cover for journal_covers/cover.png"""
+    return posixpath.join(DERIVATIVE_ROOT, posixpath.splitext(name)[0])
+
+
+def manifest_name(name):
+    return posixpath.join(derivative_dir(name), 'manifest.json')
+
+
+def derivative_widths(width):
+    """The configured widths, without upscaling past the source width"""
+    return sorted({min(w, width) for w in settings.IMAGE_DERIVATIVE_WIDTHS})
+
+
+def encode(image, fmt):
+    """Recompress an image in one of FORMATS, flattening transparency for JPEG"""
+    pil_format = FORMATS[fmt][0]
+    if pil_format == 'JPEG' and image.mode != 'RGB':
+        background = Image.new('RGB', image.size, 'white')
+        rgba = image.convert('RGBA')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        image = background
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    buffer = io.BytesIO()
+    options = {'quality': settings.IMAGE_DERIVATIVE_QUALITY}
+    if pil_format == 'JPEG':
+        options.update(optimize=True, progressive=True)
+    else:
+        options.update(method=4)
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def generate_derivatives(field_file):
+    """Write resized WebP and JPEG variants of an image and their manifest; returns the manifest
+
+    Variants go to derivatives/<source name without extension>/<width>.<ext>
+    in the image's storage. The manifest lists them per format, smallest
+    first, with the source dimensions for width/height attributes.
+    """
+    storage, name = field_file.storage, field_file.name
+    with storage.open(name, 'rb') as f:
+        image = Image.open(f)
+        image.load()
+    # Phone photos are often stored sideways with an EXIF rotation
+    image = ImageOps.exif_transpose(image)
+    width, height = image.size
+
+    directory = derivative_dir(name)
+    variants = {fmt: [] for fmt in FORMATS}
+    for target in derivative_widths(width):
+        resized = image if target == width else image.resize(
+            (target, max(round(height * target / width), 1)), Image.LANCZOS
+        )
+        for fmt, (_, extension) in FORMATS.items():
+            path = posixpath.join(directory, f'{target}.{extension}')
+            if storage.exists(path):
+                storage.delete(path)
+            variants[fmt].append([target, storage.save(path, ContentFile(encode(resized, fmt)))])
+
+    manifest = {'source': name, 'width': width, 'height': height, 'variants': variants}
+    path = manifest_name(name)
+    if storage.exists(path):
+        storage.delete(path)
+    storage.save(path, ContentFile(json.dumps(manifest).encode()))
+    remember(name, manifest)
+    return manifest
+
+
+def get_derivatives(field_file, generate=True):
+    """The manifest of an image's variants, or None
+
+    Without generate, only variants that already exist are returned;
+    pages use that, since uploads and `manage.py generate_image_derivatives`
+    create them. With generate, missing variants are made now, and None
+    means the source cannot be read.
+    """
+    name = field_file.name
+    with _manifests_lock:
+        if name in _manifests:
+            _manifests.move_to_end(name)
+            return _manifests[name]
+    storage = field_file.storage
+    try:
+        with storage.open(manifest_name(name), 'rb') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = None
+    if manifest is None:
+        if not generate:
+            return None
+        try:
+            return generate_derivatives(field_file)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            logger.warning("Could not generate derivatives of %s", name, exc_info=True)
+            return None
+    remember(name, manifest)
+    return manifest
+
+
+def delete_derivatives(storage, name):
+    """Remove the variants and manifest of an image that was replaced or deleted"""
+    with _manifests_lock:
+        _manifests.pop(name, None)
+    directory = derivative_dir(name)
+    try:
+        _, filenames = storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for filename in filenames:
+        storage.delete(posixpath.join(directory, filename))
+
+
+def srcset(storage, variants):
+    return ', '.join(f'{storage.url(path)} {width}w' for width, path in variants)
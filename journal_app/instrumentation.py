@@ -0,0 +1,151 @@
+# instrumentation.py
+
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('journal_app.queries')
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+
+
+def fingerprint(sql):
+    """Reduce a statement to its shape so repeats with different values group together"""
+    sql = _LITERALS.sub('?', sql)
+    return _IN_LISTS.sub('(...)', sql)
+
+
+class QueryRecorder:
+    """Context manager recording every statement run on the database connections"""
+
+    def __init__(self, using=None):
+        self.aliases = [using] if using else list(connections)
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((fingerprint(sql), time.perf_counter() - start))
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in self.aliases:
+            self._stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    def duplicates(self):
+        """Fingerprints run more than once, mapped to how often they ran"""
+        counts = Counter(sql for sql, _ in self.queries)
+        return {sql: n for sql, n in counts.most_common() if n > 1}
+
+    def summary(self, view_name=None):
+        return {
+            'view': view_name,
+            'queries': self.count,
+            'db_time_ms': round(self.total_time * 1000, 2),
+            'duplicates': self.duplicates(),
+        }
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(limit, label='block'):
+    """Fail when the wrapped block runs more than `limit` queries"""
+    with QueryRecorder() as recorder:
+        yield recorder
+    if recorder.count > limit:
+        duplicates = ''.join(
+            f"\n  {n}x {sql}" for sql, n in recorder.duplicates().items()
+        )
+        raise QueryBudgetExceeded(
+            f"{label} ran {recorder.count} queries, budget is {limit}."
+            + (f" Duplicated:{duplicates}" if duplicates else '')
+        )
+
+
+class QueryInstrumentationMiddleware:
+    """Record query count, DB time and duplicate queries for every request
+
+    With DEBUG on the numbers are returned as X-Query-* response headers,
+    otherwise each request is logged as one JSON line on journal_app.queries.
+    Requests over their QUERY_BUDGETS entry (keyed by URL name) log a warning.
+
+    Generated streaming responses (CSV reports and the like) may run queries
+    while the server consumes them: those are recorded too, and the request
+    is logged once the stream ends. Headers are sent before that, so they
+    count only the view's own queries. Responses streaming a file
+    (FileResponse) and async streams are left alone, so the server can still
+    send files directly; they do not query while streaming.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.budgets = getattr(settings, 'QUERY_BUDGETS', {})
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with recorder:
+            response = self.get_response(request)
+
+        if settings.DEBUG:
+            summary = self.summary(recorder, request, response)
+            response['X-Query-Count'] = str(summary['queries'])
+            response['X-Query-Time-Ms'] = str(summary['db_time_ms'])
+            response['X-Query-Duplicates'] = str(sum(summary['duplicates'].values()))
+            response['X-Query-View'] = summary['view'] or ''
+
+        if response.streaming and not response.is_async and getattr(response, 'file_to_stream', None) is None:
+            response.streaming_content = self.record_stream(recorder, request, response, response.streaming_content)
+        else:
+            self.report(recorder, request, response)
+        return response
+
+    def record_stream(self, recorder, request, response, content):
+        try:
+            with recorder:
+                yield from content
+        finally:
+            self.report(recorder, request, response)
+
+    def summary(self, recorder, request, response):
+        match = getattr(request, 'resolver_match', None)
+        summary = recorder.summary(match.view_name if match else None)
+        summary['path'] = request.path
+        summary['status'] = response.status_code
+        return summary
+
+    def report(self, recorder, request, response):
+        summary = self.summary(recorder, request, response)
+        if not settings.DEBUG:
+            logger.info(json.dumps(summary))
+
+        match = getattr(request, 'resolver_match', None)
+        budget = self.budgets.get(match.url_name) if match else None
+        if budget is not None and summary['queries'] > budget:
+            logger.warning(
+                "%s ran %d queries, budget is %d",
+                summary['view'], summary['queries'], budget
+            )
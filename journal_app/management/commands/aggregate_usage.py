@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from journal_app.usage import aggregate_usage, usage_buffer
+
+
+class Command(BaseCommand):
+    help = "Fold buffered usage events into download counts and per-day article usage; run periodically"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        # Events buffered by this process itself (e.g. from a shell) go in first
+        usage_buffer.flush()
+        count = aggregate_usage(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Aggregated {count} usage events"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from journal_app.models import ArticleKeyword, Department, DepartmentFacet, Keyword
+
+
+class Command(BaseCommand):
+    help = "Populate the normalized keyword links and department facet counts from Article.keywords"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            ArticleKeyword.rebuild(batch_size=options['batch_size'])
+            for department_id in Department.objects.values_list('pk', flat=True):
+                DepartmentFacet.reconcile(department_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Linked {ArticleKeyword.objects.count()} article keywords "
+            f"across {Keyword.objects.count()} keywords"
+        ))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from journal_app.models import Article, ArticleFile, ReviewAttachment
+from journal_app.storage import document_storage
+
+FILE_FIELDS = [
+    (Article, 'manuscript_file'),
+    (ArticleFile, 'file'),
+    (ReviewAttachment, 'file'),
+]
+
+
+class Command(BaseCommand):
+    help = "Link stored manuscripts, article files and review attachments to shared content blobs, then drop unused blobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--garbage-only', action='store_true',
+                            help="Only remove blobs no stored file links to any more, e.g. daily from cron")
+
+    def handle(self, *args, **options):
+        storage = document_storage()
+        if options['garbage_only']:
+            removed = storage.collect_garbage()
+            self.stdout.write(self.style.SUCCESS(f"Removed {removed} unused blobs"))
+            return
+
+        files, freed, missing = 0, 0, 0
+        for model, field in FILE_FIELDS:
+            names = model.objects.exclude(**{field: ''}).values_list(field, flat=True).distinct()
+            for name in names.iterator():
+                try:
+                    freed += storage.deduplicate(name)
+                except FileNotFoundError:
+                    missing += 1
+                    continue
+                files += 1
+        removed = storage.collect_garbage()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deduplicated {files} files, freeing {freed / 1024 / 1024:.1f} MB; "
+            f"removed {removed} unused blobs"
+        ))
+        if missing:
+            self.stdout.write(self.style.WARNING(f"{missing} referenced files are missing"))
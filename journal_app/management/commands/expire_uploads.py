@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from journal_app.uploads import expire_uploads
+
+
+class Command(BaseCommand):
+    help = "Remove resumable uploads that were never finished or never attached to an article; run periodically"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=settings.UPLOAD_EXPIRY_HOURS,
+                            help="Age after which an unattached upload is removed")
+
+    def handle(self, *args, **options):
+        count = expire_uploads(options['hours'])
+        self.stdout.write(self.style.SUCCESS(f"Removed {count} expired uploads"))
@@ -0,0 +1,43 @@
+import os
+import posixpath
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from journal_app.images import DERIVATIVE_ROOT, generate_derivatives, get_derivatives
+from journal_app.signals import IMAGE_FIELDS
+
+
+class Command(BaseCommand):
+    help = "Create resized variants of journal covers, department logos and profile pictures"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Regenerate variants that already exist")
+        parser.add_argument('--prune', action='store_true', help="Delete variants of images no longer in use")
+
+    def handle(self, *args, **options):
+        generated, failed, in_use = 0, 0, set()
+        for model, field in IMAGE_FIELDS.items():
+            for instance in model.objects.exclude(**{field: ''}).only(field).iterator():
+                field_file = getattr(instance, field)
+                in_use.add(posixpath.splitext(field_file.name)[0])
+                try:
+                    manifest = generate_derivatives(field_file) if options['force'] else get_derivatives(field_file)
+                except OSError:
+                    manifest = None
+                if manifest is None:
+                    failed += 1
+                else:
+                    generated += 1
+        self.stdout.write(self.style.SUCCESS(f"{generated} images have variants, {failed} could not be read"))
+
+        if options['prune']:
+            pruned = 0
+            root = default_storage.path(DERIVATIVE_ROOT)
+            for directory, _, filenames in os.walk(root):
+                stem = os.path.relpath(directory, root).replace(os.sep, '/')
+                if 'manifest.json' in filenames and stem not in in_use:
+                    for filename in filenames:
+                        default_storage.delete(posixpath.join(DERIVATIVE_ROOT, stem, filename))
+                    pruned += 1
+            self.stdout.write(self.style.SUCCESS(f"Pruned variants of {pruned} images"))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from journal_app.models import Department, DepartmentFacet, DepartmentStatistics, SiteStatistics
+
+
+class Command(BaseCommand):
+    help = "Recount the denormalized site and department statistics from the underlying tables"
+
+    def handle(self, *args, **options):
+        before = SiteStatistics.objects.filter(pk=SiteStatistics.SINGLETON_ID).values().first() or {}
+        stats = SiteStatistics.reconcile()
+        self.report_drift('site', before, stats)
+
+        for department_id in Department.objects.values_list('pk', flat=True):
+            before = DepartmentStatistics.objects.filter(department_id=department_id).values().first() or {}
+            self.report_drift(
+                f'department {department_id}', before,
+                DepartmentStatistics.reconcile(department_id)
+            )
+            DepartmentFacet.reconcile(department_id)
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {stats}"))
+
+    def report_drift(self, label, before, stats):
+        for field, value in before.items():
+            if field not in ('id', 'updated_at') and getattr(stats, field) != value:
+                self.stdout.write(f"{label} {field}: {value} -> {getattr(stats, field)}")
@@ -0,0 +1,50 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from journal_app.benchmarks import ViewBenchmark, compare
+
+
+class Command(BaseCommand):
+    help = "Benchmark every view and report latency, query counts and peak memory as JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--route', action='append', dest='routes',
+                            help="Only benchmark this URL name (repeatable)")
+        parser.add_argument('--label', help="Free-form label stored in the report, e.g. a commit hash")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+        parser.add_argument('--compare', help="Previous JSON report to check for regressions")
+        parser.add_argument('--tolerance', type=float, default=0.1,
+                            help="Allowed relative p95 growth before reporting a regression")
+
+    def handle(self, *args, **options):
+        # Allows the test client's host and captures any mail the views send
+        setup_test_environment()
+        try:
+            report = ViewBenchmark(
+                iterations=options['iterations'],
+                warmup=options['warmup']
+            ).run(only=options['routes'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        finally:
+            teardown_test_environment()
+        report['label'] = options['label']
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                regressions = compare(json.load(f), report, options['tolerance'])
+            for line in regressions:
+                self.stderr.write(line)
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['compare']}")
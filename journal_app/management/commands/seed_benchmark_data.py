@@ -0,0 +1,356 @@
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from journal_app.models import (Department, DepartmentSettings, Profile, Journal, Volume,
+                                Issue, Article, Review, EmailLog, AuditLog,
+                                SiteStatistics, DepartmentStatistics, ArticleKeyword,
+                                DepartmentFacet, ArticleDailyUsage, ArticleFile, Upload)
+from journal_app.search import get_search_backend
+from journal_app.storage import document_storage
+from journal_app.uploads import discard_upload, start_upload
+
+SLUG_PREFIX = 'bench-'
+EMAIL_DOMAIN = 'bench.example.org'
+BASE_DATE = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+
+WORDS = (
+    'language literature narrative poetics discourse syntax semantics corpus '
+    'translation rhetoric genre colonial identity oral tradition drama fiction '
+    'pragmatics phonology dialect pedagogy literacy criticism theory archive '
+    'memory gender migration performance media digital humanities africa'
+).split()
+
+ROLE_WEIGHTS = [('AUTHOR', 60), ('REVIEWER', 25), ('EDITOR', 10), ('DEPT_ADMIN', 5)]
+STATUS_WEIGHTS = [
+    ('PUBLISHED', 45), ('SUBMITTED', 15), ('UNDER_REVIEW', 15), ('REVISION_REQUIRED', 8),
+    ('ACCEPTED', 7), ('REJECTED', 8), ('DRAFT', 2),
+]
+
+
+class Command(BaseCommand):
+    help = "Generate a deterministic synthetic dataset for benchmarking the views"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departments', type=int, default=3)
+        parser.add_argument('--journals', type=int, default=4, help="Journals per department")
+        parser.add_argument('--volumes', type=int, default=5, help="Volumes per journal")
+        parser.add_argument('--issues', type=int, default=4, help="Issues per volume")
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--articles', type=int, default=10000)
+        parser.add_argument('--reviews-per-article', type=int, default=2)
+        parser.add_argument('--email-logs', type=int, default=20000)
+        parser.add_argument('--audit-logs', type=int, default=20000)
+        parser.add_argument('--usage-days', type=int, default=0,
+                            help="Days of ArticleDailyUsage per published article, within the year before BASE_DATE")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--clear', action='store_true',
+                            help="Delete previously generated benchmark data first")
+
+    def handle(self, *args, **options):
+        if options['articles'] and options['users'] < options['departments']:
+            raise CommandError("Every department needs a user to write its articles: "
+                               "--users must be at least --departments")
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        if options['clear']:
+            self.clear()
+
+        with transaction.atomic():
+            departments = self.create_departments(options['departments'])
+            users = self.create_users(options['users'], departments)
+            journals = self.create_journals(departments, options['journals'], users)
+            issues = self.create_issues(journals, options['volumes'], options['issues'])
+            files = self.create_files()
+            self.create_articles(options, journals, issues, users, files)
+            self.create_uploads(users)
+            self.create_logs(options, departments, users)
+            if options['usage_days']:
+                self.create_usage(options['usage_days'])
+
+        # bulk_create skips the signals that maintain the statistics, keywords and search index
+        ArticleKeyword.rebuild(batch_size=self.batch_size)
+        SiteStatistics.reconcile()
+        for department in departments:
+            DepartmentStatistics.reconcile(department.pk)
+            DepartmentFacet.reconcile(department.pk)
+        get_search_backend().rebuild()
+
+        self.stdout.write(self.style.SUCCESS("Benchmark data generated"))
+
+    def clear(self):
+        for upload in Upload.objects.filter(owner__email__endswith=f'@{EMAIL_DOMAIN}'):
+            discard_upload(upload)
+        Department.objects.filter(slug__startswith=SLUG_PREFIX).delete()
+        get_user_model().objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').delete()
+        self.stdout.write("Removed previous benchmark data")
+
+    def words(self, count):
+        return ' '.join(self.rng.choices(WORDS, k=count))
+
+    def weighted(self, weights):
+        return self.rng.choices([value for value, _ in weights], [w for _, w in weights])[0]
+
+    def bulk_create(self, model, objects, keep=False):
+        """Insert an iterable of unsaved objects in batches, returning how many
+
+        With keep, returns the objects themselves, with primary keys; only
+        the small tables later rows point at are kept in memory.
+        """
+        created, count, batch = [], 0, []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                count += self.insert(model, batch, created if keep else None)
+                batch = []
+        if batch:
+            count += self.insert(model, batch, created if keep else None)
+        return created if keep else count
+
+    def insert(self, model, batch, created):
+        batch = model.objects.bulk_create(batch)
+        if created is not None:
+            created.extend(batch)
+        return len(batch)
+
+    def create_departments(self, count):
+        departments = self.bulk_create(Department, (
+            Department(
+                name=f'BENCH_{i:04d}',
+                slug=f'{SLUG_PREFIX}dept-{i}',
+                description=self.words(40),
+                established_date=(BASE_DATE - timedelta(days=365 * (i + 1))).date(),
+                email=f'dept{i}@{EMAIL_DOMAIN}',
+                address=self.words(6),
+                website_title=f'Benchmark Department {i}',
+            ) for i in range(count)
+        ), keep=True)
+        self.bulk_create(DepartmentSettings, (
+            DepartmentSettings(
+                department=department,
+                submission_guidelines=self.words(60),
+                review_guidelines=self.words(60),
+                publication_frequency='Quarterly',
+                peer_review_type='DOUBLE_BLIND',
+                contact_email=department.email,
+            ) for department in departments
+        ))
+        self.stdout.write(f"{len(departments)} departments")
+        return departments
+
+    def create_users(self, count, departments):
+        """Create users with profiles, returning {department_id: {role: [user ids]}}"""
+        password = make_password('benchmark-password')
+        users = self.bulk_create(get_user_model(), (
+            get_user_model()(
+                email=f'user{i}@{EMAIL_DOMAIN}',
+                password=password,
+                first_name=self.rng.choice(WORDS).title(),
+                last_name=self.rng.choice(WORDS).title(),
+            ) for i in range(count)
+        ), keep=True)
+        profiles = self.bulk_create(Profile, (
+            Profile(
+                user=user,
+                # The first member of each department administers it, so that one
+                # user can open every route of the department in the benchmark
+                role='DEPT_ADMIN' if i < len(departments) else self.weighted(ROLE_WEIGHTS),
+                institution='Benchmark University',
+                expertise=self.words(5),
+                bio=self.words(30),
+            ) for i, user in enumerate(users)
+        ), keep=True)
+
+        by_department = {d.pk: {role: [] for role, _ in ROLE_WEIGHTS} for d in departments}
+        memberships = []
+        for i, profile in enumerate(profiles):
+            department = departments[i % len(departments)]
+            by_department[department.pk][profile.role].append(profile.user_id)
+            memberships.append(Profile.departments.through(
+                profile_id=profile.pk, department_id=department.pk
+            ))
+        self.bulk_create(Profile.departments.through, memberships)
+        self.stdout.write(f"{len(users)} users")
+        return by_department
+
+    def create_journals(self, departments, per_department, users):
+        journals = self.bulk_create(Journal, (
+            Journal(
+                department=department,
+                title=f'Benchmark Journal {d}-{j}',
+                slug=f'{SLUG_PREFIX}journal-{d}-{j}',
+                description=self.words(30),
+                editor_in_chief_id=self.rng.choice(users[department.pk]['EDITOR'] or [None]),
+            ) for d, department in enumerate(departments) for j in range(per_department)
+        ), keep=True)
+        self.stdout.write(f"{len(journals)} journals")
+        return journals
+
+    def create_issues(self, journals, volumes_per_journal, issues_per_volume):
+        """Create volumes and issues, returning {journal_id: [issues]}"""
+        volumes = self.bulk_create(Volume, (
+            Volume(
+                journal=journal,
+                number=v + 1,
+                year=BASE_DATE.year - volumes_per_journal + v + 1,
+                title=f'Volume {v + 1}',
+                is_current=v == volumes_per_journal - 1,
+            ) for journal in journals for v in range(volumes_per_journal)
+        ), keep=True)
+        issues = self.bulk_create(Issue, (
+            Issue(
+                volume=volume,
+                number=n + 1,
+                title=f'Issue {n + 1}',
+                publication_date=datetime(volume.year, n % 12 + 1, 1).date(),
+                is_published=True,
+            ) for volume in volumes for n in range(issues_per_volume)
+        ), keep=True)
+        by_journal = {}
+        for issue in issues:
+            by_journal.setdefault(issue.volume.journal_id, []).append(issue)
+        self.stdout.write(f"{len(volumes)} volumes, {len(issues)} issues")
+        return by_journal
+
+    def create_files(self):
+        """Store the manuscript and supplementary file all the articles share, returning their names
+
+        The document storage keeps one copy of equal contents anyway, and
+        one name each keeps the seeding independent of the article count.
+        """
+        storage = document_storage()
+        return {
+            'manuscript': storage.save('manuscripts/bench/manuscript.pdf',
+                                       ContentFile(f'%PDF-1.4\n{self.words(600)}\n%%EOF\n'.encode())),
+            'supplement': storage.save('article_files/bench/supplement.csv',
+                                       ContentFile(f'word,count\n{self.words(1)},1\n'.encode())),
+        }
+
+    def create_articles(self, options, journals, issues, users, files):
+        """Create articles chunk by chunk, with the reviews and supplementary files for each chunk"""
+        total, created_reviews, created_files = options['articles'], 0, 0
+        for start in range(0, total, self.batch_size):
+            chunk = []
+            for i in range(start, min(start + self.batch_size, total)):
+                journal = self.rng.choice(journals)
+                roles = users[journal.department_id]
+                # Small datasets may give a department no authors; anyone in it can write
+                authors = roles['AUTHOR'] or [uid for ids in roles.values() for uid in ids]
+                status = self.weighted(STATUS_WEIGHTS)
+                submitted = BASE_DATE - timedelta(minutes=self.rng.randrange(5 * 365 * 24 * 60))
+                issue = self.rng.choice(issues[journal.pk]) if status == 'PUBLISHED' and issues.get(journal.pk) else None
+                chunk.append(Article(
+                    department_id=journal.department_id,
+                    journal=journal,
+                    title=self.words(8).capitalize(),
+                    slug=f'{SLUG_PREFIX}article-{i}',
+                    abstract=self.words(120),
+                    keywords=', '.join(self.rng.sample(WORDS, 4)),
+                    author_id=self.rng.choice(authors),
+                    content=self.words(600),
+                    manuscript_file=files['manuscript'],
+                    status=status,
+                    submission_date=submitted,
+                    publication_date=submitted + timedelta(days=120) if status == 'PUBLISHED' else None,
+                    volume_id=issue.volume_id if issue else None,
+                    issue=issue,
+                    citation_count=self.rng.randrange(50) if status == 'PUBLISHED' else 0,
+                    download_count=self.rng.randrange(2000) if status == 'PUBLISHED' else 0,
+                ))
+            articles = Article.objects.bulk_create(chunk)
+            created_reviews += self.bulk_create(Review, self.reviews_for(
+                articles, users, options['reviews_per_article']
+            ))
+            created_files += self.bulk_create(ArticleFile, (
+                ArticleFile(
+                    article=article,
+                    file=files['supplement'],
+                    file_type='SUPPLEMENT',
+                    description=self.words(10),
+                    uploaded_by_id=article.author_id,
+                ) for article in articles if article.status == 'PUBLISHED'
+            ))
+            self.stdout.write(f"{start + len(articles)}/{total} articles")
+        self.stdout.write(f"{created_reviews} reviews, {created_files} supplementary files")
+
+    def create_uploads(self, users):
+        """Start a resumable upload for each department administrator"""
+        admins = get_user_model().objects.filter(
+            pk__in=[roles['DEPT_ADMIN'][0] for roles in users.values() if roles['DEPT_ADMIN']]
+        )
+        count = 0
+        for admin in admins:
+            start_upload(admin, 'manuscript.pdf', 1024)
+            count += 1
+        self.stdout.write(f"{count} uploads")
+
+    def reviews_for(self, articles, users, per_article):
+        for article in articles:
+            if article.status in ('DRAFT', 'SUBMITTED'):
+                continue
+            reviewers = users[article.department_id]['REVIEWER']
+            for reviewer_id in self.rng.sample(reviewers, min(per_article, len(reviewers))):
+                complete = article.status != 'UNDER_REVIEW' or self.rng.random() < 0.5
+                assigned = article.submission_date + timedelta(days=7)
+                yield Review(
+                    article=article,
+                    reviewer_id=reviewer_id,
+                    due_date=assigned + timedelta(days=30),
+                    completion_date=assigned + timedelta(days=self.rng.randrange(1, 45)) if complete else None,
+                    comments_to_editor=self.words(40) if complete else '',
+                    comments_to_author=self.words(80) if complete else '',
+                    recommendation=self.rng.choice(Review.RECOMMENDATION_CHOICES)[0] if complete else '',
+                    is_complete=complete,
+                )
+
+    def create_logs(self, options, departments, users):
+        user_ids = {
+            department_id: [uid for ids in roles.values() for uid in ids] or [None]
+            for department_id, roles in users.items()
+        }
+
+        self.bulk_create(EmailLog, (
+            EmailLog(
+                department=department,
+                subject=self.words(6).capitalize(),
+                recipient=f'user{self.rng.randrange(options["users"])}@{EMAIL_DOMAIN}',
+                content=self.words(80),
+                status=self.rng.choice(['SENT', 'SENT', 'SENT', 'FAILED']),
+            ) for department in (self.rng.choice(departments) for _ in range(options['email_logs']))
+        ))
+        self.bulk_create(AuditLog, (
+            AuditLog(
+                department=department,
+                user_id=self.rng.choice(user_ids[department.pk]),
+                action=self.rng.choice(['ARTICLE_SUBMITTED', 'REVIEW_ASSIGNED', 'STATUS_CHANGED']),
+                details=self.words(20),
+                ip_address=f'10.0.{self.rng.randrange(256)}.{self.rng.randrange(256)}',
+            ) for department in (self.rng.choice(departments) for _ in range(options['audit_logs']))
+        ))
+        self.stdout.write(f"{options['email_logs']} email logs, {options['audit_logs']} audit logs")
+
+    def create_usage(self, days_per_article):
+        rows = 0
+        articles = Article.objects.filter(
+            slug__startswith=SLUG_PREFIX, status='PUBLISHED'
+        ).values_list('pk', flat=True).iterator()
+        for article_id in articles:
+            days = self.rng.sample(range(365), min(days_per_article, 365))
+            rows += self.bulk_create(ArticleDailyUsage, (
+                ArticleDailyUsage(
+                    article_id=article_id,
+                    date=(BASE_DATE - timedelta(days=day + 1)).date(),
+                    views=self.rng.randrange(1, 40),
+                    downloads=self.rng.randrange(20),
+                    unique_investigations=self.rng.randrange(1, 30),
+                    unique_requests=self.rng.randrange(15),
+                ) for day in days
+            ))
+        self.stdout.write(f"{rows} daily usage rows")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from journal_app.digests import send_digests
+
+
+class Command(BaseCommand):
+    help = "Queue editor digest emails for departments whose digest interval has passed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Send every pending digest now, whatever its interval")
+
+    def handle(self, *args, **options):
+        count = send_digests(force=options['all'])
+        self.stdout.write(self.style.SUCCESS(f"Queued {count} digest emails"))
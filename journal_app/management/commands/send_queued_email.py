@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from journal_app.outbox import drain
+
+
+class Command(BaseCommand):
+    help = "Send queued notification emails from the outbox, retrying failures with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help="Sender threads (default EMAIL_OUTBOX_WORKERS)")
+        parser.add_argument('--batch-size', type=int, help="Messages claimed at a time (default EMAIL_BATCH_SIZE per worker)")
+        parser.add_argument('--loop', action='store_true', help="Keep polling the outbox instead of exiting when it is empty")
+        parser.add_argument('--interval', type=float, default=5, help="Seconds between polls with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            result = drain(workers=options['workers'], batch_size=options['batch_size'])
+            if result.sent or result.failed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f"Sent {result.sent} emails, {result.failed} failed"))
+            if result.sent or result.failed:
+                count = result.sent + result.failed
+                self.stdout.write(
+                    f"Per email: {result.render_time / count * 1000:.2f} ms rendering, "
+                    f"{result.send_time / count * 1000:.2f} ms sending"
+                )
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
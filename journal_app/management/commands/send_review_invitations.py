@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from journal_app.assignments import send_review_invitations
+
+
+class Command(BaseCommand):
+    help = "Queue invitation emails for newly assigned reviews; run every few minutes from cron"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.EMAIL_BATCH_SIZE,
+                            help="Reviews invited per transaction")
+
+    def handle(self, *args, **options):
+        count = send_review_invitations(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Queued {count} review invitations"))
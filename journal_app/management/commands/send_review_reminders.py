@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from journal_app.reminders import send_review_reminders
+
+
+class Command(BaseCommand):
+    help = "Email reviewers whose open reviews are approaching or past their due date; safe to rerun, e.g. hourly from cron"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.REVIEW_REMINDER_BATCH_SIZE,
+                            help="Reviews loaded at a time")
+
+    def handle(self, *args, **options):
+        count = send_review_reminders(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Queued {count} review reminders"))
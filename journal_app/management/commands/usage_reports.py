@@ -0,0 +1,65 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from journal_app.models import Journal
+from journal_app.reports import (FORMATS, UsageReport, header_line, parse_month,
+                                 report_lines, stream_report)
+
+
+class Command(BaseCommand):
+    help = "Write monthly COUNTER-style usage reports, one file per journal"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', required=True, help="First month, YYYY-MM")
+        parser.add_argument('--end', required=True, help="Last month, YYYY-MM")
+        parser.add_argument('--level', choices=UsageReport.LEVELS, default='journal')
+        parser.add_argument('--format', choices=sorted(FORMATS), default='tsv')
+        parser.add_argument('--journal', action='append', dest='journals',
+                            help="Only report on this journal slug (repeatable)")
+        parser.add_argument('--output-dir', help="Write <journal slug>.<format> files here instead of stdout")
+
+    def handle(self, *args, **options):
+        try:
+            start, end = parse_month(options['start']), parse_month(options['end'])
+            journals = Journal.objects.order_by('pk')
+            if options['journals']:
+                journals = journals.filter(slug__in=options['journals'])
+            report = UsageReport(start, end, options['level'], journals=journals)
+        except ValueError as e:
+            raise CommandError(f"Invalid report period: {e}")
+        delimiter, _ = FORMATS[options['format']]
+
+        if not options['output_dir']:
+            for line in stream_report(report, delimiter):
+                self.stdout.write(line, ending='')
+            return
+
+        os.makedirs(options['output_dir'], exist_ok=True)
+        slugs = dict(journals.values_list('pk', 'slug'))
+        header = header_line(report, delimiter)
+        written, current, f = 0, None, None
+        try:
+            # Rows arrive grouped by journal, so one file is open at a time
+            for journal_id, line in report_lines(report, delimiter):
+                if journal_id != current:
+                    if f:
+                        f.close()
+                    current, written = journal_id, written + 1
+                    f = self.open_report(options, slugs.pop(journal_id), header)
+                f.write(line)
+        finally:
+            if f:
+                f.close()
+        # Journals without any usage still get a report
+        for slug in slugs.values():
+            self.open_report(options, slug, header).close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written + len(slugs)} reports to {options['output_dir']}"
+        ))
+
+    def open_report(self, options, slug, header):
+        f = open(os.path.join(options['output_dir'], f"{slug}.{options['format']}"), 'w', newline='')
+        f.write(header)
+        return f
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal_app', '0004_department_faculty_members'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('journals_count', models.BigIntegerField(default=0)),
+                ('articles_count', models.BigIntegerField(default=0)),
+                ('published_articles_count', models.BigIntegerField(default=0)),
+                ('authors_count', models.BigIntegerField(default=0)),
+                ('reviews_count', models.BigIntegerField(default=0)),
+                ('total_citations', models.BigIntegerField(default=0)),
+                ('total_downloads', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'site statistics',
+            },
+        ),
+    ]
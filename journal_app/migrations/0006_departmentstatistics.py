@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal_app', '0005_sitestatistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('journals_count', models.BigIntegerField(default=0)),
+                ('articles_count', models.BigIntegerField(default=0)),
+                ('authors_count', models.BigIntegerField(default=0)),
+                ('total_citations', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='journal_app.department')),
+            ],
+            options={
+                'verbose_name_plural': 'department statistics',
+            },
+        ),
+        migrations.CreateModel(
+            name='DepartmentAuthor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('articles_count', models.PositiveIntegerField(default=0)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='department_counts', to=settings.AUTH_USER_MODEL)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='author_counts', to='journal_app.department')),
+            ],
+            options={
+                'unique_together': {('department', 'author')},
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS journal_app_article_fts USING fts5("
+    "title, abstract, keywords, content, tokenize='porter unicode61 remove_diacritics 2')",
+    "INSERT INTO journal_app_article_fts (rowid, title, abstract, keywords, content) "
+    "SELECT id, title, abstract, keywords, content FROM journal_app_article",
+]
+SQLITE_REVERSE = ["DROP TABLE IF EXISTS journal_app_article_fts"]
+
+POSTGRES_FORWARD = [
+    "CREATE TABLE IF NOT EXISTS journal_app_article_search ("
+    "article_id bigint PRIMARY KEY REFERENCES journal_app_article (id) ON DELETE CASCADE "
+    "DEFERRABLE INITIALLY DEFERRED, document tsvector NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS journal_app_article_search_document_idx "
+    "ON journal_app_article_search USING gin (document)",
+    "INSERT INTO journal_app_article_search (article_id, document) "
+    "SELECT a.id, "
+    "setweight(to_tsvector('english', coalesce(a.title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(a.keywords, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(a.abstract, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(a.content, '')), 'D') "
+    "FROM journal_app_article a",
+]
+POSTGRES_REVERSE = ["DROP TABLE IF EXISTS journal_app_article_search"]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal_app', '0006_departmentstatistics'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            run_for_vendor({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE}),
+        ),
+    ]
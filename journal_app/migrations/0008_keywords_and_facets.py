@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal_app', '0007_article_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Keyword',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArticleKeyword',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='article_keywords', to='journal_app.article')),
+                ('keyword', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='keyword_articles', to='journal_app.keyword')),
+            ],
+            options={
+                'unique_together': {('keyword', 'article')},
+            },
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='articles', through='journal_app.ArticleKeyword', to='journal_app.keyword'),
+        ),
+        migrations.CreateModel(
+            name='DepartmentFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(choices=[('keyword', 'Keyword'), ('year', 'Year'), ('journal', 'Journal'), ('status', 'Status')], max_length=20)),
+                ('value', models.CharField(max_length=200)),
+                ('count', models.BigIntegerField(default=0)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facets', to='journal_app.department')),
+            ],
+            options={
+                'unique_together': {('department', 'facet', 'value')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal_app', '0008_keywords_and_facets'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['journal', 'status', '-publication_date', '-id'], name='article_journal_listing_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal_app', '0010_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsageAggregation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_event_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UsageEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('article_id', models.BigIntegerField()),
+                ('kind', models.CharField(choices=[('VIEW', 'View'), ('DOWNLOAD', 'Download')], max_length=10)),
+                ('timestamp', models.DateTimeField()),
+                ('client', models.CharField(max_length=32)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['article_id', 'timestamp'], name='usage_article_time_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArticleDailyUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('downloads', models.PositiveIntegerField(default=0)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_usage', to='journal_app.article')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('article', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal_app', '0011_usage_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articledailyusage',
+            name='unique_investigations',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='articledailyusage',
+            name='unique_requests',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:02
+
+import journal_app.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal_app', '0013_resumable_uploads'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='article',
+            name='manuscript_file',
+            field=models.FileField(storage=journal_app.storage.document_storage, upload_to='manuscripts/%Y/%m/'),
+        ),
+        migrations.AlterField(
+            model_name='articlefile',
+            name='file',
+            field=models.FileField(storage=journal_app.storage.document_storage, upload_to='article_files/%Y/%m/'),
+        ),
+        migrations.AlterField(
+            model_name='reviewattachment',
+            name='file',
+            field=models.FileField(storage=journal_app.storage.document_storage, upload_to='review_attachments/%Y/%m/'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:13
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal_app', '0016_outgoingemail_render_time'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'New submission'), (2, 'Review completed')])),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='journal_app.article')),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='digest_events', to='journal_app.department')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='digest_events', to=settings.AUTH_USER_MODEL)),
+                ('review', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='journal_app.review')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['department', 'created_at'], name='digest_department_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal_app', '0017_digest_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='reminder_tier',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('is_complete', False)), fields=['due_date'], name='review_open_due_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal_app', '0018_review_reminder_tier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='invitation_message',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='invitation_pending',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('invitation_pending', True)), fields=['article'], name='review_invitation_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal_app', '0019_review_invitation_pending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='invitation_claim',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,12 +1,18 @@
 # models.py
 
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Window
+from django.db.models.functions import Coalesce, ExtractYear, RowNumber
 from django.contrib.auth.models import User, AbstractUser, BaseUserManager
 from django.utils import timezone
 from django.urls import reverse
+import os
+import re
 import uuid
 from django.conf import settings
 
+from .storage import document_storage
+
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -63,6 +69,10 @@ class Department(models.Model):
     def get_absolute_url(self):
         return reverse('department_home', kwargs={'dept_slug': self.slug})
 
+    def get_editors(self):
+        """Users who handle this department's submissions"""
+        return CustomUser.objects.filter(profile__departments=self, profile__role__in=['EDITOR', 'DEPT_ADMIN'])
+
 class DepartmentSettings(models.Model):
     department = models.OneToOneField(Department, on_delete=models.CASCADE, related_name='settings')
     submission_guidelines = models.TextField()
@@ -117,6 +127,23 @@ class Profile(models.Model):
         self.reviews_count += 1
         self.save()
 
+class JournalQuerySet(models.QuerySet):
+    def with_listing_data(self):
+        """Annotate article counts and the latest issue date for journal listings"""
+        articles = Article.objects.filter(journal=OuterRef('pk')).order_by().values('journal')
+        article_count = articles.annotate(count=Count('pk')).values('count')
+        published_count = articles.filter(status='PUBLISHED').annotate(count=Count('pk')).values('count')
+        latest_issue = Issue.objects.filter(
+            volume__journal=OuterRef('pk'),
+            is_published=True
+        ).order_by('-publication_date').values('publication_date')[:1]
+
+        return self.select_related('department', 'editor_in_chief').annotate(
+            articles_count=Coalesce(Subquery(article_count), 0),
+            published_articles_count=Coalesce(Subquery(published_count), 0),
+            latest_issue_publication_date=Subquery(latest_issue),
+        )
+
 class Journal(models.Model):
     department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='journals')
     title = models.CharField(max_length=200)
@@ -131,6 +158,8 @@ class Journal(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = JournalQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.title} ({self.department.name})"
 
@@ -202,7 +231,7 @@ class Article(models.Model):
     
     # Content and Files
     content = models.TextField()
-    manuscript_file = models.FileField(upload_to='manuscripts/%Y/%m/')
+    manuscript_file = models.FileField(upload_to='manuscripts/%Y/%m/', storage=document_storage)
     supplementary_files = models.ManyToManyField('ArticleFile', related_name='supplementary_to', blank=True)
     
     # Status and Tracking
@@ -219,6 +248,7 @@ class Article(models.Model):
     issue = models.ForeignKey(Issue, on_delete=models.SET_NULL, null=True, related_name='issue_articles')
     citation_count = models.PositiveIntegerField(default=0)
     download_count = models.PositiveIntegerField(default=0)
+    tags = models.ManyToManyField('Keyword', through='ArticleKeyword', related_name='articles', blank=True)
     
     # Flags and Settings
     is_featured = models.BooleanField(default=False)
@@ -230,12 +260,24 @@ class Article(models.Model):
     class Meta:
         ordering = ['-submission_date']
         unique_together = ['journal', 'slug']
+        indexes = [
+            # Keyset pagination of a journal's published articles (see pagination.py)
+            models.Index(fields=['journal', 'status', '-publication_date', '-id'], name='article_journal_listing_idx'),
+            # Department listings and dashboard queues by status, newest first
+            models.Index(fields=['department', 'status', '-publication_date'], name='article_dept_status_pub_idx'),
+            models.Index(fields=['department', 'status', '-submission_date'], name='article_dept_status_sub_idx'),
+            models.Index(fields=['department', '-publication_date'], name='article_dept_pub_idx'),
+            # Site-wide recent publications on the home page
+            models.Index(fields=['status', '-publication_date'], name='article_status_pub_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
     def generate_doi(self):
-        if not self.doi and self.department.settings.enable_doi:
+        # Imported here because departments.py imports this module
+        from .departments import department_setting
+        if not self.doi and department_setting(self.department_id, 'enable_doi'):
             # Implement DOI generation logic
             pass
 
@@ -250,7 +292,7 @@ class ArticleFile(models.Model):
     ]
 
     article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='article_files')
-    file = models.FileField(upload_to='article_files/%Y/%m/')
+    file = models.FileField(upload_to='article_files/%Y/%m/', storage=document_storage)
     file_type = models.CharField(max_length=20, choices=FILE_TYPES)
     version = models.PositiveIntegerField(default=1)
     description = models.TextField(blank=True)
@@ -305,6 +347,13 @@ class Review(models.Model):
     comments_to_author = models.TextField()
     recommendation = models.CharField(max_length=20, choices=RECOMMENDATION_CHOICES)
     is_complete = models.BooleanField(default=False)
+    # Highest REVIEW_REMINDER_DAYS tier reminded of so far (reminders.py); 0 for none
+    reminder_tier = models.PositiveSmallIntegerField(default=0)
+    # Set by assignments.assign_reviewers until `manage.py send_review_invitations` invites the reviewer
+    invitation_pending = models.BooleanField(default=False)
+    invitation_message = models.TextField(blank=True)
+    # The send_review_invitations batch that unflagged the review, so overlapping runs never both invite
+    invitation_claim = models.UUIDField(null=True, blank=True, editable=False)
     
     # Review Form Responses
     review_form_responses = models.JSONField(null=True, blank=True)
@@ -313,20 +362,46 @@ class Review(models.Model):
     class Meta:
         unique_together = ['article', 'reviewer']
         ordering = ['-assigned_date']
+        indexes = [
+            # A reviewer's open assignments, and an article's complete/pending counts
+            models.Index(fields=['reviewer', 'is_complete'], name='review_reviewer_complete_idx'),
+            models.Index(fields=['article', 'is_complete'], name='review_article_complete_idx'),
+            # Open reviews by deadline, for the reminder sweep
+            models.Index(fields=['due_date'], condition=Q(is_complete=False), name='review_open_due_idx'),
+            models.Index(fields=['article'], condition=Q(invitation_pending=True), name='review_invitation_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        review = super().from_db(db, field_names, values)
+        # The stored deadline, so save() can tell when it moves
+        review._stored_due_date = review.__dict__.get('due_date')
+        return review
 
     def save(self, *args, **kwargs):
         if not self.due_date:
             # Set due date based on department settings
-            days = self.article.department.settings.review_deadline_days
+            # Imported here because departments.py imports this module
+            from .departments import department_setting
+            days = department_setting(self.article.department_id, 'review_deadline_days')
             self.due_date = timezone.now() + timezone.timedelta(days=days)
+        # A new deadline starts the reminders over (reminders.py)
+        stored = getattr(self, '_stored_due_date', None)
+        update_fields = kwargs.get('update_fields')
+        if stored is not None and self.due_date != stored and self.reminder_tier:
+            self.reminder_tier = 0
+            if update_fields is not None and 'due_date' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'reminder_tier'}
         super().save(*args, **kwargs)
+        if update_fields is None or 'due_date' in update_fields:
+            self._stored_due_date = self.due_date
 
     def __str__(self):
         return f"Review for {self.article.title} by {self.reviewer.username}"
 
 class ReviewAttachment(models.Model):
     review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name='review_files')
-    file = models.FileField(upload_to='review_attachments/%Y/%m/')
+    file = models.FileField(upload_to='review_attachments/%Y/%m/', storage=document_storage)
     description = models.CharField(max_length=255)
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
@@ -341,12 +416,73 @@ class EmailLog(models.Model):
     content = models.TextField()
     sent_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20)
+    error_message = models.TextField(blank=True)
     related_article = models.ForeignKey(Article, on_delete=models.SET_NULL, null=True, blank=True)
     related_review = models.ForeignKey(Review, on_delete=models.SET_NULL, null=True, blank=True)
 
     class Meta:
         ordering = ['-sent_at']
 
+
+class OutgoingEmail(models.Model):
+    """Outbox row for one rendered email, delivered by outbox.py outside the request
+
+    The EmailLog is created QUEUED with the row and marked SENT or FAILED
+    by the worker. Failed deliveries are retried with exponential backoff
+    until EMAIL_OUTBOX_MAX_ATTEMPTS.
+    """
+    PENDING, SENDING, SENT, FAILED = 'PENDING', 'SENDING', 'SENT', 'FAILED'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    log = models.OneToOneField(EmailLog, on_delete=models.CASCADE, related_name='outgoing')
+    from_email = models.CharField(max_length=254)
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=200)
+    text_content = models.TextField()
+    html_content = models.TextField(blank=True)
+    # Seconds spent rendering the templates, reported by the worker
+    render_time = models.FloatField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # When a worker took the message; a stale claim means the worker died
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+class DigestEvent(models.Model):
+    """An event waiting for an editor's next digest email (digests.py); deleted once the digest is queued
+
+    Only ids are stored; the digest loads the articles and reviews when it is built.
+    """
+    NEW_SUBMISSION, REVIEW_COMPLETED = 1, 2
+    KIND_CHOICES = [
+        (NEW_SUBMISSION, 'New submission'),
+        (REVIEW_COMPLETED, 'Review completed'),
+    ]
+
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='digest_events')
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='digest_events')
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES)
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='+')
+    review = models.ForeignKey(Review, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['department', 'created_at'], name='digest_department_idx'),
+        ]
+
 class AuditLog(models.Model):
     department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='audit_logs')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
@@ -356,4 +492,383 @@ class AuditLog(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     
     class Meta:
-        ordering = ['-timestamp']
\ No newline at end of file
+        ordering = ['-timestamp']
+
+# ---------------- Statistics ---------------------
+class SiteStatistics(models.Model):
+    """Site-wide counters for the landing pages, kept current by signals"""
+    SINGLETON_ID = 1
+
+    journals_count = models.BigIntegerField(default=0)
+    articles_count = models.BigIntegerField(default=0)
+    published_articles_count = models.BigIntegerField(default=0)
+    authors_count = models.BigIntegerField(default=0)
+    reviews_count = models.BigIntegerField(default=0)
+    total_citations = models.BigIntegerField(default=0)
+    total_downloads = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'site statistics'
+
+    def __str__(self):
+        return f"Site statistics as of {self.updated_at:%Y-%m-%d %H:%M}"
+
+    @classmethod
+    def compute(cls):
+        """Count every statistic from scratch"""
+        articles = Article.objects.aggregate(
+            articles_count=Count('id'),
+            published_articles_count=Count('id', filter=Q(status='PUBLISHED')),
+            total_citations=Sum('citation_count'),
+            total_downloads=Sum('download_count'),
+        )
+        return {
+            'journals_count': Journal.objects.filter(is_active=True).count(),
+            'articles_count': articles['articles_count'],
+            'published_articles_count': articles['published_articles_count'],
+            'authors_count': Profile.objects.filter(role='AUTHOR').count(),
+            'reviews_count': Review.objects.filter(is_complete=True).count(),
+            'total_citations': articles['total_citations'] or 0,
+            'total_downloads': articles['total_downloads'] or 0,
+        }
+
+    @classmethod
+    def reconcile(cls):
+        """Rebuild the snapshot row from the underlying tables"""
+        stats, _ = cls.objects.update_or_create(pk=cls.SINGLETON_ID, defaults=cls.compute())
+        return stats
+
+    @classmethod
+    def get_current(cls):
+        try:
+            return cls.objects.get(pk=cls.SINGLETON_ID)
+        except cls.DoesNotExist:
+            return cls.reconcile()
+
+    @classmethod
+    def apply_deltas(cls, deltas):
+        """Add the given per-counter deltas to the snapshot in one UPDATE"""
+        changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if changes:
+            # A missing snapshot is built from scratch on first read instead
+            cls.objects.filter(pk=cls.SINGLETON_ID).update(updated_at=timezone.now(), **changes)
+
+
+class DepartmentAuthor(models.Model):
+    """Number of articles each author has in a department, for distinct author counts"""
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='author_counts')
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='department_counts')
+    articles_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['department', 'author']
+
+
+class DepartmentStatistics(models.Model):
+    """Per-department counters for department_detail, kept current by signals"""
+    department = models.OneToOneField(Department, on_delete=models.CASCADE, related_name='statistics')
+    journals_count = models.BigIntegerField(default=0)
+    articles_count = models.BigIntegerField(default=0)
+    authors_count = models.BigIntegerField(default=0)
+    total_citations = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'department statistics'
+
+    def __str__(self):
+        return f"Statistics for {self.department_id}"
+
+    @classmethod
+    def reconcile(cls, department_id):
+        """Rebuild the author counts and the snapshot row for one department"""
+        author_counts = Article.objects.filter(
+            department_id=department_id
+        ).values('author_id').annotate(articles_count=Count('id')).order_by()
+        DepartmentAuthor.objects.filter(department_id=department_id).delete()
+        DepartmentAuthor.objects.bulk_create([
+            DepartmentAuthor(department_id=department_id, **row) for row in author_counts
+        ])
+
+        articles = Article.objects.filter(department_id=department_id).aggregate(
+            articles_count=Count('id'),
+            total_citations=Sum('citation_count'),
+        )
+        stats, _ = cls.objects.update_or_create(department_id=department_id, defaults={
+            'journals_count': Journal.objects.filter(department_id=department_id).count(),
+            'articles_count': articles['articles_count'],
+            'authors_count': DepartmentAuthor.objects.filter(department_id=department_id).count(),
+            'total_citations': articles['total_citations'] or 0,
+        })
+        return stats
+
+    @classmethod
+    def get_for_department(cls, department):
+        try:
+            return cls.objects.get(department=department)
+        except cls.DoesNotExist:
+            return cls.reconcile(department.pk)
+
+    @classmethod
+    def apply_deltas(cls, department_id, deltas):
+        """Add the given per-counter deltas to one department's snapshot"""
+        changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if changes:
+            cls.objects.filter(department_id=department_id).update(updated_at=timezone.now(), **changes)
+
+    @classmethod
+    def add_author_article(cls, department_id, author_id):
+        updated = DepartmentAuthor.objects.filter(
+            department_id=department_id, author_id=author_id
+        ).update(articles_count=F('articles_count') + 1)
+        if not updated:
+            try:
+                # In a savepoint: a concurrent save may have added the author's row since
+                with transaction.atomic():
+                    DepartmentAuthor.objects.create(department_id=department_id, author_id=author_id, articles_count=1)
+            except IntegrityError:
+                DepartmentAuthor.objects.filter(
+                    department_id=department_id, author_id=author_id
+                ).update(articles_count=F('articles_count') + 1)
+            else:
+                cls.apply_deltas(department_id, {'authors_count': 1})
+
+    @classmethod
+    def remove_author_article(cls, department_id, author_id):
+        pair = DepartmentAuthor.objects.filter(department_id=department_id, author_id=author_id)
+        if not pair.filter(articles_count__gt=1).update(articles_count=F('articles_count') - 1):
+            deleted, _ = pair.delete()
+            if deleted:
+                cls.apply_deltas(department_id, {'authors_count': -1})
+
+
+# ---------------- Keywords and facets ---------------------
+def normalize_keyword(value):
+    """Case- and whitespace-fold a keyword so spelling variants share one row"""
+    return ' '.join(value.split()).casefold()
+
+
+def split_keywords(value):
+    """Distinct normalized keywords from the comma or semicolon separated field"""
+    names = (normalize_keyword(part) for part in re.split(r'[,;]', value or ''))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+class Keyword(models.Model):
+    name = models.CharField(max_length=200, unique=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def ids_for(cls, names):
+        """Map each normalized name to its keyword id, creating missing keywords"""
+        if not names:
+            return {}
+        cls.objects.bulk_create([cls(name=name) for name in names], ignore_conflicts=True)
+        return dict(cls.objects.filter(name__in=names).values_list('name', 'id'))
+
+
+class ArticleKeyword(models.Model):
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='article_keywords')
+    keyword = models.ForeignKey(Keyword, on_delete=models.CASCADE, related_name='keyword_articles')
+
+    class Meta:
+        unique_together = ['keyword', 'article']
+
+    @classmethod
+    def sync(cls, article):
+        """Point an article's keyword links at the keywords in its free-text field"""
+        wanted = set(Keyword.ids_for(split_keywords(article.keywords)).values())
+        current = set(cls.objects.filter(article=article).values_list('keyword_id', flat=True))
+        if current - wanted:
+            cls.objects.filter(article=article, keyword_id__in=current - wanted).delete()
+        if wanted - current:
+            cls.objects.bulk_create([cls(article=article, keyword_id=pk) for pk in wanted - current])
+
+    @classmethod
+    def rebuild(cls, batch_size=2000):
+        """Recreate every article's keyword links from the free-text field"""
+        cls.objects.all().delete()
+        rows = Article.objects.order_by('pk').values_list('pk', 'keywords')
+        last = 0
+        # Batches continue from the last pk rather than an OFFSET, which rescans every earlier row
+        while batch := [(pk, split_keywords(keywords)) for pk, keywords in rows.filter(pk__gt=last)[:batch_size]]:
+            last = batch[-1][0]
+            ids = Keyword.ids_for(list({name for _, names in batch for name in names}))
+            cls.objects.bulk_create([
+                cls(article_id=pk, keyword_id=ids[name]) for pk, names in batch for name in names
+            ])
+
+
+class DepartmentFacet(models.Model):
+    """Article counts per facet value in a department, kept current by signals
+
+    Keyword, year and journal facets count published articles, the status
+    facet counts every article.
+    """
+    KEYWORD, YEAR, JOURNAL, STATUS = 'keyword', 'year', 'journal', 'status'
+    FACET_CHOICES = [
+        (KEYWORD, 'Keyword'),
+        (YEAR, 'Year'),
+        (JOURNAL, 'Journal'),
+        (STATUS, 'Status'),
+    ]
+
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='facets')
+    facet = models.CharField(max_length=20, choices=FACET_CHOICES)
+    value = models.CharField(max_length=200)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['department', 'facet', 'value']
+
+    def __str__(self):
+        return f"{self.facet}={self.value}: {self.count}"
+
+    @classmethod
+    def for_article(cls, article):
+        """The (facet, value) pairs a single article contributes to"""
+        values = {(cls.STATUS, article.status)}
+        if article.status == 'PUBLISHED':
+            values.add((cls.JOURNAL, str(article.journal_id)))
+            values.update((cls.KEYWORD, name) for name in split_keywords(article.keywords))
+            if article.publication_date:
+                values.add((cls.YEAR, str(article.publication_date.year)))
+        return values
+
+    @classmethod
+    def reconcile(cls, department_id):
+        """Recount every facet of one department from the article table"""
+        articles = Article.objects.filter(department_id=department_id).order_by()
+        published = articles.filter(status='PUBLISHED')
+        counts = [
+            (cls.STATUS, articles.values_list('status').annotate(Count('id'))),
+            (cls.JOURNAL, published.values_list('journal_id').annotate(Count('id'))),
+            (cls.YEAR, published.exclude(publication_date=None).annotate(
+                year=ExtractYear('publication_date')
+            ).values_list('year').annotate(Count('id'))),
+            (cls.KEYWORD, ArticleKeyword.objects.filter(
+                article__department_id=department_id, article__status='PUBLISHED'
+            ).values_list('keyword__name').annotate(Count('id')).order_by()),
+        ]
+        cls.objects.filter(department_id=department_id).delete()
+        cls.objects.bulk_create([
+            cls(department_id=department_id, facet=facet, value=str(value), count=count)
+            for facet, rows in counts for value, count in rows
+        ])
+
+    @classmethod
+    def apply_deltas(cls, department_id, deltas):
+        """Add {(facet, value): delta} to one department's facet counts"""
+        for (facet, value), delta in deltas.items():
+            if not delta:
+                continue
+            rows = cls.objects.filter(department_id=department_id, facet=facet, value=value)
+            if rows.update(count=F('count') + delta) or delta < 0:
+                continue
+            try:
+                # In a savepoint: a concurrent save may have added the value's row since
+                with transaction.atomic():
+                    cls.objects.create(department_id=department_id, facet=facet, value=value, count=delta)
+            except IntegrityError:
+                rows.update(count=F('count') + delta)
+
+    @classmethod
+    def counts(cls, department, limit=None):
+        """{facet: [(value, count), ...]} for one department, largest counts first"""
+        facets = {facet: [] for facet, _ in cls.FACET_CHOICES}
+        rows = cls.objects.filter(department=department, count__gt=0)
+        if limit is not None:
+            # The database keeps the top `limit` of each facet; departments have thousands of keywords
+            rows = rows.annotate(rank=Window(
+                RowNumber(), partition_by=F('facet'), order_by=[F('count').desc(), F('value').asc()]
+            )).filter(rank__lte=limit)
+        for facet, value, count in rows.order_by('facet', '-count', 'value').values_list('facet', 'value', 'count'):
+            facets[facet].append((value, count))
+        return facets
+
+
+# ---------------- Usage ---------------------
+class UsageEvent(models.Model):
+    """Append-only log of article views and downloads, written in batches by usage.py
+
+    article_id is a plain column rather than a foreign key so buffered
+    inserts need no constraint checks and events outlive deleted articles.
+    """
+    VIEW, DOWNLOAD = 'VIEW', 'DOWNLOAD'
+    KIND_CHOICES = [
+        (VIEW, 'View'),
+        (DOWNLOAD, 'Download'),
+    ]
+
+    article_id = models.BigIntegerField()
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    timestamp = models.DateTimeField()
+    client = models.CharField(max_length=32)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['article_id', 'timestamp'], name='usage_article_time_idx'),
+        ]
+
+
+class ArticleDailyUsage(models.Model):
+    """COUNTER-style usage per article per day, folded in from UsageEvent
+
+    views and downloads exclude double-clicks; the unique columns count
+    distinct clients that day with any activity (investigations) or with
+    a download (requests).
+    """
+    COUNTER_COLUMNS = ['views', 'downloads', 'unique_investigations', 'unique_requests']
+
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='daily_usage')
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    downloads = models.PositiveIntegerField(default=0)
+    unique_investigations = models.PositiveIntegerField(default=0)
+    unique_requests = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['article', 'date']
+        ordering = ['-date']
+
+
+class UsageAggregation(models.Model):
+    """Singleton high-water mark: the last UsageEvent folded into the counters"""
+    SINGLETON_ID = 1
+
+    last_event_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+# ---------------- Uploads ---------------------
+class Upload(models.Model):
+    """A resumable upload, received in chunks by uploads.py
+
+    The bytes received so far are in a partial file under
+    UPLOAD_TEMP_DIR named after the token. Once all `size` bytes are in,
+    the SHA-256 is checked and completed_at set; a form then attaches the
+    file to an article by token, which moves it into storage.
+    """
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='uploads')
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    # Hex SHA-256 announced by the client, or computed on completion when it sent none
+    checksum = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def is_complete(self):
+        return self.completed_at is not None
+
+    @property
+    def partial_path(self):
+        return os.path.join(settings.UPLOAD_TEMP_DIR, self.token.hex)
@@ -1,10 +1,12 @@
 # notifications.py
 
-from django.core.mail import send_mail, EmailMultiAlternatives
-from django.template.loader import render_to_string
 from django.conf import settings
 from django.urls import reverse
-from .models import EmailLog
+from django.utils import dateformat, timezone
+from .digests import digest_interval, record_event
+from .emails import render_batch, render_email
+from .models import DepartmentSettings, DigestEvent
+from .outbox import enqueue_batch, enqueue_email
 
 class NotificationManager:
     """Handle all email notifications in the system"""
@@ -12,49 +14,28 @@ class NotificationManager:
     def __init__(self, request=None):
         self.request = request
         self.from_email = settings.DEFAULT_FROM_EMAIL
+
+    def _absolute_url(self, path):
+        """Full URL of a path: from the current request, or SITE_URL in commands and workers"""
+        if self.request is not None:
+            return self.request.build_absolute_uri(path)
+        return settings.SITE_URL.rstrip('/') + path
     
     def _send_email(self, to_email, subject, template_name, context, department):
-        """Generic method to send emails"""
-        # Render email templates
-        html_content = render_to_string(f'journal_app/emails/{template_name}.html', context)
-        text_content = render_to_string(f'journal_app/emails/{template_name}.txt', context)
-        
-        try:
-            # Create email message
-            msg = EmailMultiAlternatives(
-                subject,
-                text_content,
-                self.from_email,
-                [to_email]
-            )
-            msg.attach_alternative(html_content, "text/html")
-            msg.send()
-            
-            # Log the email
-            EmailLog.objects.create(
-                department=department,
-                subject=subject,
-                recipient=to_email,
-                content=text_content,
-                status='SENT',
-                related_article=context.get('article'),
-                related_review=context.get('review')
-            )
-            return True
-            
-        except Exception as e:
-            # Log failed email attempt
-            EmailLog.objects.create(
-                department=department,
-                subject=subject,
-                recipient=to_email,
-                content=text_content,
-                status='FAILED',
-                error_message=str(e),
-                related_article=context.get('article'),
-                related_review=context.get('review')
-            )
-            return False
+        """Render an email and queue it in the outbox; it is sent by `manage.py send_queued_email`"""
+        rendered = render_email(template_name, context)
+        enqueue_email(
+            department,
+            to_email,
+            subject,
+            rendered.text,
+            rendered.html,
+            from_email=self.from_email,
+            article=context.get('article'),
+            review=context.get('review'),
+            render_time=rendered.seconds
+        )
+        return True
 
     def send_submission_confirmation(self, article):
         """Send confirmation email to author after submission"""
@@ -62,7 +43,7 @@ class NotificationManager:
             'article': article,
             'author': article.author,
             'department': article.department,
-            'article_url': self.request.build_absolute_uri(
+            'article_url': self._absolute_url(
                 reverse('journal_app:article_detail', args=[
                     article.department.slug,
                     article.id
@@ -81,89 +62,93 @@ class NotificationManager:
     def notify_editors_new_submission(self, article):
         """Notify department editors about new submission"""
         editors = article.department.get_editors()
-        success = True
-        
+        if digest_interval(article.department):
+            record_event(article.department, DigestEvent.NEW_SUBMISSION, editors, article)
+            return True
+
         context = {
             'article': article,
             'author': article.author,
             'department': article.department,
-            'review_url': self.request.build_absolute_uri(
+            'review_url': self._absolute_url(
                 reverse('journal_app:article_detail', args=[
                     article.department.slug,
                     article.id
                 ])
             )
         }
-        
-        for editor in editors:
-            success &= self._send_email(
-                editor.email,
-                f'New Submission: {article.title}',
-                'new_submission_editor',
-                context,
-                article.department
-            )
-            
-        return success
+
+        self.send_batch(
+            {editor.email: {'recipient_name': editor.get_full_name()} for editor in editors},
+            f'New Submission: {article.title}',
+            'submission_editor',
+            context,
+            article.department
+        )
+        return True
 
     def send_review_invitation(self, review):
         """Send review invitation to reviewer"""
+        return self.send_review_invitations(review.article, [review], review.invitation_message)
+
+    def send_review_invitations(self, article, reviews, message=''):
+        """Invite the reviewers of one article, rendering the invitation once"""
+        department = article.department
+        try:
+            deadline_days = department.settings.review_deadline_days
+        except DepartmentSettings.DoesNotExist:
+            deadline_days = None
         context = {
-            'review': review,
-            'article': review.article,
-            'reviewer': review.reviewer,
-            'department': review.article.department,
-            'due_date': review.due_date,
-            'accept_url': self.request.build_absolute_uri(
-                reverse('journal_app:review_accept', args=[
-                    review.article.department.slug,
-                    review.id
-                ])
-            ),
-            'decline_url': self.request.build_absolute_uri(
-                reverse('journal_app:review_decline', args=[
-                    review.article.department.slug,
-                    review.id
-                ])
-            )
+            'article': article,
+            'department': department,
+            'message': message,
+            'review_deadline_days': deadline_days,
+            # Declining is a message to the editorial office
+            'decline_url': f'mailto:{department.email}?subject=Declining review: {article.title}',
         }
-        
-        return self._send_email(
-            review.reviewer.email,
-            f'Review Invitation: {review.article.title}',
-            'review_invitation',
-            context,
-            review.article.department
-        )
+        recipients = {
+            review.reviewer.email: {
+                'reviewer_name': review.reviewer.get_full_name(),
+                'due_date': dateformat.format(timezone.localtime(review.due_date), 'F j, Y'),
+                'accept_url': self._absolute_url(
+                    reverse('journal_app:review_submit', args=[department.slug, review.id])
+                ),
+            }
+            for review in reviews
+        }
+        self.send_batch(recipients, f'Review Invitation: {article.title}', 'review_invitation', context, department)
+        return True
 
     def notify_review_completed(self, review):
         """Notify editors about completed review"""
+        department = review.article.department
+        if digest_interval(department):
+            record_event(department, DigestEvent.REVIEW_COMPLETED, department.get_editors(), review.article, review)
+            return True
+
         context = {
             'review': review,
             'article': review.article,
             'reviewer': review.reviewer,
             'department': review.article.department,
-            'review_url': self.request.build_absolute_uri(
-                reverse('journal_app:review_detail', args=[
+            'review_url': self._absolute_url(
+                # Editors read reviews on the article page
+                reverse('journal_app:article_detail', args=[
                     review.article.department.slug,
-                    review.id
+                    review.article.id
                 ])
             )
         }
         
         editors = review.article.department.get_editors()
-        success = True
-        
-        for editor in editors:
-            success &= self._send_email(
-                editor.email,
-                f'Review Completed: {review.article.title}',
-                'review_completed_editor',
-                context,
-                review.article.department
-            )
-            
-        return success
+        self.send_batch(
+            {editor.email: {'recipient_name': editor.get_full_name()} for editor in editors},
+            f'Review Completed: {review.article.title}',
+            'review_completed_editor',
+            context,
+            review.article.department
+        )
+        return True
 
     def notify_author_decision(self, article, decision, feedback):
         """Notify author about editorial decision"""
@@ -173,7 +158,7 @@ class NotificationManager:
             'department': article.department,
             'decision': decision,
             'feedback': feedback,
-            'article_url': self.request.build_absolute_uri(
+            'article_url': self._absolute_url(
                 reverse('journal_app:article_detail', args=[
                     article.department.slug,
                     article.id
@@ -189,15 +174,18 @@ class NotificationManager:
             article.department
         )
 
-    def send_revision_reminder(self, review):
+    def send_revision_reminder(self, review, now=None):
         """Send reminder to reviewer about upcoming deadline"""
+        days_remaining = (review.due_date - (now or timezone.now())).days
         context = {
             'review': review,
             'article': review.article,
             'reviewer': review.reviewer,
             'department': review.article.department,
             'due_date': review.due_date,
-            'review_url': self.request.build_absolute_uri(
+            'days_remaining': days_remaining,
+            'days_overdue': -days_remaining,
+            'review_url': self._absolute_url(
                 reverse('journal_app:review_submit', args=[
                     review.article.department.slug,
                     review.id
@@ -207,7 +195,7 @@ class NotificationManager:
         
         return self._send_email(
             review.reviewer.email,
-            f'Review Reminder: {review.article.title}',
+            f'Review {"Overdue" if days_remaining < 0 else "Reminder"}: {review.article.title}',
             'review_reminder',
             context,
             review.article.department
@@ -219,7 +207,7 @@ class NotificationManager:
             'article': article,
             'author': article.author,
             'department': article.department,
-            'article_url': self.request.build_absolute_uri(
+            'article_url': self._absolute_url(
                 reverse('journal_app:article_detail', args=[
                     article.department.slug,
                     article.id
@@ -236,20 +224,29 @@ class NotificationManager:
         )
 
     def send_batch_notification(self, recipients, subject, message, department):
-        """Send batch notifications to multiple recipients"""
-        success = True
-        context = {
-            'message': message,
-            'department': department
-        }
-        
-        for recipient in recipients:
-            success &= self._send_email(
-                recipient.email,
-                subject,
-                'batch_notification',
-                context,
-                department
-            )
-            
-        return success
\ No newline at end of file
+        """Send the same notification to many users; rendered once, queued in bulk"""
+        self.send_batch(
+            [recipient.email for recipient in recipients],
+            subject,
+            'batch_notification',
+            {'message': message, 'department': department},
+            department
+        )
+        return True
+
+    def send_batch(self, recipients, subject, template_name, context, department):
+        """Render an email once for a shared context and queue a copy per address; returns how many
+
+        `recipients` is a list of addresses, or a dict of address -> fields
+        that differ per recipient (see emails.render_batch).
+        """
+        if not isinstance(recipients, dict):
+            recipients = dict.fromkeys(recipients, {})
+        return enqueue_batch(
+            department,
+            subject,
+            list(render_batch(template_name, context, recipients)),
+            from_email=self.from_email,
+            article=context.get('article'),
+            review=context.get('review')
+        )
@@ -0,0 +1,215 @@
+# outbox.py
+
+import logging
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import EmailLog, OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+# A message claimed longer ago than this belonged to a worker that died
+CLAIM_TIMEOUT = timedelta(minutes=10)
+MAX_RETRY_DELAY = timedelta(days=1)
+
+# Counts and total render/SMTP seconds of one drain()
+DrainResult = namedtuple('DrainResult', ['sent', 'failed', 'render_time', 'send_time'])
+
+
+def enqueue_email(department, recipient, subject, text_content, html_content='', from_email=None,
+                  article=None, review=None, render_time=0):
+    """Queue a rendered email once the current transaction commits (immediately outside one)
+
+    A rolled-back request never sends its notifications, and the request
+    itself only writes two rows.
+    """
+    def create():
+        log = EmailLog.objects.create(
+            department=department,
+            subject=subject,
+            recipient=recipient,
+            content=text_content,
+            status='QUEUED',
+            related_article=article,
+            related_review=review
+        )
+        OutgoingEmail.objects.create(
+            log=log,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            recipient=recipient,
+            subject=subject,
+            text_content=text_content,
+            html_content=html_content,
+            render_time=render_time
+        )
+
+    transaction.on_commit(create)
+
+
+def enqueue_batch(department, subject, messages, from_email=None, article=None, review=None):
+    """Queue rendered emails, a list of (recipient, RenderedEmail), with a bulk INSERT per table after commit
+
+    A recipient listed twice gets only the last of its messages; returns how many are queued.
+    """
+    messages = list(dict(messages).items())
+    from_email = from_email or settings.DEFAULT_FROM_EMAIL
+
+    def create():
+        for start in range(0, len(messages), settings.EMAIL_BATCH_SIZE):
+            chunk = messages[start:start + settings.EMAIL_BATCH_SIZE]
+            logs = EmailLog.objects.bulk_create([
+                EmailLog(department=department, subject=subject, recipient=recipient, content=rendered.text,
+                         status='QUEUED', related_article=article, related_review=review)
+                for recipient, rendered in chunk
+            ])
+            OutgoingEmail.objects.bulk_create([
+                OutgoingEmail(log=log, from_email=from_email, recipient=recipient, subject=subject,
+                              text_content=rendered.text, html_content=rendered.html,
+                              render_time=rendered.seconds)
+                for log, (recipient, rendered) in zip(logs, chunk)
+            ])
+
+    transaction.on_commit(create)
+    return len(messages)
+
+
+def retry_delay(attempts):
+    """Exponential backoff: EMAIL_OUTBOX_RETRY_DELAY, doubled per failed attempt, at most a day"""
+    base = timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_DELAY)
+    return min(base * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def claim_batch(limit):
+    """Mark up to `limit` due messages SENDING for this worker and return them"""
+    now = timezone.now()
+    due = (Q(status=OutgoingEmail.PENDING, next_attempt_at__lte=now) |
+           Q(status=OutgoingEmail.SENDING, claimed_at__lt=now - CLAIM_TIMEOUT))
+    with transaction.atomic():
+        candidates = OutgoingEmail.objects.filter(due).order_by('next_attempt_at')
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        ids = list(candidates.values_list('pk', flat=True)[:limit])
+        # Conditional, so two workers cannot both claim a message even without SKIP LOCKED
+        OutgoingEmail.objects.filter(due, pk__in=ids).update(status=OutgoingEmail.SENDING, claimed_at=now)
+    return list(OutgoingEmail.objects.filter(pk__in=ids, status=OutgoingEmail.SENDING, claimed_at=now))
+
+
+def build_email(message):
+    email = EmailMultiAlternatives(
+        message.subject,
+        message.text_content,
+        message.from_email,
+        [message.recipient]
+    )
+    if message.html_content:
+        email.attach_alternative(message.html_content, 'text/html')
+    return email
+
+
+def deliver(messages):
+    """Send messages over one reused connection; returns the error, or None, for each, and the seconds taken
+
+    Runs in a worker thread and does not touch the database. Each message
+    is its own send_messages() call so failures are attributed to the
+    right message; the connection is only reopened after one.
+    """
+    start = time.perf_counter()
+    connection = get_connection()
+    errors = []
+    try:
+        for message in messages:
+            try:
+                connection.open()
+                connection.send_messages([build_email(message)])
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+                close_quietly(connection)
+    finally:
+        close_quietly(connection)
+    return errors, time.perf_counter() - start
+
+
+def close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+def record_results(results):
+    """Mark delivered messages SENT in bulk; schedule retries for, or give up on, the rest"""
+    now = timezone.now()
+    sent = [message for message, error in results if error is None]
+    with transaction.atomic():
+        if sent:
+            OutgoingEmail.objects.filter(pk__in=[message.pk for message in sent]).update(
+                status=OutgoingEmail.SENT, sent_at=now, claimed_at=None, attempts=F('attempts') + 1
+            )
+            EmailLog.objects.filter(pk__in=[message.log_id for message in sent]).update(
+                status='SENT', sent_at=now, error_message=''
+            )
+        for message, error in results:
+            if error is not None:
+                record_failure(message, error, now)
+
+
+def record_failure(message, error, now):
+    message.attempts += 1
+    message.claimed_at = None
+    if message.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        message.status = OutgoingEmail.FAILED
+        log_status = 'FAILED'
+    else:
+        message.status = OutgoingEmail.PENDING
+        message.next_attempt_at = now + retry_delay(message.attempts)
+        log_status = 'QUEUED'
+    message.save(update_fields=['status', 'attempts', 'claimed_at', 'next_attempt_at'])
+    EmailLog.objects.filter(pk=message.log_id).update(status=log_status, error_message=str(error))
+
+
+def drain(workers=None, batch_size=None):
+    """Deliver every due message with a pool of sender threads; returns a DrainResult
+
+    Each claimed batch is split into one chunk per thread, and each chunk
+    goes over a single SMTP connection. Claiming and recording results
+    happen on this thread, so only the SMTP conversations run concurrently.
+    The time the messages took to render when queued is summed alongside
+    the sending time, to show where the cost of an email goes.
+    """
+    workers = workers or settings.EMAIL_OUTBOX_WORKERS
+    batch_size = batch_size or settings.EMAIL_BATCH_SIZE * workers
+    sent = failed = 0
+    render_time = send_time = 0.0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            messages = claim_batch(batch_size)
+            if not messages:
+                return DrainResult(sent, failed, render_time, send_time)
+            size = -(-len(messages) // workers)
+            chunks = [messages[start:start + size] for start in range(0, len(messages), size)]
+            results = []
+            batch_render = sum(message.render_time for message in messages)
+            batch_send = 0.0
+            for chunk, (errors, seconds) in zip(chunks, pool.map(deliver, chunks)):
+                results.extend(zip(chunk, errors))
+                batch_send += seconds
+            for message, error in results:
+                if error is not None:
+                    logger.warning("Could not send email %s to %s: %s", message.pk, message.recipient, error)
+                    failed += 1
+                else:
+                    sent += 1
+            record_results(results)
+            logger.info("Delivered %d emails: %.1f ms rendering, %.1f ms sending",
+                        len(messages), batch_render * 1000, batch_send * 1000)
+            render_time += batch_render
+            send_time += batch_send
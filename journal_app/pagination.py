@@ -0,0 +1,115 @@
+# pagination.py
+
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+
+
+class CursorPage:
+    """One page of a keyset paginated queryset"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    """Paginate by seeking past the last row seen instead of using OFFSET
+
+    The ordering must end in a unique field and its fields must not be
+    NULL. Cursors are opaque tokens naming the row a page starts after
+    (or, going back, before), so no page needs a COUNT(*) and deep pages
+    cost the same as the first one when an index matches the ordering.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-publication_date', '-id')):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.keys = [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+
+    def encode_cursor(self, obj, backwards=False):
+        fields = self.queryset.model._meta
+        values = [fields.get_field(name).value_to_string(obj) for name, _ in self.keys]
+        token = json.dumps({'b': backwards, 'k': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(token.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Return (backwards, key values), raising ValueError for a malformed cursor"""
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            backwards, values = bool(data['b']), data['k']
+        except (binascii.Error, UnicodeDecodeError, TypeError, KeyError, ValueError) as e:
+            raise ValueError(f"Invalid cursor: {e}")
+        if not isinstance(values, list) or len(values) != len(self.keys):
+            raise ValueError("Invalid cursor")
+        fields = self.queryset.model._meta
+        try:
+            return backwards, [
+                fields.get_field(name).to_python(value) for (name, _), value in zip(self.keys, values)
+            ]
+        except Exception as e:
+            raise ValueError(f"Invalid cursor: {e}")
+
+    def seek(self, values, backwards):
+        """Rows after the given key values in the ordering, or before them going backwards"""
+        condition = Q()
+        for i, (name, descending) in enumerate(self.keys):
+            lookup = 'gt' if descending == backwards else 'lt'
+            step = Q(**{f'{name}__{lookup}': values[i]})
+            for (previous, _), value in zip(self.keys[:i], values):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
+
+    def page(self, cursor=None):
+        backwards, values = self.decode_cursor(cursor) if cursor else (False, None)
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self.seek(values, backwards))
+        # Going backwards, read the rows before the cursor in reverse and flip them afterwards
+        queryset = queryset.order_by(*[
+            name if descending == backwards else f'-{name}' for name, descending in self.keys
+        ])
+
+        rows = list(queryset[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        if not rows:
+            return CursorPage(rows)
+        has_next = more if not backwards else True
+        has_previous = more if backwards else values is not None
+        return CursorPage(
+            rows,
+            next_cursor=self.encode_cursor(rows[-1]) if has_next else None,
+            previous_cursor=self.encode_cursor(rows[0], backwards=True) if has_previous else None,
+        )
+
+    def get_page(self, cursor=None):
+        """Like page(), but a malformed cursor gives the first page"""
+        try:
+            return self.page(cursor)
+        except ValueError:
+            return self.page()
@@ -0,0 +1,91 @@
+# permissions.py
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.utils.functional import SimpleLazyObject, cached_property
+
+from .models import Profile
+
+EDITOR_ROLES = ('EDITOR', 'DEPT_ADMIN', 'ADMIN')
+ADMIN_ROLES = ('DEPT_ADMIN', 'ADMIN')
+
+
+class Permissions:
+    """What the user of one request may do, resolved once from their Profile
+
+    Editors and department admins act only in the departments they are
+    members of; admins act in every department. Memberships come from the
+    user as ProfileBackend loads it, with the profile's departments
+    prefetched, so checks cost no queries.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.role = None
+        if user.is_authenticated:
+            try:
+                self.role = user.profile.role
+            except Profile.DoesNotExist:
+                # e.g. accounts made with createsuperuser
+                pass
+
+    @cached_property
+    def department_ids(self):
+        if self.role is None:
+            return frozenset()
+        # all() rather than values_list() so the prefetched memberships are used
+        return frozenset(department.pk for department in self.user.profile.departments.all())
+
+    def is_member(self, department):
+        return department.pk in self.department_ids
+
+    def has_role(self, roles, department_id=None):
+        """Whether the user has one of `roles`; given a department id, admins or that department's members only"""
+        if self.role not in roles:
+            return False
+        return department_id is None or self.role == 'ADMIN' or department_id in self.department_ids
+
+    def is_editor(self, department=None):
+        """Editors, department admins and admins; given a department, admins or its members only"""
+        return self.has_role(EDITOR_ROLES, department and department.pk)
+
+    def is_admin(self, department=None):
+        """Department admins and admins; given a department, admins or its members only"""
+        return self.has_role(ADMIN_ROLES, department and department.pk)
+
+    def is_reviewer(self):
+        return self.role == 'REVIEWER'
+
+    def can_edit(self, article):
+        """The article's author and the editors of its department"""
+        return self.user.is_authenticated and (
+            self.user.pk == article.author_id or self.has_role(EDITOR_ROLES, article.department_id)
+        )
+
+    def can_view(self, article):
+        """Published articles are public; unpublished ones only to those who can edit them"""
+        return article.status == 'PUBLISHED' or self.can_edit(article)
+
+
+class PermissionsMiddleware:
+    """Set request.permissions, built on first use; must follow AuthenticationMiddleware"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.permissions = SimpleLazyObject(lambda: Permissions(request.user))
+        return self.get_response(request)
+
+
+class ProfileBackend(ModelBackend):
+    """ModelBackend that loads the user's Profile with the user, and its department memberships"""
+
+    def get_user(self, user_id):
+        try:
+            user = get_user_model()._default_manager.select_related('profile').prefetch_related(
+                'profile__departments'
+            ).get(pk=user_id)
+        except get_user_model().DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,200 @@
+# recommendations.py
+
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .models import Article, CustomUser, Profile, Review
+
+TOKEN_RE = re.compile(r'[^\W\d_]{3,}')
+STOP_WORDS = frozenset('''
+    about above after again against all also among and any are because been before being between both but
+    can could did does doing down during each few for from further had has have having her here hers him
+    his how into its itself more most not now off once only other our ours out over own same she should
+    some such than that the their theirs them then there these they this those through too under until
+    upon very was were what when where which while who whom why will with would you your yours study
+    studies paper article research using based within
+'''.split())
+# Profile.expertise is a short list of declared fields; it counts this many times over the bio
+EXPERTISE_WEIGHT = 3
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or '').lower()) if token not in STOP_WORDS]
+
+
+@dataclass
+class Recommendation:
+    reviewer: CustomUser
+    score: float
+    similarity: float
+    open_reviews: int
+
+
+class ReviewerIndex:
+    """TF-IDF vectors of one department's reviewers, as a sparse matrix in NumPy arrays
+
+    Each reviewer is a document: their expertise, bio and the articles of
+    the reviews they completed. The matrix is kept in coordinate form
+    (rows, cols, weights), so a score is one gather, multiply and
+    bincount. refresh() re-reads only reviewers whose profile or completed
+    review count changed since the last call, and rebuilds the arrays from
+    the cached term counts of everyone else.
+    """
+
+    def __init__(self, department_id):
+        self.department_id = department_id
+        self.lock = threading.Lock()
+        self.vocabulary = {}
+        self.document_frequency = np.zeros(0, dtype=np.int64)
+        # reviewer id -> (profile updated_at, completed reviews), to spot changes
+        self.fingerprints = {}
+        # reviewer id -> (term ids, counts)
+        self.terms = {}
+        self.open_reviews = {}
+        self.reviewer_ids = np.zeros(0, dtype=np.int64)
+        self.rows = self.cols = np.zeros(0, dtype=np.int64)
+        self.weights = np.zeros(0)
+        self.idf = np.zeros(0)
+
+    def refresh(self):
+        """Bring the matrix up to date with one query, plus two more when reviewers changed"""
+        reviews = 'user__reviewer_reviews'
+        current, open_reviews = {}, {}
+        for user_id, updated_at, completed, pending in Profile.objects.filter(
+            role='REVIEWER', departments=self.department_id
+        ).annotate(
+            completed=Count(reviews, filter=Q(**{f'{reviews}__is_complete': True})),
+            pending=Count(reviews, filter=Q(**{f'{reviews}__is_complete': False})),
+        ).values_list('user_id', 'updated_at', 'completed', 'pending'):
+            current[user_id] = (updated_at, completed)
+            open_reviews[user_id] = pending
+        self.open_reviews = open_reviews
+
+        stale = [user_id for user_id, fingerprint in current.items() if self.fingerprints.get(user_id) != fingerprint]
+        removed = self.fingerprints.keys() - current.keys()
+        if not stale and not removed:
+            return
+        for user_id in [*removed, *stale]:
+            if user_id in self.terms:
+                self.document_frequency[self.terms.pop(user_id)[0]] -= 1
+        for user_id, tokens in self.load_documents(stale).items():
+            self.terms[user_id] = self.count_terms(tokens)
+        self.fingerprints = current
+        self.build()
+
+    def load_documents(self, user_ids):
+        """Tokens of each reviewer's expertise, bio and reviewed articles"""
+        documents = {user_id: [] for user_id in user_ids}
+        for user_id, expertise, bio in Profile.objects.filter(user_id__in=user_ids).values_list(
+            'user_id', 'expertise', 'bio'
+        ):
+            documents[user_id] += tokenize(expertise) * EXPERTISE_WEIGHT + tokenize(bio)
+        for user_id, title, abstract, keywords in Review.objects.filter(
+            reviewer_id__in=user_ids, is_complete=True
+        ).values_list('reviewer_id', 'article__title', 'article__abstract', 'article__keywords'):
+            documents[user_id] += tokenize(title) + tokenize(abstract) + tokenize(keywords)
+        return documents
+
+    def count_terms(self, tokens):
+        """(term ids, counts) of a reviewer's tokens, adding new terms to the vocabulary"""
+        counts = Counter(self.vocabulary.setdefault(token, len(self.vocabulary)) for token in tokens)
+        if len(self.vocabulary) > len(self.document_frequency):
+            self.document_frequency = np.concatenate([
+                self.document_frequency,
+                np.zeros(len(self.vocabulary) - len(self.document_frequency), dtype=np.int64)
+            ])
+        cols = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        self.document_frequency[cols] += 1
+        return cols, np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+
+    def build(self):
+        """Reassemble the weighted, row-normalised matrix from the cached term counts"""
+        user_ids = list(self.terms)
+        self.reviewer_ids = np.array(user_ids, dtype=np.int64)
+        lengths = [len(self.terms[user_id][0]) for user_id in user_ids]
+        self.rows = np.repeat(np.arange(len(user_ids)), lengths)
+        self.cols = np.concatenate([self.terms[user_id][0] for user_id in user_ids] or [np.zeros(0, dtype=np.int64)])
+        counts = np.concatenate([self.terms[user_id][1] for user_id in user_ids] or [np.zeros(0)])
+
+        # Smoothed idf and sublinear tf, as is usual for short documents
+        self.idf = np.log((1 + len(user_ids)) / (1 + self.document_frequency)) + 1
+        weights = (1 + np.log(counts)) * self.idf[self.cols]
+        norms = np.sqrt(np.bincount(self.rows, weights=weights ** 2, minlength=len(user_ids)))
+        self.weights = weights / norms[self.rows] if len(weights) else weights
+
+    def similarities(self, text):
+        """Cosine similarity of `text` to every reviewer, in reviewer_ids order"""
+        counts = Counter(self.vocabulary[token] for token in tokenize(text) if token in self.vocabulary)
+        query = np.zeros(len(self.vocabulary))
+        for col, count in counts.items():
+            query[col] = (1 + math.log(count)) * self.idf[col]
+        norm = np.linalg.norm(query)
+        if not norm:
+            return np.zeros(len(self.reviewer_ids))
+        return np.bincount(self.rows, weights=self.weights * query[self.cols] / norm,
+                           minlength=len(self.reviewer_ids))
+
+
+# department id -> ReviewerIndex, for this process
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def reviewer_index(department_id):
+    with _indexes_lock:
+        if department_id not in _indexes:
+            _indexes[department_id] = ReviewerIndex(department_id)
+        return _indexes[department_id]
+
+
+def conflicted_reviewers(article):
+    """The article's authors and anyone who has co-written an article with one of them"""
+    authors = {article.author_id, *article.co_authors.values_list('pk', flat=True)}
+    conflicted = set(authors)
+    for author_id, co_author_id in Article.co_authors.through.objects.filter(
+        Q(article__author_id__in=authors) | Q(customuser_id__in=authors)
+    ).values_list('article__author_id', 'customuser_id'):
+        conflicted.update((author_id, co_author_id))
+    return conflicted
+
+
+def recommend_reviewers(article, limit=None):
+    """The department reviewers best matched to an article's title, abstract and keywords, best first
+
+    Similarity is divided by 1 + REVIEWER_WORKLOAD_PENALTY per open review,
+    so a slightly weaker match with no reviews in hand can rank higher.
+    Conflicted reviewers, those already assigned and those with no
+    overlap at all are left out.
+    """
+    limit = limit or settings.REVIEWER_RECOMMENDATIONS
+    index = reviewer_index(article.department_id)
+    with index.lock:
+        index.refresh()
+        similarity = index.similarities(' '.join([article.title, article.abstract, article.keywords]))
+        reviewer_ids = index.reviewer_ids
+        open_reviews = np.array([index.open_reviews.get(user_id, 0) for user_id in reviewer_ids.tolist()])
+
+    excluded = conflicted_reviewers(article) | set(article.article_reviews.values_list('reviewer_id', flat=True))
+    score = similarity / (1 + settings.REVIEWER_WORKLOAD_PENALTY * open_reviews)
+    score[(similarity <= 0) | np.isin(reviewer_ids, list(excluded))] = -np.inf
+    if len(score) > limit:
+        top = np.argpartition(-score, limit - 1)[:limit]
+    else:
+        top = np.arange(len(score))
+    top = [i for i in top[np.argsort(-score[top], kind='stable')].tolist() if np.isfinite(score[i])]
+    if not top:
+        return []
+
+    users = CustomUser.objects.in_bulk([int(reviewer_ids[i]) for i in top])
+    return [
+        Recommendation(users[user_id], float(score[i]), float(similarity[i]), int(open_reviews[i]))
+        for i in top
+        if (user_id := int(reviewer_ids[i])) in users
+    ]
@@ -0,0 +1,61 @@
+# reminders.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Review
+from .notifications import NotificationManager
+
+
+def reminder_tier(due_date, now):
+    """How many of the REVIEW_REMINDER_DAYS tiers a deadline has reached"""
+    return sum(due_date <= now + timedelta(days=days) for days in settings.REVIEW_REMINDER_DAYS)
+
+
+def pending_reviews(now):
+    """Open reviews due within the earliest reminder tier that still have a tier to go"""
+    tiers = settings.REVIEW_REMINDER_DAYS
+    return Review.objects.filter(
+        is_complete=False,
+        due_date__lte=now + timedelta(days=max(tiers)),
+        reminder_tier__lt=len(tiers)
+    ).select_related('article__department', 'reviewer').order_by('due_date', 'pk')
+
+
+def send_review_reminders(now=None, batch_size=None):
+    """Remind reviewers of open reviews that reached a new tier; returns how many were queued
+
+    Only the highest tier reached is sent, so a review assigned a day
+    before its deadline gets one reminder, not three. Reviews are read in
+    (due_date, pk) order, batch_size at a time, from the partial index of
+    open reviews by due_date.
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or settings.REVIEW_REMINDER_BATCH_SIZE
+    pending = pending_reviews(now)
+    manager = NotificationManager()
+    sent = 0
+    batch = list(pending[:batch_size])
+    while batch:
+        last = batch[-1]
+
+        due = {}
+        for review in batch:
+            tier = reminder_tier(review.due_date, now)
+            if tier > review.reminder_tier:
+                due.setdefault(tier, []).append(review)
+        # The emails are queued when the tiers are recorded, so a rerun never repeats a tier
+        with transaction.atomic():
+            for tier, reviews in due.items():
+                Review.objects.filter(pk__in=[review.pk for review in reviews]).update(reminder_tier=tier)
+                for review in reviews:
+                    manager.send_revision_reminder(review, now)
+                sent += len(reviews)
+        batch = list(pending.filter(
+            Q(due_date__gt=last.due_date) | Q(due_date=last.due_date, pk__gt=last.pk)
+        )[:batch_size])
+    return sent
@@ -0,0 +1,145 @@
+# reports.py
+
+import csv
+from datetime import date
+
+from django.db.models import CharField, Sum
+from django.db.models.functions import Cast, Substr
+
+from .models import Article, ArticleDailyUsage, Journal
+
+# COUNTER metric types and the rollup columns that add up to each
+METRICS = [
+    ('Total_Item_Investigations', ('views', 'downloads')),
+    ('Unique_Item_Investigations', ('unique_investigations',)),
+    ('Total_Item_Requests', ('downloads',)),
+    ('Unique_Item_Requests', ('unique_requests',)),
+]
+FORMATS = {
+    'csv': (',', 'text/csv'),
+    'tsv': ('\t', 'text/tab-separated-values'),
+}
+
+
+def parse_month(value):
+    """date of the first day of a 'YYYY-MM' month"""
+    year, month = value.split('-')
+    return date(int(year), int(month), 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class UsageReport:
+    """Monthly COUNTER-style usage per journal (level 'journal') or per article (level 'item')
+
+    The counts come from one query over ArticleDailyUsage, summed per
+    journal (and article) and month and ordered so each journal's rows
+    are contiguous; the report is assembled while walking that result
+    once, with titles looked up in a single query per level.
+    """
+    LEVELS = ('journal', 'item')
+
+    def __init__(self, start, end, level='journal', journals=None):
+        if level not in self.LEVELS:
+            raise ValueError(f"Unknown report level {level!r}")
+        if end < start:
+            raise ValueError("The report ends before it starts")
+        self.level = level
+        self.journals = journals
+        self.months = []
+        month = start
+        while month <= end:
+            self.months.append(month)
+            month = add_months(month, 1)
+
+    def header(self):
+        columns = ['Journal', 'Journal_ID']
+        if self.level == 'item':
+            columns += ['Item', 'Item_ID', 'DOI']
+        return columns + ['Metric_Type', 'Reporting_Period_Total'] + [
+            month.strftime('%b-%Y') for month in self.months
+        ]
+
+    def queryset(self):
+        usage = ArticleDailyUsage.objects.filter(
+            date__gte=self.months[0],
+            date__lt=add_months(self.months[-1], 1)
+        )
+        if self.journals is not None:
+            usage = usage.filter(article__journal__in=self.journals)
+        group = ['article__journal_id', 'article_id'] if self.level == 'item' else ['article__journal_id']
+        # 'YYYY-MM' with plain SQL; TruncMonth is a Python function call per row on SQLite
+        return usage.annotate(month=Substr(Cast('date', CharField()), 1, 7)).values(
+            *group, 'month'
+        ).annotate(
+            **{column: Sum(column) for column in ArticleDailyUsage.COUNTER_COLUMNS}
+        ).order_by(*group, 'month')
+
+    def rows(self):
+        """Yield (journal_id, row) pairs, grouped by journal"""
+        month_index = {month.strftime('%Y-%m'): i for i, month in enumerate(self.months)}
+        group_key = 'article_id' if self.level == 'item' else 'article__journal_id'
+        labels = None
+        current, totals = None, None
+
+        for usage in self.queryset().iterator():
+            if labels is None:
+                labels = self.labels()
+            if usage[group_key] != current:
+                if current is not None:
+                    yield from self.metric_rows(labels[current], totals)
+                current = usage[group_key]
+                totals = {column: [0] * len(self.months) for column in ArticleDailyUsage.COUNTER_COLUMNS}
+            i = month_index[usage['month']]
+            for column in ArticleDailyUsage.COUNTER_COLUMNS:
+                totals[column][i] += usage[column]
+
+        if current is not None:
+            yield from self.metric_rows(labels[current], totals)
+
+    def labels(self):
+        """Leading columns of the rows for each journal, or each article at item level"""
+        journals = Journal.objects.all() if self.journals is None else Journal.objects.filter(pk__in=self.journals)
+        titles = dict(journals.values_list('pk', 'title'))
+        if self.level == 'journal':
+            return {pk: [title, pk] for pk, title in titles.items()}
+        return {
+            pk: [titles[journal_id], journal_id, title, pk, doi or '']
+            for pk, journal_id, title, doi in Article.objects.filter(
+                journal_id__in=titles
+            ).values_list('pk', 'journal_id', 'title', 'doi').iterator()
+        }
+
+    def metric_rows(self, labels, totals):
+        for metric, columns in METRICS:
+            counts = [sum(values) for values in zip(*(totals[column] for column in columns))]
+            if any(counts):
+                yield labels[1], labels + [metric, sum(counts)] + counts
+
+
+class Echo:
+    """File-like object whose write() returns the line, for streaming csv.writer output"""
+
+    def write(self, value):
+        return value
+
+
+def header_line(report, delimiter=','):
+    return csv.writer(Echo(), delimiter=delimiter).writerow(report.header())
+
+
+def report_lines(report, delimiter=','):
+    """Yield (journal_id, line) for every row of the report"""
+    writer = csv.writer(Echo(), delimiter=delimiter)
+    for journal_id, row in report.rows():
+        yield journal_id, writer.writerow(row)
+
+
+def stream_report(report, delimiter=','):
+    """Yield the report as delimited text lines, header first"""
+    yield header_line(report, delimiter)
+    for _, line in report_lines(report, delimiter):
+        yield line
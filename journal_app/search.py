@@ -0,0 +1,288 @@
+# search.py
+
+import re
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Article
+
+# Markers placed around matches by the database, swapped for <mark> after escaping
+MATCH_START, MATCH_END = '\x02', '\x03'
+INDEXED_FIELDS = ('title', 'abstract', 'keywords', 'content')
+
+
+def highlight(text):
+    """HTML-escape a highlighted fragment and turn the match markers into <mark> tags"""
+    return mark_safe(escape(text or '').replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>'))
+
+
+def year_range(year):
+    tz = timezone.get_current_timezone()
+    return (datetime(year, 1, 1, tzinfo=tz), datetime(year + 1, 1, 1, tzinfo=tz))
+
+
+@dataclass
+class SearchResult:
+    article: Article
+    rank: float
+    title: str
+    snippet: str
+
+
+@dataclass
+class SearchPage:
+    results: list
+    number: int
+    per_page: int
+    has_next: bool
+
+    @property
+    def has_previous(self):
+        return self.number > 1
+
+    @property
+    def next_page_number(self):
+        return self.number + 1
+
+    @property
+    def previous_page_number(self):
+        return self.number - 1
+
+
+class BaseSearchBackend:
+    """Article full-text index; subclasses implement it for one database engine"""
+
+    def index(self, article):
+        raise NotImplementedError
+
+    def remove(self, article_id):
+        raise NotImplementedError
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def matches(self, query, filters, limit, offset):
+        """Return (article_id, rank, title, snippet) rows, best first"""
+        raise NotImplementedError
+
+    def filter_sql(self, filters):
+        """WHERE clauses on the article table (aliased `a`) for the supported filters"""
+        clauses, params = [], []
+        for field in ('department_id', 'journal_id', 'status'):
+            if filters.get(field):
+                clauses.append(f'a.{field} = %s')
+                params.append(filters[field])
+        if filters.get('year'):
+            clauses.append('a.publication_date >= %s AND a.publication_date < %s')
+            params.extend(year_range(int(filters['year'])))
+        if filters.get('keyword'):
+            clauses.append(
+                'a.id IN (SELECT ak.article_id FROM journal_app_articlekeyword ak '
+                'JOIN journal_app_keyword k ON k.id = ak.keyword_id WHERE k.name = %s)'
+            )
+            params.append(filters['keyword'])
+        return ''.join(f' AND {clause}' for clause in clauses), params
+
+    def search(self, query, filters=None, page=1, per_page=20):
+        """Ranked, highlighted results for one page, without counting every match
+
+        A query without any terms lists the filtered articles, newest first.
+        """
+        page = max(int(page), 1)
+        backend = self if re.search(r'\w', query) else FallbackSearchBackend()
+        rows = backend.matches(query, filters or {}, per_page + 1, (page - 1) * per_page)
+        articles = Article.objects.select_related('journal', 'department', 'author').in_bulk(
+            [row[0] for row in rows[:per_page]]
+        )
+        results = [
+            SearchResult(articles[article_id], rank, highlight(title), highlight(snippet))
+            for article_id, rank, title, snippet in rows[:per_page]
+            if article_id in articles
+        ]
+        return SearchPage(results, page, per_page, has_next=len(rows) > per_page)
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """FTS5 table holding a copy of the indexed fields, rowid = article id"""
+
+    table = 'journal_app_article_fts'
+    # bm25 column weights, in INDEXED_FIELDS order
+    weights = (10.0, 5.0, 3.0, 1.0)
+
+    @classmethod
+    def create_sql(cls):
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {cls.table} USING fts5("
+            f"{', '.join(INDEXED_FIELDS)}, tokenize='porter unicode61 remove_diacritics 2')"
+        ]
+
+    @classmethod
+    def drop_sql(cls):
+        return [f'DROP TABLE IF EXISTS {cls.table}']
+
+    def index(self, article):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [article.pk])
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, {', '.join(INDEXED_FIELDS)}) VALUES (%s, %s, %s, %s, %s)",
+                [article.pk] + [getattr(article, field) for field in INDEXED_FIELDS]
+            )
+
+    def remove(self, article_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [article_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, {', '.join(INDEXED_FIELDS)}) "
+                f"SELECT id, {', '.join(INDEXED_FIELDS)} FROM journal_app_article"
+            )
+
+    @staticmethod
+    def match_expression(query):
+        """Quote each term so user input cannot use FTS5 query syntax; the last term is a prefix"""
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return None
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    def matches(self, query, filters, limit, offset):
+        expression = self.match_expression(query)
+        if expression is None:
+            return []
+        where, params = self.filter_sql(filters)
+        weights = ', '.join(str(w) for w in self.weights)
+        # Rank first using the built-in rank column, then build highlights for the page only:
+        # in a single query SQLite would compute a snippet for every match before sorting
+        ranked = (
+            f"SELECT a.id, {self.table}.rank "
+            f"FROM {self.table} JOIN journal_app_article a ON a.id = {self.table}.rowid "
+            f"WHERE {self.table} MATCH %s AND {self.table}.rank MATCH 'bm25({weights})'{where} "
+            f"ORDER BY {self.table}.rank LIMIT %s OFFSET %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(ranked, [expression] + params + [limit, offset])
+            ranks = dict(cursor.fetchall())
+            if not ranks:
+                return []
+            cursor.execute(
+                f"SELECT rowid, highlight({self.table}, 0, %s, %s), "
+                f"snippet({self.table}, -1, %s, %s, '…', 32) FROM {self.table} "
+                f"WHERE {self.table} MATCH %s AND rowid IN ({', '.join(['%s'] * len(ranks))})",
+                [MATCH_START, MATCH_END, MATCH_START, MATCH_END, expression] + list(ranks)
+            )
+            fragments = {row[0]: row[1:] for row in cursor.fetchall()}
+        return [(article_id, rank) + fragments[article_id] for article_id, rank in ranks.items()]
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Weighted tsvector per article in a side table with a GIN index"""
+
+    table = 'journal_app_article_search'
+    config = 'english'
+    document_sql = (
+        "setweight(to_tsvector('{config}', coalesce(a.title, '')), 'A') || "
+        "setweight(to_tsvector('{config}', coalesce(a.keywords, '')), 'A') || "
+        "setweight(to_tsvector('{config}', coalesce(a.abstract, '')), 'B') || "
+        "setweight(to_tsvector('{config}', coalesce(a.content, '')), 'D')"
+    )
+
+    @classmethod
+    def create_sql(cls):
+        return [
+            f"CREATE TABLE IF NOT EXISTS {cls.table} ("
+            f"article_id bigint PRIMARY KEY REFERENCES journal_app_article (id) ON DELETE CASCADE "
+            f"DEFERRABLE INITIALLY DEFERRED, document tsvector NOT NULL)",
+            f"CREATE INDEX IF NOT EXISTS {cls.table}_document_idx ON {cls.table} USING gin (document)",
+        ]
+
+    @classmethod
+    def drop_sql(cls):
+        return [f'DROP TABLE IF EXISTS {cls.table}']
+
+    def upsert_sql(self, where):
+        return (
+            f"INSERT INTO {self.table} (article_id, document) "
+            f"SELECT a.id, {self.document_sql.format(config=self.config)} "
+            f"FROM journal_app_article a {where} "
+            f"ON CONFLICT (article_id) DO UPDATE SET document = EXCLUDED.document"
+        )
+
+    def index(self, article):
+        with connection.cursor() as cursor:
+            cursor.execute(self.upsert_sql('WHERE a.id = %s'), [article.pk])
+
+    def remove(self, article_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE article_id = %s', [article_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {self.table}')
+            cursor.execute(self.upsert_sql(''))
+
+    def matches(self, query, filters, limit, offset):
+        if not re.search(r'\w', query):
+            return []
+        where, params = self.filter_sql(filters)
+        markers = f'StartSel={MATCH_START}, StopSel={MATCH_END}'
+        sql = (
+            f"SELECT a.id, ts_rank_cd(s.document, q) AS rank, "
+            f"ts_headline('{self.config}', a.title, q, %s), "
+            f"ts_headline('{self.config}', a.abstract, q, %s) "
+            f"FROM {self.table} s JOIN journal_app_article a ON a.id = s.article_id, "
+            f"websearch_to_tsquery('{self.config}', %s) q "
+            f"WHERE s.document @@ q{where} ORDER BY rank DESC LIMIT %s OFFSET %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [f'HighlightAll=true, {markers}', f'MaxFragments=2, MaxWords=32, {markers}',
+                                 query] + params + [limit, offset])
+            return cursor.fetchall()
+
+
+class FallbackSearchBackend(BaseSearchBackend):
+    """Unranked substring search for engines without a full-text backend"""
+
+    def index(self, article):
+        pass
+
+    def remove(self, article_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def matches(self, query, filters, limit, offset):
+        articles = Article.objects.all()
+        for term in re.findall(r'\w+', query):
+            articles = articles.filter(Q(title__icontains=term) | Q(abstract__icontains=term))
+        lookups = {field: filters[field] for field in ('department_id', 'journal_id', 'status') if filters.get(field)}
+        if filters.get('year'):
+            start, end = year_range(int(filters['year']))
+            lookups.update(publication_date__gte=start, publication_date__lt=end)
+        if filters.get('keyword'):
+            lookups['tags__name'] = filters['keyword']
+        rows = articles.filter(**lookups).order_by('-publication_date').values_list(
+            'id', 'title', 'abstract'
+        )[offset:offset + limit]
+        return [(pk, 0.0, title, abstract[:300]) for pk, title, abstract in rows]
+
+
+SEARCH_BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend():
+    return SEARCH_BACKENDS.get(connection.vendor, FallbackSearchBackend)()
@@ -0,0 +1,223 @@
+# signals.py
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from .departments import invalidate_departments
+from .images import delete_derivatives, get_derivatives
+from .models import (Article, ArticleFile, ArticleKeyword, Department, DepartmentSettings, Journal, Profile,
+                     Review, ReviewAttachment, SiteStatistics, DepartmentStatistics, DepartmentFacet)
+from .search import INDEXED_FIELDS, get_search_backend
+
+
+# Each tracked model maps to the fields it reads and a function returning
+# how much a single row contributes to each counter, keyed by scope: SITE for
+# SiteStatistics, or a department id for that department's DepartmentStatistics.
+SITE = None
+
+def _journal_counters(journal):
+    return {
+        SITE: {'journals_count': int(journal.is_active)},
+        journal.department_id: {'journals_count': 1},
+    }
+
+def _article_counters(article):
+    return {
+        SITE: {
+            'articles_count': 1,
+            'published_articles_count': int(article.status == 'PUBLISHED'),
+            'total_citations': article.citation_count,
+            'total_downloads': article.download_count,
+        },
+        article.department_id: {
+            'articles_count': 1,
+            'total_citations': article.citation_count,
+        },
+    }
+
+def _profile_counters(profile):
+    return {SITE: {'authors_count': int(profile.role == 'AUTHOR')}}
+
+def _review_counters(review):
+    return {SITE: {'reviews_count': int(review.is_complete)}}
+
+STATISTICS_TRACKERS = {
+    Journal: (['department', 'is_active'], _journal_counters),
+    Article: (['department', 'author', 'status', 'citation_count', 'download_count',
+               'journal', 'keywords', 'publication_date'], _article_counters),
+    Profile: (['role'], _profile_counters),
+    Review: (['is_complete'], _review_counters),
+}
+
+
+def _apply(deltas):
+    for scope, counters in deltas.items():
+        if scope is SITE:
+            SiteStatistics.apply_deltas(counters)
+        else:
+            DepartmentStatistics.apply_deltas(scope, counters)
+
+def _update_department_authors(previous, article):
+    """Keep the per-department distinct author counts in step with an article"""
+    before = (previous.department_id, previous.author_id) if previous else None
+    after = (article.department_id, article.author_id) if article else None
+    if before == after:
+        return
+    if before:
+        DepartmentStatistics.remove_author_article(*before)
+    if after:
+        DepartmentStatistics.add_author_article(*after)
+
+def _update_facets(previous, article):
+    """Move an article's contribution between facet values, per department"""
+    deltas = defaultdict(lambda: defaultdict(int))
+    if previous:
+        for key in DepartmentFacet.for_article(previous):
+            deltas[previous.department_id][key] -= 1
+    if article:
+        for key in DepartmentFacet.for_article(article):
+            deltas[article.department_id][key] += 1
+    for department_id, changes in deltas.items():
+        DepartmentFacet.apply_deltas(department_id, changes)
+
+
+def remember_previous_state(sender, instance, raw=False, **kwargs):
+    """Load the stored values of the tracked fields before they are overwritten"""
+    instance._statistics_previous = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    fields, _ = STATISTICS_TRACKERS[sender]
+    instance._statistics_previous = sender._base_manager.filter(
+        pk=instance.pk
+    ).only(*fields).first()
+
+def update_statistics_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _, counters = STATISTICS_TRACKERS[sender]
+    deltas = defaultdict(lambda: defaultdict(int))
+    for scope, values in counters(instance).items():
+        for field, value in values.items():
+            deltas[scope][field] += value
+
+    previous = getattr(instance, '_statistics_previous', None)
+    if previous is not None:
+        for scope, values in counters(previous).items():
+            for field, value in values.items():
+                deltas[scope][field] -= value
+    _apply(deltas)
+
+    if sender is Article:
+        _update_department_authors(previous, instance)
+        _update_facets(previous, instance)
+        if previous is None or previous.keywords != instance.keywords:
+            ArticleKeyword.sync(instance)
+
+def update_statistics_on_delete(sender, instance, **kwargs):
+    _, counters = STATISTICS_TRACKERS[sender]
+    _apply({
+        scope: {field: -value for field, value in values.items()}
+        for scope, values in counters(instance).items()
+    })
+
+    if sender is Article:
+        _update_department_authors(instance, None)
+        _update_facets(instance, None)
+
+
+for model in STATISTICS_TRACKERS:
+    pre_save.connect(remember_previous_state, sender=model,
+                     dispatch_uid=f'statistics_pre_save_{model.__name__}')
+    post_save.connect(update_statistics_on_save, sender=model,
+                      dispatch_uid=f'statistics_post_save_{model.__name__}')
+    post_delete.connect(update_statistics_on_delete, sender=model,
+                        dispatch_uid=f'statistics_post_delete_{model.__name__}')
+
+
+def update_search_index_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and not set(update_fields) & set(INDEXED_FIELDS)):
+        return
+    get_search_backend().index(instance)
+
+def update_search_index_on_delete(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+post_save.connect(update_search_index_on_save, sender=Article, dispatch_uid='search_post_save_Article')
+post_delete.connect(update_search_index_on_delete, sender=Article, dispatch_uid='search_post_delete_Article')
+
+
+# Stored files shared through the content-addressed storage are released with
+# the row referencing them, once the deletion is committed
+STORED_FILE_FIELDS = {
+    Article: 'manuscript_file',
+    ArticleFile: 'file',
+    ReviewAttachment: 'file',
+}
+
+def release_stored_file(sender, instance, **kwargs):
+    field_file = getattr(instance, STORED_FILE_FIELDS[sender])
+    if field_file:
+        storage, name = field_file.storage, field_file.name
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+for model in STORED_FILE_FIELDS:
+    post_delete.connect(release_stored_file, sender=model, dispatch_uid=f'storage_post_delete_{model.__name__}')
+
+
+# Images shown in listings get their resized variants once the upload is committed,
+# rather than on the first page view; the variants of a replaced or deleted image
+# are removed then too
+IMAGE_FIELDS = {
+    Journal: 'cover_image',
+    Department: 'logo',
+    Profile: 'profile_picture',
+}
+
+def remember_previous_image(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Load the stored image name before a new one is saved over it"""
+    field = IMAGE_FIELDS[sender]
+    instance._previous_image = None
+    if raw or instance._state.adding or instance.pk is None or (update_fields and field not in update_fields):
+        return
+    instance._previous_image = sender._base_manager.filter(pk=instance.pk).values_list(field, flat=True).first()
+
+def update_image_derivatives(sender, instance, raw=False, update_fields=None, **kwargs):
+    field = IMAGE_FIELDS[sender]
+    if raw or (update_fields and field not in update_fields):
+        return
+    field_file = getattr(instance, field)
+    previous = getattr(instance, '_previous_image', None)
+    if previous and previous != field_file.name:
+        storage = field_file.storage
+        transaction.on_commit(lambda: delete_derivatives(storage, previous))
+    if field_file:
+        transaction.on_commit(lambda: get_derivatives(field_file))
+
+def release_image_derivatives(sender, instance, **kwargs):
+    field_file = getattr(instance, IMAGE_FIELDS[sender])
+    if field_file:
+        storage, name = field_file.storage, field_file.name
+        transaction.on_commit(lambda: delete_derivatives(storage, name))
+
+
+for model in IMAGE_FIELDS:
+    pre_save.connect(remember_previous_image, sender=model, dispatch_uid=f'images_pre_save_{model.__name__}')
+    post_save.connect(update_image_derivatives, sender=model, dispatch_uid=f'images_post_save_{model.__name__}')
+    post_delete.connect(release_image_derivatives, sender=model, dispatch_uid=f'images_post_delete_{model.__name__}')
+
+
+# Departments and their settings are cached per process and in Django's cache
+# (departments.py); a change moves the shared generation on right away, and
+# again on commit so that nothing another process read mid-transaction survives
+def invalidate_department_cache(sender, **kwargs):
+    invalidate_departments()
+    transaction.on_commit(invalidate_departments)
+
+
+for model in (Department, DepartmentSettings):
+    post_save.connect(invalidate_department_cache, sender=model, dispatch_uid=f'departments_post_save_{model.__name__}')
+    post_delete.connect(invalidate_department_cache, sender=model, dispatch_uid=f'departments_post_delete_{model.__name__}')
@@ -0,0 +1,156 @@
+# storage.py
+
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.files.storage import FileSystemStorage, storages
+
+CHUNK_SIZE = 64 * 1024
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for data in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage that keeps one copy of each distinct file content
+
+    Bytes are stored once, as a blob named after their SHA-256 in a
+    sharded tree (blobs/ab/cd/abcd...). Every saved name is a hard link to
+    its blob, so open(), path(), size(), url() and the rest of the
+    FileSystemStorage API work on names as before. The link count is the
+    reference count: deleting a name removes only the name, and
+    collect_garbage() later removes blobs no name links to any more.
+    """
+
+    def __init__(self, blob_dir='blobs', **kwargs):
+        super().__init__(**kwargs)
+        self.blob_dir = blob_dir
+
+    def blob_path(self, digest):
+        return self.path(os.path.join(self.blob_dir, digest[:2], digest[2:4], digest))
+
+    def references(self, name):
+        """How many names share the blob of `name`"""
+        return os.stat(self.path(name)).st_nlink - 1
+
+    def _save(self, name, content):
+        blob_root = self.path(self.blob_dir)
+        os.makedirs(blob_root, exist_ok=True)
+
+        if hasattr(content, 'temporary_file_path'):
+            # Already on disk: hash it, then move it into the blob tree
+            source = content.temporary_file_path()
+            digest = file_digest(source)
+        else:
+            # Hash while writing, so the content is read only once
+            fd, source = tempfile.mkstemp(dir=blob_root, prefix='.incoming-')
+            hasher = hashlib.sha256()
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    for data in content.chunks():
+                        hasher.update(data)
+                        f.write(data)
+            except BaseException:
+                os.remove(source)
+                raise
+            digest = hasher.hexdigest()
+
+        try:
+            while True:
+                blob = self.add_blob(source, digest)
+                try:
+                    return self.link(blob, name)
+                except FileNotFoundError:
+                    # collect_garbage() removed the blob between the two steps; add it again
+                    continue
+        finally:
+            # Kept until the name is linked, so the bytes are never lost in between
+            if os.path.exists(source):
+                os.remove(source)
+
+    def add_blob(self, source, digest):
+        """Make the file at `source` the blob for `digest` unless it exists already; `source` is left in place"""
+        blob = self.blob_path(digest)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        try:
+            # Linking fails instead of overwriting when another save added the blob first
+            os.link(source, blob)
+        except FileExistsError:
+            return blob
+        except OSError:
+            # e.g. an upload temporary file on another file system: copy it next to the blob
+            fd, copy = tempfile.mkstemp(dir=self.path(self.blob_dir), prefix='.incoming-')
+            os.close(fd)
+            try:
+                shutil.copyfile(source, copy)
+                os.link(copy, blob)
+            except FileExistsError:
+                return blob
+            finally:
+                os.remove(copy)
+        if self.file_permissions_mode is not None:
+            os.chmod(blob, self.file_permissions_mode)
+        return blob
+
+    def link(self, blob, name):
+        """Give a blob another name, as FileSystemStorage would have saved it"""
+        full_path = self.path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        while True:
+            try:
+                os.link(blob, full_path)
+                break
+            except FileExistsError:
+                name = self.get_available_name(name)
+                full_path = self.path(name)
+        return str(name).replace('\\', '/')
+
+    def deduplicate(self, name):
+        """Turn a file saved without this storage into a link to its blob; returns the bytes freed"""
+        path = self.path(name)
+        blob = self.blob_path(file_digest(path))
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.link(path, blob)
+            return 0
+        if os.path.samefile(blob, path):
+            return 0
+        stat = os.stat(path)
+        # Swap the name over atomically so readers never see it missing
+        temp = f'{path}.dedupe'
+        os.link(blob, temp)
+        os.replace(temp, path)
+        return stat.st_size if stat.st_nlink == 1 else 0
+
+    def collect_garbage(self):
+        """Remove blobs no name links to any more; returns how many
+
+        A save that finds a blob gone before linking its name adds it again.
+        """
+        count = 0
+        for directory, _, filenames in os.walk(self.path(self.blob_dir)):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                stat = os.stat(path)
+                if filename.startswith('.incoming-'):
+                    # Left behind by a save that died; newer ones may still be written
+                    unused = time.time() - stat.st_mtime > 24 * 60 * 60
+                else:
+                    unused = stat.st_nlink == 1
+                if unused:
+                    os.remove(path)
+                    count += 1
+        return count
+
+
+def document_storage():
+    """Storage for manuscripts, article files and review attachments (STORAGES['documents'])"""
+    return storages['documents']
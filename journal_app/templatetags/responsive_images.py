@@ -0,0 +1,35 @@
+# responsive_images.py
+
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from journal_app.images import get_derivatives, srcset
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(field_file, alt='', sizes='100vw', **attrs):
+    """<picture> with WebP and JPEG srcsets of an uploaded image, so browsers fetch the smallest that fits
+
+    Usage: {% responsive_image journal.cover_image alt=journal.title sizes="(min-width: 992px) 33vw, 100vw" class="card-img-top" %}
+    Falls back to a plain <img> of the original until its variants exist;
+    they are made on upload, never while a page renders.
+    """
+    if not field_file:
+        return ''
+    attrs = {key.replace('_', '-'): value for key, value in attrs.items()}
+    manifest = get_derivatives(field_file, generate=False)
+    if manifest is None:
+        return format_html('<img src="{}" alt="{}"{}>', field_file.url, alt, flatatt(attrs))
+
+    storage, variants = field_file.storage, manifest['variants']
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" loading="lazy" decoding="async"{}>'
+        '</picture>',
+        srcset(storage, variants['webp']), sizes,
+        storage.url(variants['jpeg'][0][1]), srcset(storage, variants['jpeg']), sizes,
+        manifest['width'], manifest['height'], alt, flatatt(attrs)
+    )
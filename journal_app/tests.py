@@ -1,11 +1,71 @@
 # tests.py
-from django.test import TestCase, Client
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.http import Http404
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
-from django.contrib.auth.models import User
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.mail.backends.base import BaseEmailBackend
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+from django.template import Context, Template
 from django.utils import timezone
-from .models import Department, Article, Review, Profile
+from PIL import Image
+from .models import (Department, Article, Review, Profile, Journal,
+                     SiteStatistics, DepartmentStatistics, DepartmentAuthor, Keyword, ArticleKeyword,
+                     DepartmentFacet, ArticleDailyUsage, UsageEvent, Upload, ArticleFile,
+                     EmailLog, OutgoingEmail, DepartmentSettings, DigestEvent)
+from .benchmarks import ViewBenchmark
+from .dashboard import DepartmentDashboard
+from .instrumentation import QueryRecorder, query_budget
+from .pagination import KeysetPaginator
+from .uploads import UploadError, start_upload, write_chunk
+from .views import published_journal_articles
+from .search import get_search_backend
+from .usage import aggregate_usage, record_usage, usage_buffer
+from .reports import UsageReport, parse_month
+from .notifications import NotificationManager
+from .emails import MARKER_START, email_templates, render_email, render_timings
+from .outbox import drain
+from .digests import build_digests, send_digests
+from .reminders import pending_reviews, send_review_reminders
+from . import recommendations
+from .recommendations import recommend_reviewers
+from . import assignments
+from .assignments import assign_reviewers, send_review_invitations
+from .departments import DepartmentCache, get_department, get_department_or_404, get_department_settings
+from .permissions import Permissions, ProfileBackend
+from . import images
+from .urls import urlpatterns
+import hashlib
+import io
 import json
+import os
+import re
+import shutil
+import smtplib
+import tempfile
+from django.utils.text import slugify
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from unittest import mock
+import logging
+import time
+import unittest
+
+
+def setUpModule():
+    # One INFO line per request is noise in test output; budget warnings still show
+    queries_logger = logging.getLogger('journal_app.queries')
+    unittest.addModuleCleanup(queries_logger.setLevel, queries_logger.level)
+    queries_logger.setLevel(logging.WARNING)
 
 class JournalSystemTest(TestCase):
     def setUp(self):
@@ -243,4 +303,2118 @@ class JournalSystemTest(TestCase):
         """Clean up test data"""
         import os
         if os.path.exists('test_file.pdf'):
-            os.remove('test_file.pdf')
\ No newline at end of file
+            os.remove('test_file.pdf')
+
+class StatisticsTest(TestCase):
+    def setUp(self):
+        """Set up a department with one journal"""
+        self.author = get_user_model().objects.create_user(
+            email='author@unijos.edu.ng',
+            password='authorpass123'
+        )
+        self.department = Department.objects.create(
+            name='ENGLISH',
+            slug='english',
+            description='Department of English',
+            established_date=timezone.now().date(),
+            email='english@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of English'
+        )
+        self.journal = Journal.objects.create(
+            department=self.department,
+            title='Journal of English Studies',
+            slug='jes',
+            description='Test journal'
+        )
+        SiteStatistics.get_current()
+
+    def create_article(self, slug, **kwargs):
+        return Article.objects.create(
+            department=self.department,
+            journal=self.journal,
+            title=f'Article {slug}',
+            slug=slug,
+            abstract='Test Abstract',
+            keywords='test',
+            author=self.author,
+            content='Test content',
+            manuscript_file='manuscripts/test.pdf',
+            **kwargs
+        )
+
+    def assertMatchesRecount(self):
+        stats = SiteStatistics.objects.get(pk=SiteStatistics.SINGLETON_ID)
+        for field, value in SiteStatistics.compute().items():
+            self.assertEqual(getattr(stats, field), value, field)
+
+    def test_counters_follow_article_changes(self):
+        """Counters track creation, status changes and deletion"""
+        article = self.create_article('one', status='SUBMITTED', citation_count=3)
+        self.create_article('two', status='PUBLISHED', download_count=5)
+        self.assertMatchesRecount()
+
+        article.status = 'PUBLISHED'
+        article.citation_count = 7
+        article.save()
+        stats = SiteStatistics.get_current()
+        self.assertEqual(stats.published_articles_count, 2)
+        self.assertEqual(stats.total_citations, 7)
+
+        article.delete()
+        self.assertMatchesRecount()
+
+        self.journal.is_active = False
+        self.journal.save()
+        self.assertMatchesRecount()
+
+    def test_reconcile_command_repairs_drift(self):
+        """The reconcile command rewrites a drifted snapshot"""
+        self.create_article('one', status='PUBLISHED')
+        SiteStatistics.objects.update(published_articles_count=42)
+        call_command('reconcile_statistics', stdout=open(os.devnull, 'w'))
+        self.assertMatchesRecount()
+
+    def test_home_reads_snapshot(self):
+        """The landing page reads a single statistics row"""
+        self.create_article('one', status='PUBLISHED')
+        SiteStatistics.get_current()
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('journal_app:department_home'))
+        self.assertEqual(response.context['total_articles'], 1)
+
+    def test_department_counters_track_distinct_authors(self):
+        """Department snapshot counts each author once"""
+        stats = DepartmentStatistics.get_for_department(self.department)
+        other_author = get_user_model().objects.create_user(
+            email='other@unijos.edu.ng',
+            password='otherpass123'
+        )
+        first = self.create_article('one', citation_count=2)
+        self.create_article('two', citation_count=3)
+        stats.refresh_from_db()
+        self.assertEqual(stats.articles_count, 2)
+        self.assertEqual(stats.authors_count, 1)
+        self.assertEqual(stats.total_citations, 5)
+        self.assertEqual(stats.journals_count, 1)
+
+        first.author = other_author
+        first.save()
+        stats.refresh_from_db()
+        self.assertEqual(stats.authors_count, 2)
+
+        first.delete()
+        stats.refresh_from_db()
+        self.assertEqual(stats.authors_count, 1)
+        self.assertEqual(stats.total_citations, 3)
+        self.assertEqual(
+            stats.authors_count,
+            DepartmentStatistics.reconcile(self.department.pk).authors_count
+        )
+
+    def test_new_author_counted_concurrently(self):
+        """An author whose row another save added first is counted once, without an error"""
+        stats = DepartmentStatistics.get_for_department(self.department)
+        self.create_article('one')
+        real_update = QuerySet.update
+        missed = []
+
+        def added_meanwhile(queryset, **kwargs):
+            # The row was not there yet when this save looked for it
+            if queryset.model is DepartmentAuthor and not missed:
+                missed.append(queryset)
+                return 0
+            return real_update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', autospec=True, side_effect=added_meanwhile):
+            self.create_article('two')
+        self.assertTrue(missed)
+        self.assertEqual(DepartmentAuthor.objects.get(department=self.department).articles_count, 2)
+        stats.refresh_from_db()
+        self.assertEqual(stats.authors_count, 1)
+
+    def test_department_detail_query_count_is_fixed(self):
+        """department_detail does not issue queries per article"""
+        for i in range(6):
+            self.create_article(f'article-{i}', status='PUBLISHED').co_authors.add(self.author)
+        self.department.faculty_members.add(self.author)
+        url = reverse('journal_app:department_detail', args=[self.department.slug])
+        self.client.get(url)
+        with self.assertNumQueries(8):
+            response = self.client.get(url)
+        self.assertEqual(response.context['total_articles'], 6)
+
+    def test_journal_list_query_count_is_fixed(self):
+        """Journal listings annotate counts instead of querying per journal"""
+        self.create_article('one', status='PUBLISHED')
+        self.create_article('two', status='SUBMITTED')
+        for i in range(5):
+            Journal.objects.create(
+                department=self.department,
+                title=f'Journal {i}',
+                slug=f'journal-{i}',
+                description='Test journal'
+            )
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('journal_app:journal_list'))
+        journal = next(j for j in response.context['journals'] if j.pk == self.journal.pk)
+        self.assertEqual(journal.articles_count, 2)
+        self.assertEqual(journal.published_articles_count, 1)
+
+    def test_editor_dashboard_counters(self):
+        """The editor dashboard uses precomputed counters and review annotations"""
+        editor = get_user_model().objects.create_user(
+            email='editor@unijos.edu.ng',
+            password='editorpass123'
+        )
+        Profile.objects.create(user=editor, role='EDITOR', institution='University of Jos').departments.add(self.department)
+        reviewer = get_user_model().objects.create_user(
+            email='reviewer@unijos.edu.ng',
+            password='reviewerpass123'
+        )
+        url = reverse('journal_app:department_dashboard', args=[self.department.slug])
+        self.client.login(email='editor@unijos.edu.ng', password='editorpass123')
+
+        def add_articles(prefix):
+            self.create_article(f'{prefix}-new', status='SUBMITTED')
+            article = self.create_article(f'{prefix}-review', status='UNDER_REVIEW')
+            for user, complete in ((reviewer, True), (editor, False)):
+                Review.objects.create(
+                    article=article,
+                    reviewer=user,
+                    due_date=timezone.now() + timezone.timedelta(days=3),
+                    is_complete=complete
+                )
+
+        add_articles('a')
+        # Departments come from the cache once read; memberships come with the user
+        self.client.get(url)
+        with self.assertNumQueries(8) as small:
+            self.client.get(url)
+        add_articles('b')
+        add_articles('c')
+        with self.assertNumQueries(len(small.captured_queries)):
+            response = self.client.get(url)
+
+        self.assertEqual(response.context['stats']['new_submissions'], 3)
+        self.assertEqual(response.context['stats']['under_review'], 3)
+        self.assertEqual(response.context['stats']['reviews_due'], 3)
+        article = response.context['pending_reviews'][0]
+        self.assertEqual((article.reviews_complete, article.reviews_pending), (1, 1))
+
+
+# Maximum queries per request for every route in journal_app/urls.py,
+# measured as a department administrator with a small department.
+ROUTE_QUERY_BUDGETS = {
+    'login': 3,
+    'logout': 3,
+    'password_change': 3,
+    'password_change_done': 3,
+    'password_reset': 3,
+    'password_reset_done': 3,
+    'password_reset_confirm': 4,
+    'password_reset_complete': 3,
+    'register': 4,
+    'journal_list': 4,
+    'journal_detail': 5,
+    'api_journal_articles': 2,
+    'article_search': 6,
+    'department_list': 3,
+    'department_detail': 11,
+    'department_manage': 4,
+    'department_dashboard': 9,
+    'api_department_statistics': 5,
+    'api_department_facets': 5,
+    'usage_report': 4,
+    'department_analytics': 10,
+    'article_submit': 6,
+    'article_detail': 6,
+    'article_edit': 8,
+    'article_download': 4,
+    'article_file_download': 4,
+    'bulk_article_management': 4,
+    'department_home': 6,
+    'home': 6,
+    'review_assign': 10,
+    'api_review_assign': 3,
+    'review_submit': 6,
+    'review_statistics': 8,
+    'profile_edit': 3,
+    'upload_create': 4,
+    'upload_detail': 4,
+}
+
+
+class RouteQueryBudgetTest(TestCase):
+    def setUp(self):
+        """Set up everything the routes look up, and log in as a department administrator"""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root, UPLOAD_TEMP_DIR=os.path.join(media_root, 'uploads'))
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.editor = get_user_model().objects.create_user(
+            email='editor@unijos.edu.ng',
+            password='editorpass123'
+        )
+        profile = Profile.objects.create(user=self.editor, role='DEPT_ADMIN', institution='University of Jos')
+        self.department = Department.objects.create(
+            name='ENGLISH',
+            slug='english',
+            description='Department of English',
+            established_date=timezone.now().date(),
+            email='english@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of English'
+        )
+        DepartmentSettings.objects.create(
+            department=self.department,
+            submission_guidelines='-',
+            review_guidelines='-',
+            publication_frequency='Quarterly',
+            peer_review_type='DOUBLE_BLIND',
+            contact_email='english@unijos.edu.ng'
+        )
+        profile.departments.add(self.department)
+        self.journal = Journal.objects.create(
+            department=self.department,
+            title='Journal of English Studies',
+            slug='jes',
+            description='Test journal'
+        )
+        self.article = Article.objects.create(
+            department=self.department,
+            journal=self.journal,
+            title='Test Article',
+            slug='test-article',
+            abstract='Test Abstract',
+            keywords='test',
+            author=self.editor,
+            content='Test content',
+            manuscript_file=SimpleUploadedFile('test.pdf', b'%PDF-1.4 test'),
+            status='UNDER_REVIEW'
+        )
+        self.article_file = ArticleFile.objects.create(
+            article=self.article,
+            file=SimpleUploadedFile('data.csv', b'a,b\n1,2\n'),
+            file_type='SUPPLEMENT',
+            uploaded_by=self.editor
+        )
+        self.review = Review.objects.create(
+            article=self.article,
+            reviewer=self.editor,
+            due_date=timezone.now() + timezone.timedelta(days=30)
+        )
+        self.upload = start_upload(self.editor, 'paper.pdf', 100)
+        SiteStatistics.reconcile()
+        DepartmentStatistics.reconcile(self.department.pk)
+        usage_buffer.take()
+        self.client.login(email='editor@unijos.edu.ng', password='editorpass123')
+
+    def route_kwargs(self, pattern):
+        values = {
+            'dept_slug': self.department.slug,
+            'slug': self.journal.slug,
+            'article_id': self.article.id,
+            'review_id': self.review.id,
+            'file_id': self.article_file.id,
+            'uidb64': 'MQ',
+            'token': 'set-password',
+            'upload_id': self.upload.token,
+        }
+        return {name: values[name] for name in pattern.pattern.converters}
+
+    def request(self, name, url):
+        """The request a client would usually make; POST-only routes get a valid POST"""
+        if name == 'upload_create':
+            return self.client.post(url, {'filename': 'paper.pdf', 'size': 100})
+        if name == 'api_review_assign':
+            return self.client.post(url, {'assignments': {}}, content_type='application/json')
+        return self.client.get(url)
+
+    def test_every_route_has_a_budget(self):
+        names = {pattern.name for pattern in urlpatterns if pattern.name}
+        self.assertEqual(names, set(ROUTE_QUERY_BUDGETS))
+
+    def test_routes_stay_within_query_budget(self):
+        for pattern in urlpatterns:
+            if not pattern.name:
+                continue
+            url = reverse(f'journal_app:{pattern.name}', kwargs=self.route_kwargs(pattern))
+            with self.subTest(route=pattern.name):
+                with query_budget(ROUTE_QUERY_BUDGETS[pattern.name], label=pattern.name):
+                    response = self.request(pattern.name, url)
+                self.assertLess(response.status_code, 400)
+
+    def test_debug_headers_report_queries(self):
+        with self.settings(DEBUG=True):
+            response = self.client.get(reverse('journal_app:journal_list'))
+        self.assertEqual(response['X-Query-View'], 'journal_app:journal_list')
+        self.assertGreater(int(response['X-Query-Count']), 0)
+        self.assertIn('X-Query-Time-Ms', response)
+
+    def test_streamed_queries_are_logged_when_the_stream_ends(self):
+        url = reverse('journal_app:usage_report', args=[self.department.slug])
+        with self.assertLogs('journal_app.queries', 'INFO') as logs:
+            response = self.client.get(url)
+            self.assertEqual(logs.records, [])
+            with CaptureQueriesContext(connection) as streamed:
+                b''.join(response.streaming_content)
+        self.assertGreater(len(streamed), 0)
+        summary = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(summary['view'], 'journal_app:usage_report')
+        self.assertGreater(summary['queries'], len(streamed))
+
+    def test_duplicate_queries_are_fingerprinted(self):
+        with QueryRecorder() as recorder:
+            for pk in (1, 2, 3):
+                list(Article.objects.filter(pk=pk))
+            list(Article.objects.filter(pk__in=[1, 2]))
+            list(Article.objects.filter(pk__in=[1, 2, 3]))
+        self.assertEqual(list(recorder.duplicates().values()), [3, 2])
+
+
+class BenchmarkTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root, UPLOAD_TEMP_DIR=os.path.join(media_root, 'uploads'))
+        media.enable()
+        self.addCleanup(media.disable)
+        # Benchmarked article views record usage events
+        self.addCleanup(usage_buffer.take)
+
+    def test_seed_and_benchmark(self):
+        """The seeded dataset is deterministic and every route can be benchmarked"""
+        options = dict(departments=2, journals=2, volumes=1, issues=2, users=40, articles=60,
+                       email_logs=10, audit_logs=10, batch_size=25, stdout=open(os.devnull, 'w'))
+        call_command('seed_benchmark_data', seed=7, **options)
+        titles = list(Article.objects.order_by('slug').values_list('title', flat=True))
+        call_command('seed_benchmark_data', seed=7, clear=True, **options)
+        self.assertEqual(list(Article.objects.order_by('slug').values_list('title', flat=True)), titles)
+        self.assertEqual(SiteStatistics.get_current().articles_count, 60)
+
+        report = ViewBenchmark(iterations=2, warmup=0).run(only=['journal_list', 'department_detail'])
+        self.assertEqual(set(report['routes']), {'journal_list', 'department_detail'})
+        self.assertEqual(report['routes']['department_detail']['status'], 200)
+
+        report = ViewBenchmark(iterations=1, warmup=0).run()
+        self.assertEqual(set(report['routes']), {pattern.name for pattern in urlpatterns if pattern.name})
+        for name, result in report['routes'].items():
+            self.assertLess(result['status'], 400, name)
+        # The uploads started by measuring upload_create are discarded
+        self.assertEqual(Upload.objects.count(), 2)
+
+    def test_failing_routes_are_not_benchmarked(self):
+        call_command('seed_benchmark_data', departments=1, journals=1, volumes=1, issues=1, users=10,
+                     articles=10, email_logs=0, audit_logs=0, stdout=open(os.devnull, 'w'))
+        manuscript = Article.objects.filter(status='PUBLISHED').first().manuscript_file
+        manuscript.storage.delete(manuscript.name)
+        with self.assertRaisesMessage(ValueError, "article_download"):
+            ViewBenchmark(iterations=1, warmup=0).run(only=['journal_list', 'article_download'])
+
+    def test_seed_with_few_users(self):
+        """Departments without authors still get articles; departments without users are refused"""
+        options = dict(departments=2, journals=1, volumes=1, issues=1, articles=10, email_logs=0,
+                       audit_logs=0, stdout=open(os.devnull, 'w'))
+        call_command('seed_benchmark_data', users=2, **options)
+        self.assertEqual(Article.objects.filter(author=None).count(), 0)
+        self.assertEqual(Article.objects.count(), 10)
+        with self.assertRaises(CommandError):
+            call_command('seed_benchmark_data', users=1, clear=True, **options)
+
+
+class ArticleSearchTest(TestCase):
+    def setUp(self):
+        self.author = get_user_model().objects.create_user(
+            email='author@unijos.edu.ng',
+            password='authorpass123'
+        )
+        self.department = Department.objects.create(
+            name='ENGLISH',
+            slug='english',
+            description='Department of English',
+            established_date=timezone.now().date(),
+            email='english@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of English'
+        )
+        self.journal = Journal.objects.create(
+            department=self.department,
+            title='Journal of English Studies',
+            slug='jes',
+            description='Test journal'
+        )
+
+    def create_article(self, slug, title, abstract, status='PUBLISHED', **kwargs):
+        return Article.objects.create(
+            department=self.department,
+            journal=self.journal,
+            title=title,
+            slug=slug,
+            abstract=abstract,
+            keywords='literature',
+            author=self.author,
+            content='Body text',
+            manuscript_file='manuscripts/test.pdf',
+            status=status,
+            publication_date=timezone.now(),
+            **kwargs
+        )
+
+    def test_ranked_highlighted_results(self):
+        """Title matches rank first and matches are highlighted and escaped"""
+        self.create_article('a', 'Notes on grammar', 'Oral <b>poetry</b> appears briefly here')
+        self.create_article('b', 'Oral poetry in Jos', 'A study of oral poetry')
+        self.create_article('c', 'Unrelated', 'Nothing to see')
+
+        page = get_search_backend().search('oral poetry')
+        self.assertEqual([r.article.slug for r in page.results], ['b', 'a'])
+        self.assertIn('<mark>Oral</mark>', page.results[0].title)
+        self.assertIn('&lt;b&gt;<mark>poetry</mark>&lt;/b&gt;', page.results[1].snippet)
+        self.assertFalse(page.has_next)
+
+    def test_filters_and_index_sync(self):
+        """Filters apply and edits and deletions reach the index"""
+        draft = self.create_article('a', 'Drama and ritual', 'Masks', status='SUBMITTED')
+        self.create_article('b', 'Drama in translation', 'Drama')
+        backend = get_search_backend()
+
+        self.assertEqual(len(backend.search('drama', {'status': 'PUBLISHED'}).results), 1)
+        self.assertEqual(len(backend.search('drama', {'year': timezone.now().year - 1}).results), 0)
+
+        draft.title = 'Ritual performance'
+        draft.save()
+        self.assertEqual(len(backend.search('drama ritual').results), 0)
+        draft.delete()
+        self.assertEqual(len(backend.search('ritual').results), 0)
+
+    def test_search_view_hides_unpublished_work(self):
+        self.create_article('a', 'Drama and ritual', 'Drama', status='SUBMITTED')
+        self.create_article('b', 'Drama in translation', 'Drama')
+        response = self.client.get(reverse('journal_app:article_search'), {'q': 'drama', 'page': 1})
+        self.assertEqual([r.article.slug for r in response.context['results'].results], ['b'])
+
+
+class KeywordFacetTest(TestCase):
+    def setUp(self):
+        self.author = get_user_model().objects.create_user(
+            email='author@unijos.edu.ng',
+            password='authorpass123'
+        )
+        self.department = Department.objects.create(
+            name='ENGLISH',
+            slug='english',
+            description='Department of English',
+            established_date=timezone.now().date(),
+            email='english@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of English'
+        )
+        self.journal = Journal.objects.create(
+            department=self.department,
+            title='Journal of English Studies',
+            slug='jes',
+            description='Test journal'
+        )
+
+    def create_article(self, slug, keywords, status='PUBLISHED'):
+        return Article.objects.create(
+            department=self.department,
+            journal=self.journal,
+            title=f'Article {slug}',
+            slug=slug,
+            abstract='Test Abstract',
+            keywords=keywords,
+            author=self.author,
+            content='Test content',
+            manuscript_file='manuscripts/test.pdf',
+            status=status,
+            publication_date=timezone.now() if status == 'PUBLISHED' else None
+        )
+
+    def facet_counts(self):
+        return set(DepartmentFacet.objects.filter(
+            department=self.department, count__gt=0
+        ).values_list('facet', 'value', 'count'))
+
+    def test_keywords_are_normalized_and_synced(self):
+        article = self.create_article('a', 'Oral  Tradition, oral tradition; Poetics')
+        self.create_article('b', 'ORAL TRADITION')
+        self.assertEqual(list(Keyword.objects.values_list('name', flat=True)), ['oral tradition', 'poetics'])
+        self.assertEqual(Article.objects.filter(tags__name='oral tradition').count(), 2)
+
+        article.keywords = 'Drama'
+        article.save()
+        self.assertEqual(list(article.tags.values_list('name', flat=True)), ['drama'])
+
+    def test_facets_are_maintained_incrementally(self):
+        """After creates, edits and deletes the facets equal a full recount"""
+        first = self.create_article('a', 'poetics, drama')
+        second = self.create_article('b', 'poetics', status='SUBMITTED')
+        self.create_article('c', 'drama')
+        second.status = 'PUBLISHED'
+        second.publication_date = timezone.now()
+        second.save()
+        first.keywords = 'Fiction'
+        first.save()
+        Article.objects.get(slug='c').delete()
+
+        incremental = self.facet_counts()
+        self.assertIn((DepartmentFacet.KEYWORD, 'poetics', 1), incremental)
+        self.assertIn((DepartmentFacet.STATUS, 'PUBLISHED', 2), incremental)
+        DepartmentFacet.reconcile(self.department.pk)
+        self.assertEqual(self.facet_counts(), incremental)
+
+    def test_facet_value_added_concurrently(self):
+        self.create_article('a', 'poetics')
+        real_update = QuerySet.update
+        missed = []
+
+        def added_meanwhile(queryset, **kwargs):
+            # The keyword's row was not there yet when this save looked for it
+            if queryset.model is DepartmentFacet and not missed:
+                missed.append(queryset)
+                return 0
+            return real_update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', autospec=True, side_effect=added_meanwhile):
+            DepartmentFacet.apply_deltas(self.department.pk, {(DepartmentFacet.KEYWORD, 'poetics'): 1})
+        self.assertTrue(missed)
+        self.assertEqual(DepartmentFacet.counts(self.department)[DepartmentFacet.KEYWORD], [('poetics', 2)])
+
+    def test_rebuild_batches_and_limited_counts(self):
+        for i, keywords in enumerate(['poetics, drama', 'poetics', 'fiction, drama', 'poetics, satire']):
+            self.create_article(f'a{i}', keywords)
+        ArticleKeyword.objects.all().delete()
+        with CaptureQueriesContext(connection) as queries:
+            ArticleKeyword.rebuild(batch_size=3)
+        self.assertEqual(ArticleKeyword.objects.count(), 7)
+        self.assertFalse([query for query in queries if 'OFFSET' in query['sql']])
+
+        with self.assertNumQueries(1):
+            counts = DepartmentFacet.counts(self.department, limit=2)
+        self.assertEqual(counts[DepartmentFacet.KEYWORD], [('poetics', 3), ('drama', 2)])
+        self.assertEqual(counts[DepartmentFacet.STATUS], [('PUBLISHED', 4)])
+        self.assertEqual(len(DepartmentFacet.counts(self.department)[DepartmentFacet.KEYWORD]), 4)
+
+    def test_bulk_publish_keeps_facets_current(self):
+        draft = self.create_article('a', 'poetics', status='ACCEPTED')
+        self.create_article('b', 'drama')
+        editor = get_user_model().objects.create_user(email='editor@unijos.edu.ng', password='editorpass123')
+        Profile.objects.create(user=editor, role='EDITOR', institution='University of Jos').departments.add(self.department)
+        self.client.login(email='editor@unijos.edu.ng', password='editorpass123')
+
+        url = reverse('journal_app:bulk_article_management', args=['english'])
+        self.client.post(url, {'articles': [draft.pk], 'action': 'PUBLISH'})
+        counts = DepartmentFacet.counts(self.department)
+        self.assertEqual(counts[DepartmentFacet.STATUS], [('PUBLISHED', 2)])
+        self.assertEqual(counts[DepartmentFacet.KEYWORD], [('drama', 1), ('poetics', 1)])
+
+        self.client.post(url, {'articles': [draft.pk], 'action': 'ARCHIVE'})
+        counts = DepartmentFacet.counts(self.department)
+        self.assertEqual(counts[DepartmentFacet.STATUS], [('ARCHIVED', 1), ('PUBLISHED', 1)])
+        self.assertEqual(counts[DepartmentFacet.KEYWORD], [('drama', 1)])
+
+    def test_backfill_command_and_facets_api(self):
+        self.create_article('a', 'Poetics, Drama')
+        self.create_article('b', 'poetics', status='SUBMITTED')
+        ArticleKeyword.objects.all().delete()
+        DepartmentFacet.objects.all().delete()
+        call_command('backfill_keywords', stdout=open(os.devnull, 'w'))
+        self.assertEqual(ArticleKeyword.objects.count(), 3)
+
+        response = self.client.get(reverse('journal_app:api_department_facets', args=['english']))
+        data = response.json()
+        self.assertEqual(data['keywords'], [{'value': 'drama', 'count': 1}, {'value': 'poetics', 'count': 1}])
+        self.assertEqual(data['journals'], [{'value': self.journal.pk, 'label': self.journal.title, 'count': 1}])
+        self.assertNotIn('statuses', data)
+
+        response = self.client.get(reverse('journal_app:article_search'), {'keyword': ' POETICS '})
+        self.assertEqual([r.article.slug for r in response.context['results'].results], ['a'])
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.author = get_user_model().objects.create_user(
+            email='author@unijos.edu.ng',
+            password='authorpass123'
+        )
+        self.department = Department.objects.create(
+            name='ENGLISH',
+            slug='english',
+            description='Department of English',
+            established_date=timezone.now().date(),
+            email='english@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of English'
+        )
+        self.journal = Journal.objects.create(
+            department=self.department,
+            title='Journal of English Studies',
+            slug='jes',
+            description='Test journal'
+        )
+        # Pairs of articles share a publication date so the id breaks ties
+        published = timezone.now()
+        for i in range(25):
+            Article.objects.create(
+                department=self.department,
+                journal=self.journal,
+                title=f'Article {i}',
+                slug=f'article-{i}',
+                abstract='Test Abstract',
+                keywords='test',
+                author=self.author,
+                content='Test content',
+                manuscript_file='manuscripts/test.pdf',
+                status='PUBLISHED' if i != 3 else 'SUBMITTED',
+                publication_date=published - timezone.timedelta(days=i // 2)
+            )
+        self.articles = Article.objects.filter(journal=self.journal, status='PUBLISHED')
+        self.expected = list(self.articles.order_by('-publication_date', '-id'))
+
+    def test_cursors_walk_forward_and_back(self):
+        paginator = KeysetPaginator(self.articles, 10)
+        pages = [paginator.page()]
+        while pages[-1].has_next:
+            pages.append(paginator.page(pages[-1].next_cursor))
+        self.assertEqual([len(page) for page in pages], [10, 10, 4])
+        self.assertEqual([a for page in pages for a in page], self.expected)
+        self.assertFalse(pages[0].has_previous)
+
+        back = paginator.page(pages[2].previous_cursor)
+        self.assertEqual(list(back), list(pages[1]))
+        self.assertTrue(back.has_next)
+        first = paginator.page(back.previous_cursor)
+        self.assertEqual(list(first), list(pages[0]))
+        self.assertFalse(first.has_previous)
+
+        with self.assertRaises(ValueError):
+            paginator.page('not-a-cursor')
+        self.assertEqual(list(paginator.get_page('not-a-cursor')), list(pages[0]))
+
+    def test_deep_pages_cost_the_same_without_count(self):
+        paginator = KeysetPaginator(self.articles, 5)
+        page = paginator.page()
+        while page.has_next:
+            with QueryRecorder() as recorder:
+                page = paginator.page(page.next_cursor)
+            self.assertEqual(recorder.count, 1)
+            self.assertNotIn('COUNT', recorder.queries[0][0])
+
+    def test_journal_views_use_cursors(self):
+        self.client.force_login(self.author)
+        url = reverse('journal_app:journal_detail', args=['jes'])
+        response = self.client.get(url)
+        self.assertEqual(list(response.context['articles']), self.expected[:10])
+        response = self.client.get(url, {'cursor': response.context['articles'].next_cursor})
+        self.assertEqual(list(response.context['articles']), self.expected[10:20])
+
+        url = reverse('journal_app:api_journal_articles', args=['jes'])
+        data = self.client.get(url).json()
+        self.assertEqual([row['id'] for row in data['results']], [a.id for a in self.expected[:20]])
+        data = self.client.get(url, {'cursor': data['next']}).json()
+        self.assertEqual([row['id'] for row in data['results']], [a.id for a in self.expected[20:]])
+        self.assertIsNone(data['next'])
+        self.assertEqual(self.client.get(url, {'cursor': '!!'}).status_code, 400)
+
+
+# A plan step reading a whole table row by row, e.g. "SCAN journal_app_article"
+FULL_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)(?!\()(\S+)(?: AS \S+)?$')
+
+
+class QueryPlanTest(TestCase):
+    """The hot querysets must be served by an index, never a full table scan"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='editor@unijos.edu.ng',
+            password='editorpass123'
+        )
+        self.department = Department.objects.create(
+            name='ENGLISH',
+            slug='english',
+            description='Department of English',
+            established_date=timezone.now().date(),
+            email='english@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of English'
+        )
+        self.journal = Journal.objects.create(
+            department=self.department,
+            title='Journal of English Studies',
+            slug='jes',
+            description='Test journal'
+        )
+        self.article = Article.objects.create(
+            department=self.department,
+            journal=self.journal,
+            title='Test Article',
+            slug='test-article',
+            abstract='Test Abstract',
+            keywords='test',
+            author=self.user,
+            content='Test content',
+            manuscript_file='manuscripts/test.pdf',
+            status='UNDER_REVIEW'
+        )
+
+    def hot_queries(self):
+        """Callables evaluating the querysets behind the busiest views"""
+        dashboard = DepartmentDashboard(self.department)
+        return {
+            'home recent articles': lambda: list(
+                Article.objects.filter(status='PUBLISHED').order_by('-publication_date')[:4]
+            ),
+            'department recent articles': lambda: list(
+                Article.objects.filter(department=self.department).order_by('-publication_date')[:4]
+            ),
+            'dashboard counters': dashboard.counters,
+            'dashboard new submissions': lambda: list(dashboard.new_submissions()),
+            'dashboard under review': lambda: list(dashboard.articles_under_review()),
+            'dashboard recent publications': lambda: list(dashboard.recent_publications()),
+            'journal listing': lambda: list(published_journal_articles(self.journal)[:10]),
+            'reviewer assignments': lambda: list(Review.objects.filter(
+                reviewer=self.user, article__department=self.department, is_complete=False
+            ).select_related('article')),
+            'article review counts': lambda: Review.objects.filter(
+                article=self.article, is_complete=True
+            ).count(),
+            'review reminder sweep': lambda: list(pending_reviews(timezone.now())[:200]),
+        }
+
+    def full_table_scans(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            details = [row[-1] for row in cursor.fetchall()]
+        return [detail for detail in details if FULL_SCAN.match(detail)], details
+
+    def test_hot_queries_use_indexes(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN is SQLite syntax')
+        for name, run in self.hot_queries().items():
+            with self.subTest(query=name):
+                with CaptureQueriesContext(connection) as captured:
+                    run()
+                for query in captured.captured_queries:
+                    scans, plan = self.full_table_scans(query['sql'])
+                    self.assertEqual(scans, [], f"{name} plan:\n" + '\n'.join(plan))
+
+
+class DownloadTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.author = get_user_model().objects.create_user(
+            email='author@unijos.edu.ng',
+            password='authorpass123'
+        )
+        self.department = Department.objects.create(
+            name='ENGLISH',
+            slug='english',
+            description='Department of English',
+            established_date=timezone.now().date(),
+            email='english@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of English'
+        )
+        self.journal = Journal.objects.create(
+            department=self.department,
+            title='Journal of English Studies',
+            slug='jes',
+            description='Test journal'
+        )
+        self.body = bytes(range(256)) * 1024
+        self.article = Article.objects.create(
+            department=self.department,
+            journal=self.journal,
+            title='Test Article',
+            slug='test-article',
+            abstract='Test Abstract',
+            keywords='test',
+            author=self.author,
+            content='Test content',
+            manuscript_file=SimpleUploadedFile('paper.pdf', self.body),
+            status='PUBLISHED',
+            publication_date=timezone.now()
+        )
+        self.url = reverse('journal_app:article_download', args=['english', self.article.id])
+        usage_buffer.take()
+
+    def downloads(self):
+        usage_buffer.flush()
+        aggregate_usage()
+        return Article.objects.get(pk=self.article.pk).download_count
+
+    def test_full_and_conditional_downloads(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), self.body)
+        self.assertEqual(response['Content-Length'], str(len(self.body)))
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertEqual(self.downloads(), 1)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.downloads(), 1)
+
+    def test_byte_ranges(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.body)}')
+        self.assertEqual(b''.join(response.streaming_content), self.body[100:200])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10', HTTP_IF_RANGE=etag)
+        self.assertEqual(b''.join(response.streaming_content), self.body[-10:])
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.body)}-')
+        self.assertEqual(response.status_code, 416)
+        # Partial responses are not recorded, and the full response to the stale
+        # If-Range repeats the first download within the COUNTER double-click window
+        self.assertEqual(self.downloads(), 1)
+        self.assertEqual(UsageEvent.objects.filter(kind=UsageEvent.DOWNLOAD).count(), 2)
+
+    def test_unpublished_permissions_and_sendfile(self):
+        Article.objects.filter(pk=self.article.pk).update(status='UNDER_REVIEW')
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.force_login(self.author)
+        with self.settings(DOWNLOAD_SENDFILE='x-accel-redirect'):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.article.manuscript_file.name}')
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.downloads(), 0)
+
+
+class UsageEventTest(TestCase):
+    def setUp(self):
+        self.author = get_user_model().objects.create_user(
+            email='author@unijos.edu.ng',
+            password='authorpass123'
+        )
+        Profile.objects.create(user=self.author, role='AUTHOR', institution='University of Jos')
+        self.department = Department.objects.create(
+            name='ENGLISH',
+            slug='english',
+            description='Department of English',
+            established_date=timezone.now().date(),
+            email='english@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of English'
+        )
+        self.journal = Journal.objects.create(
+            department=self.department,
+            title='Journal of English Studies',
+            slug='jes',
+            description='Test journal'
+        )
+        self.article = Article.objects.create(
+            department=self.department,
+            journal=self.journal,
+            title='Test Article',
+            slug='test-article',
+            abstract='Test Abstract',
+            keywords='test',
+            author=self.author,
+            content='Test content',
+            manuscript_file='manuscripts/test.pdf',
+            status='PUBLISHED',
+            publication_date=timezone.now()
+        )
+        SiteStatistics.reconcile()
+        usage_buffer.take()
+        self.addCleanup(usage_buffer.take)
+
+    def test_views_buffer_events_without_writing(self):
+        self.client.force_login(self.author)
+        url = reverse('journal_app:article_detail', args=['english', self.article.id])
+        with QueryRecorder() as recorder:
+            self.client.get(url)
+        self.assertFalse([sql for sql, _ in recorder.queries if 'usageevent' in sql])
+        self.assertEqual(len(usage_buffer.events), 1)
+
+        with self.settings(USAGE_BUFFER_SIZE=2):
+            self.client.get(url)
+        self.assertEqual(usage_buffer.events, [])
+        self.assertEqual(UsageEvent.objects.filter(kind=UsageEvent.VIEW).count(), 2)
+
+    def test_aggregation_folds_events_once(self):
+        request = Client().get('/').wsgi_request
+        yesterday = timezone.now() - timezone.timedelta(days=1)
+        for kind, client, timestamp in [('DOWNLOAD', 'a', yesterday), ('DOWNLOAD', 'a', None),
+                                        ('DOWNLOAD', 'b', None), ('VIEW', 'a', None)]:
+            usage_buffer.add(self.article.pk, kind, client, timestamp=timestamp)
+        usage_buffer.add(999999, 'DOWNLOAD', 'client')
+        record_usage(request, self.article, UsageEvent.VIEW)
+        with QueryRecorder() as recorder:
+            self.assertEqual(usage_buffer.flush(), 6)
+        self.assertEqual(recorder.count, 1)
+
+        self.assertEqual(aggregate_usage(batch_size=4), 6)
+        self.assertEqual(aggregate_usage(), 0)
+        self.assertEqual(Article.objects.get(pk=self.article.pk).download_count, 3)
+        self.assertEqual(SiteStatistics.get_current().total_downloads, 3)
+        self.assertEqual(
+            list(ArticleDailyUsage.objects.values_list('views', 'downloads')),
+            [(2, 2), (0, 1)]
+        )
+
+
+class UsageReportTest(TestCase):
+    def setUp(self):
+        self.editor = get_user_model().objects.create_user(
+            email='editor@unijos.edu.ng',
+            password='editorpass123'
+        )
+        profile = Profile.objects.create(user=self.editor, role='EDITOR', institution='University of Jos')
+        self.department = Department.objects.create(
+            name='ENGLISH',
+            slug='english',
+            description='Department of English',
+            established_date=timezone.now().date(),
+            email='english@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of English'
+        )
+        profile.departments.add(self.department)
+        self.journals = [
+            Journal.objects.create(
+                department=self.department,
+                title=f'Journal {i}',
+                slug=f'journal-{i}',
+                description='Test journal'
+            ) for i in range(2)
+        ]
+        self.articles = [
+            Article.objects.create(
+                department=self.department,
+                journal=self.journals[i % 2],
+                title=f'Article {i}',
+                slug=f'article-{i}',
+                abstract='Test Abstract',
+                keywords='test',
+                author=self.editor,
+                content='Test content',
+                manuscript_file='manuscripts/test.pdf',
+                status='PUBLISHED',
+                publication_date=timezone.now()
+            ) for i in range(3)
+        ]
+        usage_buffer.take()
+        self.addCleanup(usage_buffer.take)
+
+    def add_events(self, events):
+        for article, kind, client, when in events:
+            usage_buffer.add(article.pk, kind, client, timestamp=when)
+        usage_buffer.flush()
+        aggregate_usage(batch_size=3)
+
+    def test_double_clicks_and_unique_clients(self):
+        start = timezone.make_aware(timezone.datetime(2026, 3, 10, 12))
+        second = timezone.timedelta(seconds=1)
+        article = self.articles[0]
+        self.add_events([
+            (article, 'DOWNLOAD', 'a', start),
+            (article, 'DOWNLOAD', 'a', start + 10 * second),   # double-click
+            (article, 'VIEW', 'a', start + 20 * second),
+            (article, 'DOWNLOAD', 'b', start + 20 * second),
+        ])
+        # Folded separately, but still a double-click and a repeat visitor
+        self.add_events([
+            (article, 'DOWNLOAD', 'b', start + 40 * second),
+            (article, 'DOWNLOAD', 'a', start + 600 * second),
+        ])
+        usage = ArticleDailyUsage.objects.get(article=article)
+        self.assertEqual(
+            [usage.views, usage.downloads, usage.unique_investigations, usage.unique_requests],
+            [1, 3, 2, 2]
+        )
+        self.assertEqual(Article.objects.get(pk=article.pk).download_count, 3)
+
+    def test_report_walks_journals_and_months(self):
+        march = timezone.make_aware(timezone.datetime(2026, 3, 10, 12))
+        april = timezone.make_aware(timezone.datetime(2026, 4, 2, 12))
+        self.add_events([
+            (self.articles[0], 'DOWNLOAD', 'a', march),
+            (self.articles[2], 'DOWNLOAD', 'b', march),
+            (self.articles[2], 'VIEW', 'a', april),
+            (self.articles[1], 'VIEW', 'a', april),
+        ])
+        report = UsageReport(parse_month('2026-02'), parse_month('2026-04'), 'journal')
+        with QueryRecorder() as recorder:
+            rows = [row for _, row in report.rows()]
+        # The usage rollups plus the journal titles
+        self.assertEqual(recorder.count, 2)
+        self.assertEqual(report.header()[-3:], ['Feb-2026', 'Mar-2026', 'Apr-2026'])
+        self.assertEqual(rows, [
+            ['Journal 0', self.journals[0].pk, 'Total_Item_Investigations', 3, 0, 2, 1],
+            ['Journal 0', self.journals[0].pk, 'Unique_Item_Investigations', 3, 0, 2, 1],
+            ['Journal 0', self.journals[0].pk, 'Total_Item_Requests', 2, 0, 2, 0],
+            ['Journal 0', self.journals[0].pk, 'Unique_Item_Requests', 2, 0, 2, 0],
+            ['Journal 1', self.journals[1].pk, 'Total_Item_Investigations', 1, 0, 0, 1],
+            ['Journal 1', self.journals[1].pk, 'Unique_Item_Investigations', 1, 0, 0, 1],
+        ])
+
+        self.client.force_login(self.editor)
+        response = self.client.get(reverse('journal_app:usage_report', args=['english']), {
+            'start': '2026-03', 'end': '2026-04', 'level': 'item', 'format': 'tsv', 'journal': 'journal-1'
+        })
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(response['Content-Type'], 'text/tab-separated-values')
+        self.assertEqual(lines[1].split('\t')[2:6], ['Article 1', str(self.articles[1].pk), '', 'Total_Item_Investigations'])
+        self.assertEqual(len(lines), 3)
+        bad = self.client.get(reverse('journal_app:usage_report', args=['english']), {'start': '2026-13'})
+        self.assertEqual(bad.status_code, 400)
+
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir)
+        call_command('usage_reports', start='2026-01', end='2026-12', output_dir=output_dir,
+                     stdout=open(os.devnull, 'w'))
+        self.assertEqual(sorted(os.listdir(output_dir)), ['journal-0.tsv', 'journal-1.tsv'])
+
+
+class UploadTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root, UPLOAD_TEMP_DIR=os.path.join(media_root, 'uploads'))
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.author = get_user_model().objects.create_user(
+            email='author@unijos.edu.ng',
+            password='authorpass123'
+        )
+        Profile.objects.create(user=self.author, role='AUTHOR', institution='University of Jos')
+        self.department = Department.objects.create(
+            name='ENGLISH',
+            slug='english',
+            description='Department of English',
+            established_date=timezone.now().date(),
+            email='english@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of English'
+        )
+        self.journal = Journal.objects.create(
+            department=self.department,
+            title='Journal of English Studies',
+            slug='jes',
+            description='Test journal'
+        )
+        self.client.force_login(self.author)
+
+    def upload(self, body, checksum=None, chunk_size=1000):
+        """Send `body` through the upload API in chunks and return the token"""
+        response = self.client.post(reverse('journal_app:upload_create'), {
+            'filename': 'paper.pdf',
+            'size': len(body),
+            'checksum': hashlib.sha256(body).hexdigest() if checksum is None else checksum,
+        })
+        self.assertEqual(response.status_code, 201)
+        url = response['Location']
+        for offset in range(0, len(body), chunk_size):
+            response = self.client.patch(
+                url, body[offset:offset + chunk_size],
+                content_type='application/offset+octet-stream',
+                headers={'Upload-Offset': str(offset)}
+            )
+        return response.json().get('token'), response
+
+    def test_chunks_resume_from_the_server_offset(self):
+        body = os.urandom(2500)
+        response = self.client.post(reverse('journal_app:upload_create'), {'filename': 'paper.pdf', 'size': 2500})
+        url = response['Location']
+
+        def patch(offset, data):
+            return self.client.patch(url, data, content_type='application/offset+octet-stream',
+                                     headers={'Upload-Offset': str(offset)})
+
+        self.assertEqual(patch(0, body[:1000])['Upload-Offset'], '1000')
+        # A repeated chunk is refused with the offset to resume from
+        conflict = patch(0, body[:1000])
+        self.assertEqual((conflict.status_code, conflict['Upload-Offset']), (409, '1000'))
+        self.assertEqual(self.client.head(url)['Upload-Offset'], '1000')
+        self.assertEqual(patch(1000, body[1000:])['Upload-Offset'], '2500')
+
+        upload = Upload.objects.get()
+        self.assertTrue(upload.is_complete)
+        self.assertEqual(upload.checksum, hashlib.sha256(body).hexdigest())
+        with open(upload.partial_path, 'rb') as f:
+            self.assertEqual(f.read(), body)
+        self.assertEqual(patch(2500, b'x').status_code, 409)
+
+    def test_concurrent_chunks_at_one_offset(self):
+        body, other = os.urandom(1000), os.urandom(1000)
+        upload = start_upload(self.author, 'paper.pdf', 1000)
+        outcome = {}
+
+        class Stream(io.BytesIO):
+            """A request body during whose transfer a second request arrives"""
+            def read(stream, size=-1):
+                if 'second' not in outcome:
+                    try:
+                        write_chunk(Upload.objects.get(pk=upload.pk), 0, io.BytesIO(other), 1000)
+                        outcome['second'] = 'written'
+                    except UploadError as e:
+                        outcome['second'] = e.status
+                return super().read(size)
+
+        self.assertEqual(write_chunk(upload, 0, Stream(body), 1000), 1000)
+        self.assertEqual(outcome['second'], 409)
+        upload.refresh_from_db()
+        self.assertEqual(upload.checksum, hashlib.sha256(body).hexdigest())
+        with open(upload.partial_path, 'rb') as f:
+            self.assertEqual(f.read(), body)
+
+    def test_checksum_mismatch_discards_the_upload(self):
+        token, response = self.upload(b'manuscript' * 300, checksum='0' * 64)
+        self.assertEqual(response.status_code, 460)
+        self.assertFalse(Upload.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(settings.MEDIA_ROOT, 'uploads')), [])
+
+    def test_submission_attaches_uploads_by_token(self):
+        body = b'%PDF manuscript' * 500
+        manuscript, _ = self.upload(body)
+        supplement, _ = self.upload(b'data' * 10)
+        other = get_user_model().objects.create_user(email='other@unijos.edu.ng', password='otherpass123')
+        foreign = Upload.objects.create(owner=other, filename='x.pdf', size=1, completed_at=timezone.now())
+
+        data = {
+            'journal': self.journal.pk,
+            'title': 'Uploaded Article',
+            'abstract': 'Abstract',
+            'keywords': 'test',
+            'corresponding_author': self.author.pk,
+            'content': 'Content',
+            'supplementary_uploads': supplement,
+        }
+        url = reverse('journal_app:article_submit', args=['english'])
+        # Another user's upload cannot be claimed
+        response = self.client.post(url, dict(data, manuscript_upload=str(foreign.token)))
+        self.assertIn('manuscript_upload', response.context['form'].errors)
+
+        self.client.post(url, dict(data, manuscript_upload=manuscript))
+        article = Article.objects.get(title='Uploaded Article')
+        self.assertTrue(article.manuscript_file.name.startswith('manuscripts/'))
+        with article.manuscript_file.open('rb') as f:
+            self.assertEqual(f.read(), body)
+        self.assertEqual(article.article_files.get().file_type, 'SUPPLEMENT')
+        self.assertEqual(list(Upload.objects.all()), [foreign])
+        self.assertEqual(os.listdir(settings.UPLOAD_TEMP_DIR), [])
+
+    def test_expire_uploads(self):
+        self.upload(b'abc', chunk_size=2)
+        Upload.objects.update(created_at=timezone.now() - timezone.timedelta(days=2))
+        call_command('expire_uploads', stdout=open(os.devnull, 'w'))
+        self.assertFalse(Upload.objects.exists())
+        self.assertEqual(os.listdir(settings.UPLOAD_TEMP_DIR), [])
+
+
+class DocumentStorageTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        author = get_user_model().objects.create_user(email='author@unijos.edu.ng', password='authorpass123')
+        department = Department.objects.create(
+            name='ENGLISH',
+            slug='english',
+            description='Department of English',
+            established_date=timezone.now().date(),
+            email='english@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of English'
+        )
+        journal = Journal.objects.create(
+            department=department,
+            title='Journal of English Studies',
+            slug='jes',
+            description='Test journal'
+        )
+        self.body = b'%PDF same manuscript' * 1000
+        self.article = Article.objects.create(
+            department=department,
+            journal=journal,
+            title='Test Article',
+            slug='test-article',
+            abstract='Test Abstract',
+            keywords='test',
+            author=author,
+            content='Test content',
+            manuscript_file=SimpleUploadedFile('paper.pdf', self.body)
+        )
+        self.storage = self.article.manuscript_file.storage
+
+    def blobs(self):
+        return [name for _, _, names in os.walk(os.path.join(self.media_root, 'blobs')) for name in names]
+
+    def test_identical_uploads_share_one_blob(self):
+        revision = ArticleFile.objects.create(
+            article=self.article,
+            file=SimpleUploadedFile('paper.pdf', self.body),
+            file_type='REVISION'
+        )
+        self.assertTrue(revision.file.name.startswith('article_files/'))
+        self.assertTrue(os.path.samefile(revision.file.path, self.article.manuscript_file.path))
+        self.assertEqual(self.storage.references(revision.file.name), 2)
+        self.assertEqual(self.blobs(), [hashlib.sha256(self.body).hexdigest()])
+        with revision.file.open('rb') as f:
+            self.assertEqual(f.read(), self.body)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            revision.delete()
+        self.assertFalse(os.path.exists(revision.file.path))
+        self.assertEqual(len(self.blobs()), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.delete()
+        self.assertEqual(len(self.blobs()), 1)
+        call_command('dedupe_media', garbage_only=True, stdout=open(os.devnull, 'w'))
+        self.assertEqual(self.blobs(), [])
+
+    def test_save_survives_the_blob_being_collected(self):
+        """A blob removed between adding it and linking the name is added again"""
+        add_blob = self.storage.add_blob
+
+        def collected_meanwhile(source, digest):
+            blob = add_blob(source, digest)
+            self.storage.add_blob = add_blob
+            # The manuscript's name goes and garbage collection runs, as another process could
+            self.storage.delete(self.article.manuscript_file.name)
+            self.assertEqual(self.storage.collect_garbage(), 1)
+            return blob
+
+        self.storage.add_blob = collected_meanwhile
+        self.addCleanup(vars(self.storage).pop, 'add_blob', None)
+        name = self.storage.save('article_files/copy.pdf', ContentFile(self.body))
+        with self.storage.open(name) as f:
+            self.assertEqual(f.read(), self.body)
+        self.assertEqual(self.blobs(), [hashlib.sha256(self.body).hexdigest()])
+        self.assertFalse([name for name in os.listdir(os.path.join(self.media_root, 'blobs')) if name.startswith('.')])
+
+    def test_dedupe_media_links_existing_copies(self):
+        for name in ('article_files/old-1.pdf', 'article_files/old-2.pdf'):
+            os.makedirs(os.path.join(self.media_root, 'article_files'), exist_ok=True)
+            with open(os.path.join(self.media_root, name), 'wb') as f:
+                f.write(self.body)
+            ArticleFile.objects.create(article=self.article, file=name, file_type='REVISION')
+        orphan = os.path.join(self.media_root, 'blobs', '00', '00', '0' * 64)
+        os.makedirs(os.path.dirname(orphan))
+        open(orphan, 'wb').close()
+
+        call_command('dedupe_media', stdout=open(os.devnull, 'w'))
+        paths = [self.article.manuscript_file.path] + [
+            os.path.join(self.media_root, f'article_files/old-{i}.pdf') for i in (1, 2)
+        ]
+        self.assertEqual(len({os.stat(path).st_ino for path in paths}), 1)
+        self.assertEqual(self.storage.references('article_files/old-1.pdf'), 3)
+        self.assertFalse(os.path.exists(orphan))
+
+
+class ImageDerivativeTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        images._manifests.clear()
+
+        self.department = Department.objects.create(
+            name='ENGLISH',
+            slug='english',
+            description='Department of English',
+            established_date=timezone.now().date(),
+            email='english@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of English'
+        )
+
+    def png(self, width, height):
+        buffer = io.BytesIO()
+        Image.new('RGBA', (width, height), (200, 30, 30, 128)).save(buffer, 'PNG')
+        return SimpleUploadedFile('cover.png', buffer.getvalue())
+
+    def test_upload_generates_variants_at_fixed_widths(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            journal = Journal.objects.create(
+                department=self.department,
+                title='Journal of English Studies',
+                slug='jes',
+                description='Test journal',
+                cover_image=self.png(2000, 1000)
+            )
+        manifest = images.get_derivatives(journal.cover_image, generate=False)
+        self.assertEqual((manifest['width'], manifest['height']), (2000, 1000))
+        self.assertEqual([width for width, _ in manifest['variants']['webp']], [160, 320, 640, 1280])
+        width, name = manifest['variants']['webp'][1]
+        with journal.cover_image.storage.open(name) as f:
+            variant = Image.open(f)
+            self.assertEqual((variant.format, variant.size), ('WEBP', (320, 160)))
+
+        html = Template('{% load responsive_images %}{% responsive_image journal.cover_image alt=journal.title sizes="33vw" class="card-img-top" %}').render(
+            Context({'journal': journal})
+        )
+        self.assertIn('type="image/webp"', html)
+        self.assertIn('/media/derivatives/journal_covers/cover/320.webp 320w', html)
+        self.assertIn('src="/media/derivatives/journal_covers/cover/160.jpg"', html)
+        self.assertIn('width="2000" height="1000"', html)
+        self.assertIn('class="card-img-top"', html)
+
+    def test_small_and_unreadable_images(self):
+        journal = Journal(department=self.department, title='Small', slug='small', description='Test journal',
+                          cover_image=self.png(200, 100))
+        journal.cover_image.save('cover.png', journal.cover_image.file, save=False)
+        manifest = images.get_derivatives(journal.cover_image)
+        self.assertEqual([width for width, _ in manifest['variants']['jpeg']], [160, 200])
+
+        journal.cover_image = 'journal_covers/missing.png'
+        with self.assertLogs('journal_app.images', 'WARNING'):
+            self.assertIsNone(images.get_derivatives(journal.cover_image))
+        # Failures are not remembered, in case the file turns up
+        self.assertNotIn('journal_covers/missing.png', images._manifests)
+
+    def test_replaced_and_deleted_images_lose_their_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            journal = Journal.objects.create(department=self.department, title='Covered', slug='covered',
+                                             description='Test journal', cover_image=self.png(400, 200))
+        storage, old_name = journal.cover_image.storage, journal.cover_image.name
+        old_dir = images.derivative_dir(old_name)
+        self.assertTrue(storage.listdir(old_dir)[1])
+
+        journal.cover_image = self.png(300, 300)
+        with self.captureOnCommitCallbacks(execute=True):
+            journal.save()
+        self.assertEqual(storage.listdir(old_dir)[1], [])
+        self.assertNotIn(old_name, images._manifests)
+        new_dir = images.derivative_dir(journal.cover_image.name)
+        self.assertIn('manifest.json', storage.listdir(new_dir)[1])
+
+        # Saves that leave the image alone keep its variants
+        with self.captureOnCommitCallbacks(execute=True):
+            journal.save(update_fields=['title'])
+            Journal.objects.get(pk=journal.pk).save()
+        self.assertIn('manifest.json', storage.listdir(new_dir)[1])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            journal.delete()
+        self.assertEqual(storage.listdir(new_dir)[1], [])
+
+    def test_pages_never_generate_variants(self):
+        # Saved without running the on-commit hook, like images stored before variants existed
+        journal = Journal.objects.create(department=self.department, title='Large', slug='large',
+                                         description='Test journal', cover_image=self.png(2000, 1000))
+        template = Template('{% load responsive_images %}{% responsive_image image alt="x" %}')
+
+        html = template.render(Context({'image': journal.cover_image}))
+        self.assertEqual(html, f'<img src="{journal.cover_image.url}" alt="x">')
+        self.assertIsNone(images.get_derivatives(journal.cover_image, generate=False))
+
+        call_command('generate_image_derivatives', stdout=open(os.devnull, 'w'))
+        self.assertIn('<picture>', template.render(Context({'image': journal.cover_image})))
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+
+
+class CountingEmailBackend(locmem.EmailBackend):
+    """locmem backend counting the connections made and messages sent per connection"""
+    connections = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connections.append(self)
+        self.sent = 0
+
+    def send_messages(self, messages):
+        self.sent += len(messages)
+        return super().send_messages(messages)
+
+
+class OutboxTest(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(
+            name='ENGLISH',
+            slug='english',
+            description='Department of English',
+            established_date=timezone.now().date(),
+            email='english@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of English'
+        )
+
+    def queue(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                NotificationManager()._send_email(
+                    'reviewer@unijos.edu.ng', 'Review Reminder', 'review_reminder',
+                    {'department': self.department, 'days_remaining': 3}, self.department
+                )
+                # Nothing is written or sent until the transaction commits
+                self.assertFalse(OutgoingEmail.objects.exists())
+        self.assertEqual(mail.outbox, [])
+
+    def test_worker_sends_queued_email(self):
+        self.queue()
+        self.assertEqual(EmailLog.objects.get().status, 'QUEUED')
+        call_command('send_queued_email', stdout=open(os.devnull, 'w'))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reviewer@unijos.edu.ng'])
+        self.assertIn('3 days remaining', mail.outbox[0].body)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertEqual(OutgoingEmail.objects.get().status, OutgoingEmail.SENT)
+        self.assertEqual(EmailLog.objects.get().status, 'SENT')
+        # Nothing left to send
+        self.assertEqual(drain()[:2], (0, 0))
+
+    def test_failures_back_off_then_give_up(self):
+        self.queue()
+        with self.settings(EMAIL_BACKEND='journal_app.tests.FailingEmailBackend', EMAIL_OUTBOX_MAX_ATTEMPTS=3), \
+                self.assertLogs('journal_app.outbox', 'WARNING'):
+            delays = []
+            for _ in range(3):
+                OutgoingEmail.objects.filter(status=OutgoingEmail.PENDING).update(next_attempt_at=timezone.now())
+                before = timezone.now()
+                self.assertEqual(drain(workers=2)[:2], (0, 1))
+                message = OutgoingEmail.objects.get()
+                delays.append(round((message.next_attempt_at - before).total_seconds() / 60))
+        self.assertEqual(delays[:2], [1, 2])
+        self.assertEqual((message.status, message.attempts), (OutgoingEmail.FAILED, 3))
+        log = EmailLog.objects.get()
+        self.assertEqual(log.status, 'FAILED')
+        self.assertIn('unexpectedly closed', log.error_message)
+
+    def test_batch_is_rendered_once_and_sent_over_reused_connections(self):
+        emails = [f'member{i}@unijos.edu.ng' for i in range(25)]
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                NotificationManager().send_batch(emails + emails[:5], 'Faculty meeting', 'batch_notification',
+                                                 {'message': 'Friday at noon', 'department': self.department},
+                                                 self.department)
+        # One INSERT for the logs and one for the outbox rows
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(OutgoingEmail.objects.count(), 25)
+
+        CountingEmailBackend.connections = []
+        with self.settings(EMAIL_BACKEND='journal_app.tests.CountingEmailBackend', EMAIL_BATCH_SIZE=10):
+            self.assertEqual(drain(workers=1)[:2], (25, 0))
+        self.assertEqual([backend.sent for backend in CountingEmailBackend.connections], [10, 10, 5])
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), sorted(emails))
+        self.assertEqual(len({message.body for message in mail.outbox}), 1)
+        self.assertEqual(EmailLog.objects.filter(status='SENT').count(), 25)
+
+    def test_text_part_has_no_html_entities(self):
+        rendered = render_email('submission_editor', {
+            'department': self.department, 'recipient_name': "Tom O'Brien & Co", 'review_url': '/?a=1&b="2"'
+        })
+        self.assertIn('O&#x27;Brien &amp; Co', rendered.html)
+        self.assertIn("Dear Tom O'Brien & Co,", rendered.text)
+        self.assertNotRegex(rendered.text, r'&(amp|quot|#x27|lt|gt);')
+
+    def test_shared_render_fills_in_recipient_fields(self):
+        recipients = {
+            'ada@unijos.edu.ng': {'recipient_name': 'Ada Obi'},
+            'tom@unijos.edu.ng': {'recipient_name': "Tom O'Brien & Co"},
+        }
+        context = {'department': self.department, 'review_url': 'https://example.com/review/'}
+        render_email('submission_editor', context)
+        renders = render_timings['submission_editor'][0]
+        loads = email_templates.cache_info().misses
+
+        with self.captureOnCommitCallbacks(execute=True):
+            NotificationManager().send_batch(recipients, 'New Submission', 'submission_editor', context,
+                                             self.department)
+        # One render for both copies, from the already compiled template
+        self.assertEqual(render_timings['submission_editor'][0], renders + 1)
+        self.assertEqual(email_templates.cache_info().misses, loads)
+
+        messages = {message.recipient: message for message in OutgoingEmail.objects.all()}
+        self.assertIn('Dear Ada Obi,', messages['ada@unijos.edu.ng'].html_content)
+        self.assertIn('Dear Tom O&#x27;Brien &amp; Co,', messages['tom@unijos.edu.ng'].html_content)
+        self.assertNotIn(MARKER_START, messages['tom@unijos.edu.ng'].text_content)
+        self.assertIn("Dear Tom O'Brien & Co,", messages['tom@unijos.edu.ng'].text_content)
+        self.assertTrue(all(message.render_time > 0 for message in messages.values()))
+
+        with self.assertLogs('journal_app.outbox', 'INFO') as logs:
+            result = drain(workers=1)
+        self.assertEqual(result.sent, 2)
+        self.assertGreater(result.render_time, 0)
+        self.assertIn('ms rendering', logs.output[0])
+
+
+class DigestTest(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(
+            name='ENGLISH',
+            slug='english',
+            description='Department of English',
+            established_date=timezone.now().date(),
+            email='english@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of English'
+        )
+        self.settings_row = DepartmentSettings.objects.create(
+            department=self.department,
+            submission_guidelines='-',
+            review_guidelines='-',
+            publication_frequency='Quarterly',
+            peer_review_type='DOUBLE_BLIND',
+            contact_email='english@unijos.edu.ng',
+            notification_settings={'editor_digest': 'hourly'}
+        )
+        User = get_user_model()
+        self.editors = []
+        for i, role in enumerate(['EDITOR', 'DEPT_ADMIN']):
+            editor = User.objects.create_user(email=f'editor{i}@unijos.edu.ng', password='editorpass123',
+                                              first_name=f'Editor{i}', last_name='Okafor')
+            Profile.objects.create(user=editor, role=role, institution='University of Jos').departments.add(self.department)
+            self.editors.append(editor)
+        self.author = User.objects.create_user(email='author@unijos.edu.ng', password='authorpass123')
+        self.reviewer = User.objects.create_user(email='reviewer@unijos.edu.ng', password='reviewerpass123')
+        journal = Journal.objects.create(department=self.department, title='Journal of English Studies',
+                                         slug='jes', description='Test journal')
+        self.articles = [
+            Article.objects.create(title=f'Article {i}', slug=f'article-{i}', abstract='Test Abstract',
+                                   author=self.author, department=self.department, journal=journal,
+                                   status='SUBMITTED')
+            for i in range(3)
+        ]
+
+    def test_events_are_held_for_one_digest_per_editor(self):
+        manager = NotificationManager()
+        for article in self.articles:
+            manager.notify_editors_new_submission(article)
+        review = Review.objects.create(article=self.articles[0], reviewer=self.reviewer,
+                                       due_date=timezone.now(), recommendation='ACCEPT', is_complete=True)
+        manager.notify_review_completed(review)
+        self.assertEqual(DigestEvent.objects.count(), 8)
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+        # Not due until the oldest event is an hour old
+        self.assertEqual(send_digests(), 0)
+
+        with self.assertNumQueries(1):
+            digests, event_ids = build_digests(self.department)
+        self.assertEqual(len(event_ids), 8)
+        self.assertEqual([len(submissions) for _, submissions, _ in digests], [3, 3])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(send_digests(now=timezone.now() + timezone.timedelta(hours=1)), 2)
+        self.assertFalse(DigestEvent.objects.exists())
+        message = OutgoingEmail.objects.get(recipient='editor0@unijos.edu.ng')
+        self.assertIn('Dear Editor0 Okafor', message.html_content)
+        for article in self.articles:
+            self.assertIn(article.title, message.html_content)
+        self.assertIn('Accept from', message.text_content)
+        self.assertIn(f'http://localhost:8000/english/article/{self.articles[0].id}/', message.html_content)
+
+    def test_departments_without_digests_email_per_event(self):
+        self.settings_row.notification_settings = {}
+        self.settings_row.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            NotificationManager(RequestFactory().get('/')).notify_editors_new_submission(self.articles[0])
+        self.assertFalse(DigestEvent.objects.exists())
+        self.assertEqual(
+            sorted(OutgoingEmail.objects.values_list('recipient', flat=True)),
+            ['editor0@unijos.edu.ng', 'editor1@unijos.edu.ng']
+        )
+
+
+class ReviewReminderTest(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(
+            name='ENGLISH',
+            slug='english',
+            description='Department of English',
+            established_date=timezone.now().date(),
+            email='english@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of English'
+        )
+        journal = Journal.objects.create(department=self.department, title='Journal of English Studies',
+                                         slug='jes', description='Test journal')
+        User = get_user_model()
+        author = User.objects.create_user(email='author@unijos.edu.ng', password='authorpass123')
+        self.now = timezone.now()
+        self.reviews = {}
+        for days in [30, 5, 1, -3]:
+            article = Article.objects.create(title=f'Due in {days}', slug=f'due-{days + 10}', abstract='-',
+                                             author=author, department=self.department, journal=journal,
+                                             status='UNDER_REVIEW')
+            reviewer = User.objects.create_user(email=f'reviewer{days + 10}@unijos.edu.ng', password='reviewerpass123')
+            self.reviews[days] = Review.objects.create(article=article, reviewer=reviewer,
+                                                       due_date=self.now + timezone.timedelta(days=days, hours=1))
+        Review.objects.filter(pk=self.reviews[1].pk).update(is_complete=True)
+
+    def tiers(self):
+        return {days: Review.objects.get(pk=review.pk).reminder_tier for days, review in self.reviews.items()}
+
+    @override_settings(REVIEW_REMINDER_DAYS=[7, 2, 0, -7])
+    def test_each_tier_is_sent_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(send_review_reminders(now=self.now, batch_size=1), 2)
+        self.assertEqual(self.tiers(), {30: 0, 5: 1, 1: 0, -3: 3})
+        messages = {message.recipient: message for message in OutgoingEmail.objects.all()}
+        self.assertIn('5 days remaining', messages['reviewer15@unijos.edu.ng'].html_content)
+        overdue = messages['reviewer7@unijos.edu.ng']
+        self.assertTrue(overdue.subject.startswith('Review Overdue'))
+        self.assertIn('3 days overdue', overdue.html_content)
+        # Links are built without a request
+        self.assertIn(f'http://localhost:8000/english/review/{self.reviews[-3].pk}/submit/', overdue.html_content)
+
+        # Rerunning sends nothing new
+        self.assertEqual(send_review_reminders(now=self.now), 0)
+
+        # Four days on, the first review reaches the two-day tier
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(send_review_reminders(now=self.now + timezone.timedelta(days=4)), 1)
+        self.assertEqual(self.tiers(), {30: 0, 5: 2, 1: 0, -3: 3})
+        self.assertEqual(OutgoingEmail.objects.count(), 3)
+
+    @override_settings(REVIEW_REMINDER_DAYS=[7, 2, 0, -7])
+    def test_extended_deadline_starts_reminders_over(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            send_review_reminders(now=self.now)
+        review = Review.objects.get(pk=self.reviews[-3].pk)
+        self.assertEqual(review.reminder_tier, 3)
+
+        # Extended to ten days from now: nothing is due until the seven-day tier
+        review.due_date = self.now + timezone.timedelta(days=10)
+        review.save()
+        self.assertEqual(self.tiers()[-3], 0)
+        self.assertEqual(send_review_reminders(now=self.now), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(send_review_reminders(now=self.now + timezone.timedelta(days=4)), 2)
+        self.assertEqual(self.tiers()[-3], 1)
+
+        # Saving without moving the deadline keeps the tier
+        review = Review.objects.get(pk=review.pk)
+        review.comments_to_editor = 'Nearly done'
+        review.save()
+        self.assertEqual(self.tiers()[-3], 1)
+
+
+class ReviewerRecommendationTest(TestCase):
+    def setUp(self):
+        recommendations._indexes.clear()
+        self.department = Department.objects.create(
+            name='ENGLISH',
+            slug='english',
+            description='Department of English',
+            established_date=timezone.now().date(),
+            email='english@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of English'
+        )
+        self.journal = Journal.objects.create(department=self.department, title='Journal of English Studies',
+                                              slug='jes', description='Test journal')
+        User = get_user_model()
+        self.author = User.objects.create_user(email='author@unijos.edu.ng', password='authorpass123')
+        self.reviewers = {}
+        for name, expertise in [
+            ('poet', 'Victorian poetry, Romanticism'),
+            ('linguist', 'Syntax, phonology'),
+            ('busy', 'Poetry'),
+            ('colleague', 'Victorian poetry'),
+        ]:
+            user = User.objects.create_user(email=f'{name}@unijos.edu.ng', password='reviewerpass123',
+                                            first_name=name.title())
+            profile = Profile.objects.create(user=user, role='REVIEWER', institution='University of Jos',
+                                             expertise=expertise)
+            profile.departments.add(self.department)
+            self.reviewers[name] = user
+
+        self.article = self.create_article('Romantic and Victorian poetry', 'poetry; victorian')
+        # A paper co-written with the author is a conflict of interest
+        self.create_article('Earlier work', 'poetry').co_authors.add(self.reviewers['colleague'])
+        for i in range(3):
+            other = self.create_article(f'Other {i}', 'drama')
+            Review.objects.create(article=other, reviewer=self.reviewers['busy'], due_date=timezone.now())
+
+    def create_article(self, title, keywords):
+        return Article.objects.create(title=title, slug=slugify(title), abstract='-', keywords=keywords,
+                                      author=self.author, department=self.department, journal=self.journal,
+                                      status='SUBMITTED')
+
+    def ranked(self):
+        return [recommendation.reviewer.first_name for recommendation in recommend_reviewers(self.article)]
+
+    def test_ranks_by_expertise_and_workload_without_conflicts(self):
+        self.assertEqual(self.ranked(), ['Poet', 'Busy'])
+        recommendation = recommend_reviewers(self.article)[1]
+        self.assertEqual(recommendation.open_reviews, 3)
+        self.assertLess(recommendation.score, recommendation.similarity)
+
+        # Nothing changed: only the change check and the per-article lookups run
+        with self.assertNumQueries(5):
+            self.ranked()
+
+    def test_index_picks_up_profile_and_review_changes(self):
+        self.ranked()
+        profile = self.reviewers['linguist'].profile
+        profile.expertise = 'Victorian poetry and the Romantic tradition'
+        profile.save()
+        self.assertIn('Linguist', self.ranked())
+
+        # Completed reviews count towards a reviewer's expertise
+        paper = self.create_article('Postcolonial drama in Nigeria', 'drama')
+        Review.objects.create(article=self.create_article('Nigerian drama', 'drama'),
+                              reviewer=self.reviewers['poet'], due_date=timezone.now(), is_complete=True)
+        self.article = paper
+        self.assertEqual(self.ranked()[0], 'Poet')
+
+
+class BulkAssignmentTest(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(
+            name='ENGLISH',
+            slug='english',
+            description='Department of English',
+            established_date=timezone.now().date(),
+            email='english@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of English'
+        )
+        DepartmentSettings.objects.create(
+            department=self.department,
+            submission_guidelines='-',
+            review_guidelines='-',
+            publication_frequency='Quarterly',
+            peer_review_type='DOUBLE_BLIND',
+            contact_email='english@unijos.edu.ng',
+            max_reviewers_per_article=2,
+            review_deadline_days=21
+        )
+        journal = Journal.objects.create(department=self.department, title='Journal of English Studies',
+                                         slug='jes', description='Test journal')
+        User = get_user_model()
+        self.editor = User.objects.create_user(email='editor@unijos.edu.ng', password='editorpass123')
+        Profile.objects.create(user=self.editor, role='EDITOR', institution='University of Jos').departments.add(self.department)
+        self.reviewers = []
+        for i in range(3):
+            reviewer = User.objects.create_user(email=f'reviewer{i}@unijos.edu.ng', password='reviewerpass123',
+                                                first_name=f'Reviewer{i}')
+            Profile.objects.create(user=reviewer, role='REVIEWER', institution='University of Jos').departments.add(self.department)
+            self.reviewers.append(reviewer)
+        self.articles = [
+            Article.objects.create(title=f'Article {i}', slug=f'article-{i}', abstract='-', department=self.department,
+                                   journal=journal, author=self.reviewers[2] if i == 2 else self.editor,
+                                   status='SUBMITTED')
+            for i in range(3)
+        ]
+        Review.objects.create(article=self.articles[0], reviewer=self.reviewers[0], due_date=timezone.now())
+
+    def test_matrix_is_validated_and_inserted_in_bulk(self):
+        pairs = [(article, reviewer) for article in self.articles for reviewer in self.reviewers]
+        with CaptureQueriesContext(connection) as queries:
+            result = assign_reviewers(pairs)
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('INSERT INTO "journal_app_review"')]), 1)
+        # One read of the existing assignments for the whole matrix
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('SELECT "journal_app_review"')]), 1)
+
+        self.assertEqual(sorted((r.article.title, r.reviewer.first_name) for r in result.created), [
+            ('Article 0', 'Reviewer1'), ('Article 1', 'Reviewer0'), ('Article 1', 'Reviewer1'),
+            ('Article 2', 'Reviewer0'), ('Article 2', 'Reviewer1'),
+        ])
+        self.assertEqual(sorted(reason for _, _, reason in result.skipped), [
+            'already assigned', 'article already has 2 reviewers', 'article already has 2 reviewers',
+            'author of the article',
+        ])
+        review = Review.objects.get(article=self.articles[1], reviewer=self.reviewers[0])
+        self.assertAlmostEqual((review.due_date - timezone.now()).days, 20, delta=1)
+        self.assertEqual(set(Article.objects.values_list('status', flat=True)), {'UNDER_REVIEW'})
+
+        # Invitations wait for the background step, rendered once per article
+        self.assertFalse(OutgoingEmail.objects.exists())
+        renders = render_timings['review_invitation'][0]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(send_review_invitations(), 5)
+        self.assertEqual(render_timings['review_invitation'][0], renders + 3)
+        message = OutgoingEmail.objects.get(recipient='reviewer0@unijos.edu.ng', subject='Review Invitation: Article 1')
+        self.assertIn('Dear Reviewer0', message.html_content)
+        self.assertIn(f'http://localhost:8000/english/review/{review.pk}/submit/', message.html_content)
+        self.assertEqual(send_review_invitations(), 0)
+
+    def test_overlapping_invitation_runs_invite_once(self):
+        assign_reviewers([(self.articles[1], self.reviewers[0]), (self.articles[1], self.reviewers[1])])
+        taken = Review.objects.get(article=self.articles[1], reviewer=self.reviewers[0])
+        real_uuid4 = assignments.uuid.uuid4
+
+        def claimed_meanwhile():
+            # Another run unflags one of the reviews this run has just read
+            Review.objects.filter(pk=taken.pk).update(invitation_pending=False, invitation_claim=real_uuid4())
+            return real_uuid4()
+
+        with mock.patch('journal_app.assignments.uuid') as uuid_module:
+            uuid_module.uuid4.side_effect = claimed_meanwhile
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(send_review_invitations(), 1)
+        self.assertEqual(list(OutgoingEmail.objects.values_list('recipient', flat=True)), ['reviewer1@unijos.edu.ng'])
+
+    def test_only_waiting_articles_start_review(self):
+        Article.objects.filter(pk=self.articles[1].pk).update(status='REJECTED')
+        DepartmentFacet.reconcile(self.department.pk)
+        # The instance still says SUBMITTED, as it did when it was read
+        assign_reviewers([(self.articles[1], self.reviewers[0]), (self.articles[2], self.reviewers[0])])
+        self.assertEqual(Article.objects.get(pk=self.articles[1].pk).status, 'REJECTED')
+        incremental = DepartmentFacet.counts(self.department)[DepartmentFacet.STATUS]
+        DepartmentFacet.reconcile(self.department.pk)
+        self.assertEqual(DepartmentFacet.counts(self.department)[DepartmentFacet.STATUS], incremental)
+
+    def test_pairs_assigned_concurrently_are_skipped(self):
+        real_limits = assignments.department_limits
+
+        def assigned_meanwhile(department_ids):
+            # Another request commits the same pair after this one read the existing reviews
+            Review.objects.create(article=self.articles[1], reviewer=self.reviewers[0], due_date=timezone.now())
+            return real_limits(department_ids)
+
+        with mock.patch('journal_app.assignments.department_limits', side_effect=assigned_meanwhile):
+            result = assign_reviewers([(self.articles[1], self.reviewers[0]), (self.articles[1], self.reviewers[1])])
+        self.assertEqual([(r.article, r.reviewer) for r in result.created], [(self.articles[1], self.reviewers[1])])
+        self.assertEqual(result.skipped, [(self.articles[1], self.reviewers[0], 'already assigned')])
+        self.assertEqual(Review.objects.filter(article=self.articles[1]).count(), 2)
+
+    def test_bulk_api(self):
+        self.client.login(email='editor@unijos.edu.ng', password='editorpass123')
+        response = self.client.post(
+            reverse('journal_app:api_review_assign', args=['english']),
+            json.dumps({'assignments': {str(self.articles[1].pk): [self.reviewers[0].pk, 9999]},
+                        'due_date': '2030-01-31T12:00:00', 'message': 'For the special issue'}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual(response.json()['skipped'], [{'article': self.articles[1].pk, 'reviewer': 9999, 'reason': 'not found'}])
+        review = Review.objects.get(article=self.articles[1])
+        self.assertEqual((review.due_date.year, review.invitation_message), (2030, 'For the special issue'))
+
+
+class DepartmentCacheTest(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(
+            name='ENGLISH',
+            slug='english',
+            description='Department of English',
+            established_date=timezone.now().date(),
+            email='english@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of English'
+        )
+        self.dept_settings = DepartmentSettings.objects.create(
+            department=self.department,
+            submission_guidelines='-',
+            review_guidelines='-',
+            publication_frequency='Quarterly',
+            peer_review_type='DOUBLE_BLIND',
+            contact_email='english@unijos.edu.ng',
+            review_deadline_days=21
+        )
+
+    def test_reads_are_cached_until_a_change(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_department_or_404('english').settings.review_deadline_days, 21)
+        with self.assertNumQueries(0):
+            department = get_department_or_404('english')
+            self.assertEqual(department.settings.review_deadline_days, 21)
+            self.assertEqual(get_department_settings(self.department.pk).review_deadline_days, 21)
+            self.assertEqual(get_department_settings(self.department.pk).review_deadline_days, 21)
+
+        # Callers get copies
+        department.website_title = 'Changed'
+        self.assertEqual(get_department_or_404('english').website_title, 'Department of English')
+
+        self.dept_settings.review_deadline_days = 14
+        self.dept_settings.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_department_or_404('english').settings.review_deadline_days, 14)
+
+    def test_departments_without_settings_use_the_defaults(self):
+        self.dept_settings.delete()
+        self.assertIsNone(get_department_settings(self.department.pk))
+        author = get_user_model().objects.create_user(email='author@unijos.edu.ng', password='pass12345')
+        journal = Journal.objects.create(department=self.department, title='Journal', slug='jes', description='-')
+        article = Article.objects.create(
+            department=self.department, journal=journal, title='Test Article', slug='test-article',
+            abstract='-', keywords='test', author=author, content='-'
+        )
+        article.generate_doi()
+        review = Review.objects.create(article=article, reviewer=author)
+        self.assertEqual((review.due_date - timezone.now()).days, 29)
+
+    def rename(self, title, worker):
+        """Change the department as another worker would, without this process's signals"""
+        Department.objects.filter(pk=self.department.pk).update(website_title=title)
+        worker.invalidate()
+
+    def test_workers_sharing_a_cache_see_changes_at_once(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        first, second = (DepartmentCache(FileBasedCache(directory, {})) for _ in range(2))
+        self.assertTrue(first.shared)
+
+        first.get(slug='english')
+        # The second worker's LRU is empty but the shared cache has the row
+        with self.assertNumQueries(0):
+            second.get(slug='english')
+        self.rename('Renamed', first)
+        self.assertEqual(second.get(slug='english').website_title, 'Renamed')
+
+    def test_workers_with_separate_caches_expire_entries(self):
+        first, second = DepartmentCache(LocMemCache('first', {})), DepartmentCache(LocMemCache('second', {}))
+        self.assertFalse(first.shared)
+
+        second.get(slug='english')
+        self.rename('Renamed', first)
+        # The second worker cannot hear of it, so it keeps its copy for a while only
+        self.assertEqual(second.get(slug='english').website_title, 'Department of English')
+        later = time.monotonic() + settings.DEPARTMENT_LOCAL_CACHE_TIMEOUT + 1
+        with mock.patch('journal_app.departments.time.monotonic', return_value=later):
+            self.assertEqual(second.get(slug='english').website_title, 'Renamed')
+
+    def test_unknown_slugs_are_cached(self):
+        with self.assertRaises(Http404):
+            get_department_or_404('history')
+        with self.assertNumQueries(0), self.assertRaises(Http404):
+            get_department_or_404('history')
+        self.assertIsNone(get_department(slug='history'))
+
+
+class PermissionsTest(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(
+            name='ENGLISH',
+            slug='english',
+            description='Department of English',
+            established_date=timezone.now().date(),
+            email='english@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of English'
+        )
+        self.other_department = Department.objects.create(
+            name='HISTORY',
+            slug='history',
+            description='Department of History',
+            established_date=timezone.now().date(),
+            email='history@unijos.edu.ng',
+            address='University of Jos',
+            website_title='Department of History'
+        )
+        journal = Journal.objects.create(
+            department=self.department, title='Journal of English Studies', slug='jes', description='Test journal'
+        )
+        self.users = {}
+        for role in ('AUTHOR', 'REVIEWER', 'EDITOR', 'ADMIN'):
+            user = get_user_model().objects.create_user(email=f'{role.lower()}@unijos.edu.ng', password='pass12345')
+            profile = Profile.objects.create(user=user, role=role, institution='University of Jos')
+            profile.departments.add(self.department)
+            self.users[role] = user
+        self.article = Article.objects.create(
+            department=self.department,
+            journal=journal,
+            title='Test Article',
+            slug='test-article',
+            abstract='Test Abstract',
+            keywords='test',
+            author=self.users['AUTHOR'],
+            content='Test Content',
+            status='SUBMITTED'
+        )
+
+    def permissions(self, role):
+        return Permissions(ProfileBackend().get_user(self.users[role].pk))
+
+    def test_roles_and_memberships_loaded_with_the_user(self):
+        # The user with their profile, then the prefetched memberships
+        with self.assertNumQueries(2):
+            permissions = self.permissions('EDITOR')
+        with self.assertNumQueries(0):
+            self.assertTrue(permissions.is_editor())
+            self.assertTrue(permissions.can_edit(self.article))
+            self.assertFalse(permissions.is_admin())
+            self.assertFalse(permissions.is_reviewer())
+            self.assertTrue(permissions.is_editor(self.department))
+            self.assertFalse(permissions.is_editor(self.other_department))
+        self.assertTrue(self.permissions('ADMIN').is_editor(self.other_department))
+
+    def test_article_access(self):
+        author, reviewer = self.permissions('AUTHOR'), self.permissions('REVIEWER')
+        self.assertTrue(author.can_edit(self.article))
+        self.assertFalse(author.is_editor())
+        self.assertFalse(reviewer.can_edit(self.article))
+        self.assertFalse(reviewer.can_view(self.article))
+
+        anonymous = Permissions(AnonymousUser())
+        self.assertIsNone(anonymous.role)
+        self.assertFalse(anonymous.can_view(self.article))
+        self.article.status = 'PUBLISHED'
+        self.assertTrue(anonymous.can_view(self.article))
+
+        # Accounts without a profile have no role rather than an error
+        superuser = get_user_model().objects.create_superuser(email='root@unijos.edu.ng', password='pass12345')
+        self.assertFalse(Permissions(ProfileBackend().get_user(superuser.pk)).is_editor())
+
+    def test_editors_act_only_in_their_departments(self):
+        journal = Journal.objects.create(
+            department=self.other_department, title='Journal of History', slug='joh', description='Test journal'
+        )
+        article = Article.objects.create(
+            department=self.other_department,
+            journal=journal,
+            title='Other Article',
+            slug='other-article',
+            abstract='Test Abstract',
+            keywords='test',
+            author=self.users['AUTHOR'],
+            content='Test Content',
+            status='SUBMITTED'
+        )
+        editor = self.permissions('EDITOR')
+        self.assertFalse(editor.can_edit(article))
+        self.assertFalse(editor.can_view(article))
+        self.assertTrue(self.permissions('ADMIN').can_edit(article))
+
+        self.client.login(email='editor@unijos.edu.ng', password='pass12345')
+        for name, kwargs in [
+            ('article_edit', {'article_id': article.pk}),
+            ('article_detail', {'article_id': article.pk}),
+            ('bulk_article_management', {}),
+            ('review_statistics', {}),
+            ('usage_report', {}),
+            ('api_department_statistics', {}),
+        ]:
+            with self.subTest(route=name):
+                url = reverse(f'journal_app:{name}', kwargs={'dept_slug': 'history', **kwargs})
+                # Denied, or sent elsewhere with a message
+                self.assertIn(self.client.get(url).status_code, (302, 403, 404))
+        response = self.client.post(
+            reverse('journal_app:bulk_article_management', args=['history']),
+            {'articles': [article.pk], 'action': 'PUBLISH'}
+        )
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(reverse('journal_app:review_assign', args=['history', article.pk]))
+        self.assertRedirects(response, reverse('journal_app:article_detail', args=['history', article.pk]),
+                             fetch_redirect_response=False)
+        article.refresh_from_db()
+        self.assertEqual(article.status, 'SUBMITTED')
+
+    def test_requests_load_the_profile_with_the_user(self):
+        self.client.login(email='editor@unijos.edu.ng', password='pass12345')
+        url = reverse('journal_app:department_dashboard', args=[self.department.slug])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertFalse([query for query in queries if query['sql'].startswith('SELECT "journal_app_profile"')])
@@ -0,0 +1,149 @@
+# uploads.py
+
+import fcntl
+import hashlib
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from .models import Upload
+
+CHUNK_SIZE = 64 * 1024
+_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+# tus checksum extension: the data does not match the announced checksum
+CHECKSUM_MISMATCH = 460
+
+
+class UploadError(Exception):
+    """A request the upload cannot accept; `status` is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class PartialFile(File):
+    """A finished partial file; storage moves it into place instead of copying it"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def start_upload(user, filename, size, checksum=''):
+    """Create an Upload and its empty partial file"""
+    filename = os.path.basename(filename or '').strip()
+    if not filename:
+        raise UploadError("A file name is required")
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError("The upload length must be a number of bytes")
+    if size <= 0:
+        raise UploadError("The upload length must be positive")
+    if size > settings.RESUMABLE_UPLOAD_MAX_SIZE:
+        raise UploadError("The file is too large", status=413)
+    checksum = (checksum or '').lower()
+    if checksum and not _SHA256.match(checksum):
+        raise UploadError("The checksum must be a hex SHA-256 digest")
+
+    os.makedirs(settings.UPLOAD_TEMP_DIR, exist_ok=True)
+    upload = Upload(owner=user, filename=filename[:255], size=size, checksum=checksum)
+    open(upload.partial_path, 'xb').close()
+    upload.save()
+    return upload
+
+
+def write_chunk(upload, offset, stream, length):
+    """Append `length` bytes read from `stream` at `offset`, returning the new offset
+
+    The offset must be where the upload currently ends, so a client that
+    lost a response asks for the offset again instead of writing twice.
+    Bytes are copied straight to the partial file in CHUNK_SIZE pieces; if
+    the body is cut short, what arrived is kept and the offset says so.
+    The last chunk completes the upload.
+
+    The partial file is locked exclusively from before the offset is
+    checked until the new one is stored, so of two concurrent requests
+    the second is refused without touching the file.
+    """
+    if upload.is_complete:
+        raise UploadError("The upload is already complete", status=409)
+    if length < 0 or offset + length > upload.size:
+        raise UploadError("The chunk goes past the end of the upload", status=413)
+
+    written = 0
+    with open(upload.partial_path, 'r+b') as f:
+        try:
+            # Released when the file is closed
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadError("Another request is writing to the upload", status=409)
+        # Only read under the lock is the stored offset where the file really ends
+        upload.offset = Upload.objects.values_list('offset', flat=True).get(pk=upload.pk)
+        if offset != upload.offset:
+            raise UploadError(f"The upload is at offset {upload.offset}", status=409)
+
+        f.seek(offset)
+        while written < length:
+            data = stream.read(min(CHUNK_SIZE, length - written))
+            if not data:
+                break
+            f.write(data)
+            written += len(data)
+        f.truncate()
+        f.flush()
+        Upload.objects.filter(pk=upload.pk).update(offset=offset + written)
+    upload.offset = offset + written
+    if upload.offset == upload.size:
+        finish_upload(upload)
+    return upload.offset
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for data in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def finish_upload(upload):
+    """Verify a fully received upload; a mismatch discards it so the client starts over"""
+    checksum = file_checksum(upload.partial_path)
+    if upload.checksum and checksum != upload.checksum:
+        discard_upload(upload)
+        raise UploadError("The file does not match its checksum", status=CHECKSUM_MISMATCH)
+    upload.checksum = checksum
+    upload.completed_at = timezone.now()
+    upload.save(update_fields=['checksum', 'completed_at'])
+
+
+def discard_upload(upload):
+    try:
+        os.remove(upload.partial_path)
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def attach_upload(upload, field_file):
+    """Move a completed upload into a model's file field (unsaved) and forget the upload"""
+    with open(upload.partial_path, 'rb') as f:
+        field_file.save(upload.filename, PartialFile(f), save=False)
+    upload.delete()
+
+
+def expire_uploads(hours=None):
+    """Discard uploads started more than `hours` ago that were never attached; returns how many"""
+    if hours is None:
+        hours = settings.UPLOAD_EXPIRY_HOURS
+    expired = Upload.objects.filter(created_at__lt=timezone.now() - timedelta(hours=hours))
+    count = 0
+    for upload in expired.iterator():
+        discard_upload(upload)
+        count += 1
+    return count
@@ -25,18 +25,32 @@ urlpatterns = [
     # Journal
     path('journals/', views.journal_list, name='journal_list'),
     path('journals/<slug:slug>/', views.journal_detail, name='journal_detail'),
+    path('journals/<slug:slug>/api/articles/', views.journal_articles_api, name='api_journal_articles'),
+    
+    # Search
+    path('search/', views.article_search, name='article_search'),
+    
+    # Resumable uploads
+    path('uploads/', views.upload_create, name='upload_create'),
+    path('uploads/<uuid:upload_id>/', views.upload_detail, name='upload_detail'),
     
     # Department URLs
     path('departments/', views.department_list, name='department_list'),
     path('<slug:dept_slug>/', views.department_detail, name='department_detail'),
     path('<slug:dept_slug>/manage/', views.department_manage, name='department_manage'),
     path('<slug:dept_slug>/dashboard/', views.department_dashboard, name='department_dashboard'),
+    path('<slug:dept_slug>/api/statistics/', views.department_statistics_api, name='api_department_statistics'),
+    path('<slug:dept_slug>/api/facets/', views.department_facets_api, name='api_department_facets'),
+    path('<slug:dept_slug>/reports/usage/', views.usage_report, name='usage_report'),
     path('<slug:dept_slug>/article/department_analytics', views.department_analytics, name='department_analytics'),
 
     # Article URLs
     path('<slug:dept_slug>/submit/', views.article_submit, name='article_submit'),
     path('<slug:dept_slug>/article/<int:article_id>/', views.article_detail, name='article_detail'),
     path('<slug:dept_slug>/article/<int:article_id>/edit/', views.article_edit, name='article_edit'),
+    path('<slug:dept_slug>/article/<int:article_id>/download/', views.article_download, name='article_download'),
+    path('<slug:dept_slug>/article/<int:article_id>/files/<int:file_id>/download/',
+         views.article_file_download, name='article_file_download'),
     path('<slug:dept_slug>/article/bulk_article_management', views.bulk_article_management, name='bulk_article_management'),
     
 
@@ -47,6 +61,7 @@ urlpatterns = [
     # Review URLs
     path('<slug:dept_slug>/article/<int:article_id>/assign-reviewers/', 
          views.review_assign, name='review_assign'),
+    path('<slug:dept_slug>/api/reviews/assign/', views.review_assign_bulk, name='api_review_assign'),
     path('<slug:dept_slug>/review/<int:review_id>/submit/', 
          views.review_submit, name='review_submit'),
     path('<slug:dept_slug>/reviews/statistics/', 
@@ -0,0 +1,207 @@
+# usage.py
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+from .models import Article, ArticleDailyUsage, SiteStatistics, UsageAggregation, UsageEvent
+
+logger = logging.getLogger(__name__)
+
+# COUNTER: the same action by the same client within this window is one click
+DOUBLE_CLICK_WINDOW = timedelta(seconds=30)
+
+
+def client_hash(request):
+    """Stable pseudonymous id for the client: a keyed hash of its address and user agent"""
+    address = request.META.get('REMOTE_ADDR', '')
+    agent = request.META.get('HTTP_USER_AGENT', '')
+    return salted_hmac('journal_app.usage', f'{address}|{agent}').hexdigest()[:32]
+
+
+class UsageBuffer:
+    """Per-process buffer of usage events, written to UsageEvent in one INSERT per batch
+
+    Views only append to a list. The buffer is flushed once the request
+    has finished, when it holds USAGE_BUFFER_SIZE events or its oldest
+    event is USAGE_BUFFER_SECONDS old, and when the process exits.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = []
+        self.oldest = None
+
+    def add(self, article_id, kind, client, timestamp=None):
+        with self.lock:
+            if not self.events:
+                self.oldest = time.monotonic()
+            self.events.append(UsageEvent(
+                article_id=article_id,
+                kind=kind,
+                client=client,
+                timestamp=timestamp or timezone.now()
+            ))
+
+    def is_due(self):
+        # Under the lock, so a concurrent take() cannot empty the buffer between the checks
+        with self.lock:
+            return bool(self.events) and (
+                len(self.events) >= getattr(settings, 'USAGE_BUFFER_SIZE', 200) or
+                time.monotonic() - self.oldest >= getattr(settings, 'USAGE_BUFFER_SECONDS', 10)
+            )
+
+    def take(self):
+        with self.lock:
+            events, self.events, self.oldest = self.events, [], None
+        return events
+
+    def flush(self):
+        """Write every buffered event, returning how many were written"""
+        events = self.take()
+        if events:
+            try:
+                UsageEvent.objects.bulk_create(events)
+            except Exception:
+                # Usage counts are best effort; never fail a request over them
+                logger.exception("Dropped %d usage events", len(events))
+                return 0
+        return len(events)
+
+    def flush_if_due(self, **kwargs):
+        if self.is_due():
+            self.flush()
+
+
+usage_buffer = UsageBuffer()
+request_finished.connect(usage_buffer.flush_if_due, dispatch_uid='usage_buffer_flush')
+atexit.register(usage_buffer.flush)
+
+
+def record_usage(request, article, kind):
+    """Note a view or download of an article; the write happens later, in a batch"""
+    usage_buffer.add(article.pk, kind, client_hash(request))
+
+
+def aggregate_usage(batch_size=10000):
+    """Fold new usage events into ArticleDailyUsage and Article.download_count
+
+    Events after the UsageAggregation high-water mark are counted in
+    batches; each batch updates the counters with bulk_update/bulk_create
+    and moves the mark in one transaction. Returns the number of events
+    folded in.
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            state, _ = UsageAggregation.objects.select_for_update().get_or_create(
+                pk=UsageAggregation.SINGLETON_ID
+            )
+            events = list(UsageEvent.objects.filter(
+                pk__gt=state.last_event_id
+            ).order_by('pk').values_list('pk', 'article_id', 'kind', 'timestamp', 'client')[:batch_size])
+            if not events:
+                return total
+
+            # Already folded events from the same days decide double-clicks and unique clients
+            since = min(
+                timezone.localtime(timestamp).replace(hour=0, minute=0, second=0, microsecond=0)
+                for _, _, _, timestamp, _ in events
+            ) - DOUBLE_CLICK_WINDOW
+            earlier = UsageEvent.objects.filter(
+                pk__lte=state.last_event_id,
+                article_id__in={article_id for _, article_id, _, _, _ in events},
+                timestamp__gte=since
+            ).order_by('timestamp').values_list('article_id', 'kind', 'timestamp', 'client')
+            daily = count_usage(earlier, [event[1:] for event in events])
+
+            articles = Article.objects.only('download_count').in_bulk({article_id for article_id, _ in daily})
+            fold_daily_usage(daily, articles)
+
+            downloads = Counter()
+            for (article_id, _), counts in daily.items():
+                if article_id in articles and counts['downloads']:
+                    downloads[article_id] += counts['downloads']
+            for article_id, count in downloads.items():
+                articles[article_id].download_count += count
+            Article.objects.bulk_update([articles[pk] for pk in downloads], ['download_count'])
+            # bulk_update skips the signals that keep the site total current
+            SiteStatistics.apply_deltas({'total_downloads': sum(downloads.values())})
+
+            state.last_event_id = events[-1][0]
+            state.save()
+            total += len(events)
+
+
+def count_usage(earlier, events):
+    """COUNTER-style counts per (article_id, date) for new events
+
+    Both arguments are (article_id, kind, timestamp, client) tuples;
+    `earlier` were counted before and only provide context. A repeat of
+    the same action by the same client within DOUBLE_CLICK_WINDOW is not
+    counted, and each client counts once per article and day towards the
+    unique investigations (any action) and unique requests (downloads).
+    """
+    last_click, seen = {}, set()
+
+    def unique(article_id, date, client, metric):
+        if (article_id, date, client, metric) in seen:
+            return 0
+        seen.add((article_id, date, client, metric))
+        return 1
+
+    for article_id, kind, timestamp, client in earlier:
+        last_click[article_id, kind, client] = timestamp
+        date = timezone.localtime(timestamp).date()
+        unique(article_id, date, client, 'investigation')
+        if kind == UsageEvent.DOWNLOAD:
+            unique(article_id, date, client, 'request')
+
+    daily = defaultdict(Counter)
+    for article_id, kind, timestamp, client in sorted(events, key=lambda event: event[2]):
+        previous = last_click.get((article_id, kind, client))
+        last_click[article_id, kind, client] = timestamp
+        if previous is not None and timestamp - previous <= DOUBLE_CLICK_WINDOW:
+            continue
+        date = timezone.localtime(timestamp).date()
+        counts = daily[article_id, date]
+        counts['unique_investigations'] += unique(article_id, date, client, 'investigation')
+        if kind == UsageEvent.DOWNLOAD:
+            counts['downloads'] += 1
+            counts['unique_requests'] += unique(article_id, date, client, 'request')
+        else:
+            counts['views'] += 1
+    return daily
+
+
+def fold_daily_usage(daily, articles):
+    """Add {(article_id, date): Counter of column increments} to the per-day rows of existing articles"""
+    daily = {key: counts for key, counts in daily.items() if key[0] in articles}
+    if not daily:
+        return
+    existing = {
+        (row.article_id, row.date): row
+        for row in ArticleDailyUsage.objects.filter(
+            article_id__in={article_id for article_id, _ in daily},
+            date__in={date for _, date in daily}
+        )
+    }
+    created = []
+    for (article_id, date), counts in daily.items():
+        row = existing.get((article_id, date))
+        if row is None:
+            row = ArticleDailyUsage(article_id=article_id, date=date)
+            created.append(row)
+        for field, count in counts.items():
+            setattr(row, field, getattr(row, field) + count)
+    ArticleDailyUsage.objects.bulk_update(existing.values(), ArticleDailyUsage.COUNTER_COLUMNS)
+    ArticleDailyUsage.objects.bulk_create(created)
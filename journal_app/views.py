@@ -2,27 +2,40 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.http import JsonResponse, Http404, HttpResponse
+from django.http import (JsonResponse, Http404, HttpResponse, HttpResponseBadRequest,
+                         StreamingHttpResponse)
 from django.core.exceptions import PermissionDenied
 import csv
+import json
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from datetime import datetime, timedelta
 from django.urls import reverse
-from django.db.models import Q, Count, Sum
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
+from django.db.models import Avg, Count, F, Q
+from django.db import transaction
 from django.conf import settings
 from django.contrib.auth import login, logout, authenticate
 from django.views.decorators.http import require_http_methods
 
 from .notifications import NotificationManager
+from .dashboard import DepartmentDashboard
+from .search import get_search_backend
+from .pagination import KeysetPaginator
+from .downloads import serve_file
+from .usage import record_usage
+from .emails import RenderedEmail
+from .outbox import enqueue_batch
+from .assignments import assign_reviewers
+from .departments import get_department_or_404
+from .uploads import UploadError, attach_upload, discard_upload, start_upload, write_chunk
+from .reports import FORMATS, UsageReport, add_months, parse_month, stream_report
 from .models import (Department, DepartmentSettings, Profile, Journal, Article,
-                    ArticleFile, Review, ReviewAttachment, EmailLog, AuditLog, Event, CustomUser, ResearchArea)
+                    ArticleFile, Review, ReviewAttachment, EmailLog, AuditLog, Event, CustomUser, ResearchArea,
+                    SiteStatistics, DepartmentStatistics, DepartmentFacet, UsageEvent, Upload)
 from .forms import (DepartmentForm, DepartmentSettingsForm, UserRegistrationForm,
                    ProfileForm, JournalForm, ArticleSubmissionForm, ArticleFileForm,
                    ReviewForm, ReviewAssignmentForm, ReviewResponseForm,
-                   BulkArticleActionForm)
+                   BulkArticleActionForm, ArticleSearchForm)
 
 
 
@@ -105,10 +118,7 @@ def home(request):
     departments = Department.objects.filter(is_active=True)[:3]
     
     # Get stats
-    journals_count = Journal.objects.filter(is_active=True).count()
-    articles_count = Article.objects.filter(status='PUBLISHED').count()
-    authors_count = Profile.objects.filter(role='AUTHOR').count()
-    reviews_count = Review.objects.filter(is_complete=True).count()
+    stats = SiteStatistics.get_current()
     
     # Get recent articles
     recent_articles = Article.objects.filter(
@@ -117,10 +127,10 @@ def home(request):
     
     context = {
         'departments': departments,
-        'journals_count': journals_count,
-        'articles_count': articles_count,
-        'authors_count': authors_count,
-        'reviews_count': reviews_count,
+        'journals_count': stats.journals_count,
+        'articles_count': stats.published_articles_count,
+        'authors_count': stats.authors_count,
+        'reviews_count': stats.reviews_count,
         'recent_articles': recent_articles,
     }
     
@@ -130,13 +140,14 @@ def home(request):
 # Department Views
 
 def department_home(request):
+    stats = SiteStatistics.get_current()
     context = {
         'departments': Department.objects.filter(is_active=True),
-        'recent_journals': Journal.objects.all().order_by('-created_at')[:6],
-        'total_articles': Article.objects.count(),
-        'total_authors': Profile.objects.filter(role='AUTHOR').count(),
-        'total_citations': Article.objects.aggregate(Sum('citation_count'))['citation_count__sum'] or 0,
-        'total_downloads': Article.objects.aggregate(Sum('download_count'))['download_count__sum'] or 0,
+        'recent_journals': Journal.objects.with_listing_data().order_by('-created_at')[:6],
+        'total_articles': stats.articles_count,
+        'total_authors': stats.authors_count,
+        'total_citations': stats.total_citations,
+        'total_downloads': stats.total_downloads,
     }
     return render(request, 'journal_app/department_home.html', context)
 
@@ -167,22 +178,26 @@ def department_list(request):
 #     return render(request, 'journal_app/department_detail.html', context)
 
 def department_detail(request, dept_slug):
-    department = get_object_or_404(Department, slug=dept_slug)
+    department = get_object_or_404(
+        Department.objects.select_related('head_of_dept__profile'),
+        slug=dept_slug
+    )
+    
+    # Department statistics are maintained on write
+    stats = DepartmentStatistics.get_for_department(department)
     
-    # Calculate department statistics
-    total_articles = Article.objects.filter(journal__department=department).count()
-    total_authors = CustomUser.objects.filter(authored_articles__journal__department=department).distinct().count()
-    total_citations = Article.objects.filter(journal__department=department).aggregate(
-        total_citations=Sum('citation_count')
-    )['total_citations'] or 0
+    # Get journals
+    journals = department.journals.select_related('editor_in_chief')
     
     # Get recent articles
     recent_articles = Article.objects.filter(
-        journal__department=department
+        department=department
+    ).select_related('journal', 'author').prefetch_related(
+        'co_authors'
     ).order_by('-publication_date')[:4]
     
     # Get faculty members
-    faculty_members = department.faculty_members.all()
+    faculty_members = department.faculty_members.select_related('profile')
     
     # Get upcoming events
     upcoming_events = Event.objects.filter(
@@ -195,9 +210,11 @@ def department_detail(request, dept_slug):
     
     context = {
         'department': department,
-        'total_articles': total_articles,
-        'total_authors': total_authors,
-        'total_citations': total_citations,
+        'journals': journals,
+        'journals_count': stats.journals_count,
+        'total_articles': stats.articles_count,
+        'total_authors': stats.authors_count,
+        'total_citations': stats.total_citations,
         'recent_articles': recent_articles,
         'faculty_members': faculty_members,
         'upcoming_events': upcoming_events,
@@ -208,11 +225,11 @@ def department_detail(request, dept_slug):
 @login_required
 def department_manage(request, dept_slug):
     """Manage department settings"""
-    if not request.user.profile.role in ['DEPT_ADMIN', 'ADMIN']:
+    department = get_department_or_404(dept_slug)
+    if not request.permissions.is_admin(department):
         messages.error(request, "You don't have permission to manage department settings.")
-        return redirect('department_detail', dept_slug=dept_slug)
+        return redirect('journal_app:department_detail', dept_slug=dept_slug)
     
-    department = get_object_or_404(Department, slug=dept_slug)
     if request.method == 'POST':
         form = DepartmentForm(request.POST, request.FILES, instance=department)
         settings_form = DepartmentSettingsForm(
@@ -223,7 +240,7 @@ def department_manage(request, dept_slug):
             form.save()
             settings_form.save()
             messages.success(request, "Department settings updated successfully.")
-            return redirect('department_detail', dept_slug=dept_slug)
+            return redirect('journal_app:department_detail', dept_slug=dept_slug)
     else:
         form = DepartmentForm(instance=department)
         settings_form = DepartmentSettingsForm(instance=department.settings)
@@ -247,7 +264,7 @@ def department_manage(request, dept_slug):
 #     })
 
 def journal_list(request):
-    journals = Journal.objects.all().order_by('-created_at')
+    journals = Journal.objects.with_listing_data().order_by('-created_at')
     departments = Department.objects.filter(is_active=True)
     
     context = {
@@ -257,31 +274,79 @@ def journal_list(request):
     return render(request, 'journal_app/journal_list.html', context)
 
 
+def article_search(request):
+    """Full-text search over articles, or browsing by keyword"""
+    form = ArticleSearchForm(request.GET or None)
+    results = None
+    
+    if form.is_valid() and (form.cleaned_data['q'] or form.cleaned_data['keyword']):
+        filters = form.get_filters()
+        # Only editors of the department searched may search unpublished work; across departments, only admins
+        department = form.cleaned_data.get('department')
+        if not (request.permissions.is_editor(department) if department else request.permissions.role == 'ADMIN'):
+            filters['status'] = 'PUBLISHED'
+        
+        try:
+            page = int(request.GET.get('page', 1))
+        except ValueError:
+            page = 1
+        results = get_search_backend().search(form.cleaned_data['q'], filters, page=page)
+    
+    query_string = request.GET.copy()
+    query_string.pop('page', None)
+    
+    return render(request, 'journal_app/article_search.html', {
+        'form': form,
+        'results': results,
+        'query_string': query_string.urlencode()
+    })
+
+
 @login_required
-def journal_detail(request, dept_slug, journal_slug):
+def journal_detail(request, slug):
     """View journal details"""
-    department = get_object_or_404(Department, slug=dept_slug)
-    journal = get_object_or_404(Journal, department=department, slug=journal_slug)
-    articles = Article.objects.filter(
-        journal=journal,
-        status='PUBLISHED'
-    ).order_by('-publication_date')
-    
-    paginator = Paginator(articles, 10)
-    page = request.GET.get('page')
-    articles = paginator.get_page(page)
+    journal = get_object_or_404(Journal.objects.select_related('department'), slug=slug)
+    articles = KeysetPaginator(published_journal_articles(journal), 10).get_page(request.GET.get('cursor'))
     
     return render(request, 'journal_app/journal_detail.html', {
-        'department': department,
+        'department': journal.department,
         'journal': journal,
         'articles': articles
     })
 
+def journal_articles_api(request, slug):
+    """API endpoint listing a journal's published articles, newest first, by cursor"""
+    journal = get_object_or_404(Journal.objects.select_related('department'), slug=slug)
+    try:
+        page = KeysetPaginator(published_journal_articles(journal), 20).page(request.GET.get('cursor'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    return JsonResponse({
+        'results': [{
+            'id': article.id,
+            'title': article.title,
+            'publication_date': article.publication_date.isoformat(),
+            'doi': article.doi,
+            'url': reverse('journal_app:article_detail', args=[journal.department.slug, article.id]),
+        } for article in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+def published_journal_articles(journal):
+    """Published articles of a journal in the order of the listing index"""
+    return Article.objects.filter(
+        journal=journal,
+        status='PUBLISHED',
+        publication_date__isnull=False
+    ).order_by('-publication_date', '-id')
+
 # Article Views
 @login_required
 def article_submit(request, dept_slug, journal_slug=None):
     """Submit new article"""
-    department = get_object_or_404(Department, slug=dept_slug)
+    department = get_department_or_404(dept_slug)
     journal = None if not journal_slug else get_object_or_404(
         Journal,
         department=department,
@@ -292,7 +357,8 @@ def article_submit(request, dept_slug, journal_slug=None):
         form = ArticleSubmissionForm(
             request.POST,
             request.FILES,
-            department=department
+            department=department,
+            user=request.user
         )
         if form.is_valid():
             article = form.save(commit=False)
@@ -318,9 +384,10 @@ def article_submit(request, dept_slug, journal_slug=None):
                         file_type='SUPPLEMENT',
                         uploaded_by=request.user
                     )
+            attach_supplementary_uploads(form, article, request.user)
             
             messages.success(request, "Article submitted successfully.")
-            return redirect('article_detail', dept_slug=dept_slug, article_id=article.id)
+            return redirect('journal_app:article_detail', dept_slug=dept_slug, article_id=article.id)
     else:
         form = ArticleSubmissionForm(department=department)
     
@@ -330,21 +397,28 @@ def article_submit(request, dept_slug, journal_slug=None):
         'form': form
     })
 
+def attach_supplementary_uploads(form, article, user):
+    """Add the form's finished resumable uploads to the article as supplementary files"""
+    for upload in form.cleaned_data.get('supplementary_uploads') or []:
+        article_file = ArticleFile(article=article, file_type='SUPPLEMENT', uploaded_by=user)
+        attach_upload(upload, article_file.file)
+        article_file.save()
+
 @login_required
 def article_detail(request, dept_slug, article_id):
     """View article details"""
-    department = get_object_or_404(Department, slug=dept_slug)
+    department = get_department_or_404(dept_slug)
     article = get_object_or_404(Article, department=department, id=article_id)
     
     # Check permissions
-    if article.status != 'PUBLISHED':
-        if not (request.user == article.author or
-                request.user.profile.role in ['EDITOR', 'DEPT_ADMIN', 'ADMIN']):
-            raise Http404("Article not found")
+    if not request.permissions.can_view(article):
+        raise Http404("Article not found")
+    if article.status == 'PUBLISHED':
+        record_usage(request, article, UsageEvent.VIEW)
     
     reviews = None
-    if request.user.profile.role in ['EDITOR', 'DEPT_ADMIN', 'ADMIN']:
-        reviews = article.reviews.all()
+    if request.permissions.is_editor(department):
+        reviews = article.article_reviews.select_related('reviewer')
     
     return render(request, 'journal_app/article_detail.html', {
         'department': department,
@@ -352,29 +426,129 @@ def article_detail(request, dept_slug, article_id):
         'reviews': reviews
     })
 
+def article_download(request, dept_slug, article_id):
+    """Stream an article's manuscript, counting downloads of published articles"""
+    article = get_object_or_404(Article, department__slug=dept_slug, id=article_id)
+    if not request.permissions.can_view(article) or not article.manuscript_file:
+        raise Http404("Article not found")
+    
+    try:
+        response, full_body = serve_file(request, article.manuscript_file)
+    except OSError:
+        raise Http404("File not found")
+    
+    # Resumed transfers and cache revalidations are not new downloads
+    if full_body and article.status == 'PUBLISHED':
+        record_usage(request, article, UsageEvent.DOWNLOAD)
+    return response
+
+def article_file_download(request, dept_slug, article_id, file_id):
+    """Stream one of an article's supplementary files"""
+    article_file = get_object_or_404(
+        ArticleFile.objects.select_related('article'),
+        article__department__slug=dept_slug,
+        article_id=article_id,
+        id=file_id,
+        is_active=True
+    )
+    if not request.permissions.can_view(article_file.article):
+        raise Http404("File not found")
+    
+    try:
+        response, full_body = serve_file(request, article_file.file)
+    except OSError:
+        raise Http404("File not found")
+    
+    # Supplementary material counts as an investigation of the article, not a request
+    if full_body and article_file.article.status == 'PUBLISHED':
+        record_usage(request, article_file.article, UsageEvent.VIEW)
+    return response
+
+# Resumable uploads
+@login_required
+@require_http_methods(["POST"])
+def upload_create(request):
+    """Start a resumable upload from `filename`, `size` and an optional SHA-256 `checksum`"""
+    try:
+        upload = start_upload(
+            request.user,
+            request.POST.get('filename'),
+            request.POST.get('size'),
+            request.POST.get('checksum', '')
+        )
+    except UploadError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+    
+    response = upload_status(upload, status=201)
+    response['Location'] = reverse('journal_app:upload_detail', args=[upload.token])
+    return response
+
+@login_required
+@require_http_methods(["GET", "HEAD", "PATCH", "DELETE"])
+def upload_detail(request, upload_id):
+    """Report a resumable upload's offset, PATCH the next chunk at Upload-Offset, or DELETE it"""
+    upload = get_object_or_404(Upload, token=upload_id, owner=request.user)
+    
+    if request.method == 'DELETE':
+        discard_upload(upload)
+        return HttpResponse(status=204)
+    
+    if request.method == 'PATCH':
+        if request.content_type != 'application/offset+octet-stream':
+            return JsonResponse({'error': "Chunks must be sent as application/offset+octet-stream"}, status=415)
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except (KeyError, ValueError):
+            return JsonResponse({'error': "Upload-Offset and Content-Length headers are required"}, status=400)
+        try:
+            # The body is read from the request stream chunk by chunk, never held in memory
+            write_chunk(upload, offset, request, length)
+        except UploadError as e:
+            response = JsonResponse({'error': str(e)}, status=e.status)
+            response['Upload-Offset'] = upload.offset
+            return response
+    
+    return upload_status(upload)
+
+def upload_status(upload, status=200):
+    response = JsonResponse({
+        'token': str(upload.token),
+        'filename': upload.filename,
+        'size': upload.size,
+        'offset': upload.offset,
+        'complete': upload.is_complete,
+        'checksum': upload.checksum if upload.is_complete else None,
+    }, status=status)
+    response['Upload-Offset'] = upload.offset
+    response['Upload-Length'] = upload.size
+    response['Cache-Control'] = 'no-store'
+    return response
+
 @login_required
 def article_edit(request, dept_slug, article_id):
     """Edit article"""
-    department = get_object_or_404(Department, slug=dept_slug)
+    department = get_department_or_404(dept_slug)
     article = get_object_or_404(Article, department=department, id=article_id)
     
     # Check permissions
-    if not (request.user == article.author or
-            request.user.profile.role in ['EDITOR', 'DEPT_ADMIN', 'ADMIN']):
+    if not request.permissions.can_edit(article):
         messages.error(request, "You don't have permission to edit this article.")
-        return redirect('article_detail', dept_slug=dept_slug, article_id=article_id)
+        return redirect('journal_app:article_detail', dept_slug=dept_slug, article_id=article_id)
     
     if request.method == 'POST':
         form = ArticleSubmissionForm(
             request.POST,
             request.FILES,
             instance=article,
-            department=department
+            department=department,
+            user=request.user
         )
         if form.is_valid():
             article = form.save()
+            attach_supplementary_uploads(form, article, request.user)
             messages.success(request, "Article updated successfully.")
-            return redirect('article_detail', dept_slug=dept_slug, article_id=article.id)
+            return redirect('journal_app:article_detail', dept_slug=dept_slug, article_id=article.id)
     else:
         form = ArticleSubmissionForm(instance=article, department=department)
     
@@ -388,47 +562,28 @@ def article_edit(request, dept_slug, article_id):
 @login_required
 def review_assign(request, dept_slug, article_id):
     """Assign reviewers to article"""
-    department = get_object_or_404(Department, slug=dept_slug)
+    department = get_department_or_404(dept_slug)
     article = get_object_or_404(Article, department=department, id=article_id)
     
-    if not request.user.profile.role in ['EDITOR', 'DEPT_ADMIN', 'ADMIN']:
+    if not request.permissions.is_editor(department):
         messages.error(request, "You don't have permission to assign reviewers.")
-        return redirect('article_detail', dept_slug=dept_slug, article_id=article_id)
+        return redirect('journal_app:article_detail', dept_slug=dept_slug, article_id=article_id)
     
     if request.method == 'POST':
         form = ReviewAssignmentForm(request.POST, department=department)
         if form.is_valid():
-            reviewers = form.cleaned_data['reviewers']
-            due_date = form.cleaned_data['due_date']
-            message = form.cleaned_data['message_to_reviewers']
-            
-            for reviewer in reviewers:
-                review = Review.objects.create(
-                    article=article,
-                    reviewer=reviewer,
-                    due_date=due_date
-                )
-                
-                # Send email notification
-                context = {
-                    'reviewer_name': reviewer.get_full_name() or reviewer.username,
-                    'article_title': article.title,
-                    'due_date': due_date,
-                    'message': message,
-                    'review_url': request.build_absolute_uri(
-                        reverse('review_submit', args=[dept_slug, review.id])
-                    )
-                }
-                
-                send_review_notification(reviewer.email, context)
-                
-            article.status = 'UNDER_REVIEW'
-            article.save()
+            result = assign_reviewers(
+                [(article, reviewer) for reviewer in form.cleaned_data['reviewers']],
+                due_date=form.cleaned_data['due_date'],
+                message=form.cleaned_data['message_to_reviewers']
+            )
+            for _, reviewer, reason in result.skipped:
+                messages.warning(request, f"{reviewer.get_full_name() or reviewer.email} was not assigned: {reason}.")
             
-            messages.success(request, "Reviewers assigned successfully.")
-            return redirect('article_detail', dept_slug=dept_slug, article_id=article_id)
+            messages.success(request, f"Assigned {len(result.created)} reviewers; they will be emailed shortly.")
+            return redirect('journal_app:article_detail', dept_slug=dept_slug, article_id=article_id)
     else:
-        form = ReviewAssignmentForm(department=department)
+        form = ReviewAssignmentForm(department=department, article=article)
     
     return render(request, 'journal_app/review_assign.html', {
         'department': department,
@@ -436,28 +591,77 @@ def review_assign(request, dept_slug, article_id):
         'form': form
     })
 
+@login_required
+@require_http_methods(["POST"])
+def review_assign_bulk(request, dept_slug):
+    """Assign reviewers across many articles, e.g. a special issue, from a JSON body
+
+    {"assignments": {"<article id>": [<reviewer id>, ...]}, "due_date": ISO 8601 (optional),
+    "message": "..."}; responds with the number created and the pairs skipped, with why.
+    """
+    department = get_department_or_404(dept_slug)
+    if not request.permissions.is_editor(department):
+        raise PermissionDenied
+    
+    try:
+        data = json.loads(request.body)
+        matrix = {int(article_id): [int(pk) for pk in reviewer_ids]
+                  for article_id, reviewer_ids in data['assignments'].items()}
+        due_date = None
+        if data.get('due_date'):
+            due_date = parse_datetime(data['due_date'])
+            if due_date is None:
+                raise ValueError(data['due_date'])
+            if timezone.is_naive(due_date):
+                due_date = timezone.make_aware(due_date)
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return JsonResponse({'error': "Expected {\"assignments\": {article id: [reviewer ids]}}"}, status=400)
+    
+    articles = Article.objects.in_bulk(matrix, field_name='pk') if matrix else {}
+    articles = {pk: article for pk, article in articles.items() if article.department_id == department.pk}
+    reviewers = CustomUser.objects.filter(
+        profile__role='REVIEWER',
+        profile__departments=department,
+        pk__in={pk for reviewer_ids in matrix.values() for pk in reviewer_ids}
+    ).in_bulk()
+    
+    skipped = []
+    pairs = []
+    for article_id, reviewer_ids in matrix.items():
+        for reviewer_id in reviewer_ids:
+            if article_id not in articles or reviewer_id not in reviewers:
+                skipped.append({'article': article_id, 'reviewer': reviewer_id, 'reason': 'not found'})
+            else:
+                pairs.append((articles[article_id], reviewers[reviewer_id]))
+    
+    result = assign_reviewers(pairs, due_date=due_date, message=data.get('message', ''))
+    skipped += [{'article': article.pk, 'reviewer': reviewer.pk, 'reason': reason}
+                for article, reviewer, reason in result.skipped]
+    return JsonResponse({'created': len(result.created), 'skipped': skipped}, status=201 if result.created else 200)
+
 @login_required
 def review_submit(request, dept_slug, review_id):
     """Submit article review"""
-    department = get_object_or_404(Department, slug=dept_slug)
+    department = get_department_or_404(dept_slug)
     review = get_object_or_404(Review, id=review_id, article__department=department)
     
     if request.user != review.reviewer:
         messages.error(request, "You don't have permission to submit this review.")
-        return redirect('department_dashboard', dept_slug=dept_slug)
+        return redirect('journal_app:department_dashboard', dept_slug=dept_slug)
     
     if request.method == 'POST':
         form = ReviewForm(request.POST, request.FILES, instance=review)
         if form.is_valid():
             review = form.save()
             messages.success(request, "Review submitted successfully.")
-            return redirect('department_dashboard', dept_slug=dept_slug)
+            return redirect('journal_app:department_dashboard', dept_slug=dept_slug)
     else:
         form = ReviewForm(instance=review)
     
-    return render(request, 'journal_app/review_submit.html', {
+    return render(request, 'journal_app/review/submit_review.html', {
         'department': department,
         'review': review,
+        'article': review.article,
         'form': form
     })
 
@@ -487,65 +691,100 @@ def profile_edit(request):
 @login_required
 def department_dashboard(request, dept_slug):
     """Department dashboard"""
-    department = get_object_or_404(Department, slug=dept_slug)
+    department = get_department_or_404(dept_slug)
     user = request.user
     
     context = {
         'department': department,
+        'is_editor': request.permissions.is_editor(department),
+        'is_reviewer': request.permissions.is_reviewer(),
         'submitted_articles': Article.objects.filter(
             department=department,
             author=user
         ).order_by('-submission_date')
     }
     
-    if user.profile.role in ['EDITOR', 'DEPT_ADMIN', 'ADMIN']:
-        context.update({
-            'pending_reviews': Article.objects.filter(
-                department=department,
-                status='UNDER_REVIEW'
-            ),
-            'new_submissions': Article.objects.filter(
-                department=department,
-                status='SUBMITTED'
-            ),
-            'recent_publications': Article.objects.filter(
-                department=department,
-                status='PUBLISHED'
-            ).order_by('-publication_date')[:5]
-        })
+    if context['is_editor']:
+        context.update(DepartmentDashboard(department).get_context())
     
-    elif user.profile.role == 'REVIEWER':
+    elif context['is_reviewer']:
         context['review_assignments'] = Review.objects.filter(
             reviewer=user,
             article__department=department,
             is_complete=False
-        )
+        ).select_related('article')
     
     return render(request, 'journal_app/department_dashboard.html', context)
 
-# Utility Functions
-def send_review_notification(email, context):
-    """Send email notification for review assignment"""
-    subject = f"Review Request: {context['article_title']}"
-    message = render_to_string('journal_app/emails/review_request.html', context)
-    
-    send_mail(
-        subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [email],
-        html_message=message
-    )
+@login_required
+def department_statistics_api(request, dept_slug):
+    """API endpoint for the dashboard statistics cards"""
+    department = get_department_or_404(dept_slug)
     
-    # Log the email
-    EmailLog.objects.create(
-        department=context['department'],
-        subject=subject,
-        recipient=email,
-        content=message,
-        status='SENT'
+    if not request.permissions.is_editor(department):
+        raise PermissionDenied
+    
+    return JsonResponse(DepartmentDashboard(department).counters())
+
+def department_facets_api(request, dept_slug):
+    """API endpoint for the browse facets: article counts by keyword, year, journal and status"""
+    department = get_department_or_404(dept_slug)
+    try:
+        limit = min(int(request.GET.get('limit', 50)), 500)
+    except ValueError:
+        limit = 50
+    facets = DepartmentFacet.counts(department, limit=limit)
+    
+    journal_titles = dict(Journal.objects.filter(
+        pk__in=[value for value, _ in facets[DepartmentFacet.JOURNAL]]
+    ).values_list('pk', 'title'))
+    status_labels = dict(Article.STATUS_CHOICES)
+    
+    data = {
+        'keywords': [{'value': value, 'count': count} for value, count in facets[DepartmentFacet.KEYWORD]],
+        'years': [{'value': int(value), 'count': count} for value, count in facets[DepartmentFacet.YEAR]],
+        'journals': [
+            {'value': int(value), 'label': journal_titles.get(int(value)), 'count': count}
+            for value, count in facets[DepartmentFacet.JOURNAL]
+        ],
+    }
+    # Counts of unpublished work are for editors only
+    if request.permissions.is_editor(department):
+        data['statuses'] = [
+            {'value': value, 'label': status_labels.get(value, value), 'count': count}
+            for value, count in facets[DepartmentFacet.STATUS]
+        ]
+    return JsonResponse(data)
+
+@login_required
+def usage_report(request, dept_slug):
+    """Monthly COUNTER-style usage report for the department's journals, streamed as CSV or TSV"""
+    department = get_department_or_404(dept_slug)
+    
+    if not request.permissions.is_editor(department):
+        raise PermissionDenied
+    
+    # Defaults to the last twelve months, this one included
+    this_month = timezone.localdate().replace(day=1)
+    journals = department.journals.all()
+    if request.GET.get('journal'):
+        journals = journals.filter(slug=request.GET['journal'])
+    file_format = request.GET.get('format', 'csv')
+    try:
+        start = parse_month(request.GET['start']) if request.GET.get('start') else add_months(this_month, -11)
+        end = parse_month(request.GET['end']) if request.GET.get('end') else this_month
+        report = UsageReport(start, end, request.GET.get('level', 'journal'), journals=journals)
+        delimiter, content_type = FORMATS[file_format]
+    except (ValueError, KeyError) as e:
+        return HttpResponseBadRequest(f"Invalid report parameters: {e}")
+    
+    response = StreamingHttpResponse(stream_report(report, delimiter), content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="{department.slug}-{report.level}-{start:%Y-%m}-{end:%Y-%m}.{file_format}"'
     )
+    return response
 
+# Utility Functions
 def log_audit(request, action, details):
     """Create audit log entry"""
     AuditLog.objects.create(
@@ -562,17 +801,16 @@ def log_audit(request, action, details):
 @login_required
 def article_version_control(request, dept_slug, article_id):
     """Manage article versions and revisions"""
-    department = get_object_or_404(Department, slug=dept_slug)
+    department = get_department_or_404(dept_slug)
     article = get_object_or_404(Article, department=department, id=article_id)
     
-    if not (request.user == article.author or 
-            request.user.profile.role in ['EDITOR', 'DEPT_ADMIN', 'ADMIN']):
+    if not request.permissions.can_edit(article):
         raise PermissionDenied
     
     article_files = ArticleFile.objects.filter(article=article).order_by('-version')
     
     if request.method == 'POST':
-        form = ArticleFileForm(request.POST, request.FILES)
+        form = ArticleFileForm(request.POST, request.FILES, user=request.user)
         if form.is_valid():
             new_version = form.save(commit=False)
             new_version.article = article
@@ -595,9 +833,9 @@ def article_version_control(request, dept_slug, article_id):
 @login_required
 def bulk_article_management(request, dept_slug):
     """Handle bulk operations on articles"""
-    department = get_object_or_404(Department, slug=dept_slug)
+    department = get_department_or_404(dept_slug)
     
-    if not request.user.profile.role in ['EDITOR', 'DEPT_ADMIN', 'ADMIN']:
+    if not request.permissions.is_editor(department):
         raise PermissionDenied
     
     if request.method == 'POST':
@@ -607,14 +845,21 @@ def bulk_article_management(request, dept_slug):
             action = form.cleaned_data['action']
             
             if action == 'PUBLISH':
-                articles.update(
-                    status='PUBLISHED',
-                    publication_date=timezone.now()
-                )
+                with transaction.atomic():
+                    articles.update(
+                        status='PUBLISHED',
+                        publication_date=timezone.now()
+                    )
+                    # Bulk updates bypass the save signals that maintain the counters
+                    SiteStatistics.reconcile()
+                    DepartmentFacet.reconcile(department.pk)
                 messages.success(request, f"{len(articles)} articles published.")
             
             elif action == 'ARCHIVE':
-                articles.update(status='ARCHIVED')
+                with transaction.atomic():
+                    articles.update(status='ARCHIVED')
+                    SiteStatistics.reconcile()
+                    DepartmentFacet.reconcile(department.pk)
                 messages.success(request, f"{len(articles)} articles archived.")
             
             elif action == 'EXPORT':
@@ -632,9 +877,9 @@ def bulk_article_management(request, dept_slug):
 @login_required
 def review_statistics(request, dept_slug):
     """View review statistics and metrics"""
-    department = get_object_or_404(Department, slug=dept_slug)
+    department = get_department_or_404(dept_slug)
     
-    if not request.user.profile.role in ['EDITOR', 'DEPT_ADMIN', 'ADMIN']:
+    if not request.permissions.is_editor(department):
         raise PermissionDenied
     
     # Calculate review statistics
@@ -657,11 +902,11 @@ def review_statistics(request, dept_slug):
         'reviewer_stats': Profile.objects.filter(
             departments=department,
             role='REVIEWER'
-        ).annotate(
-            reviews_completed=Count('user__reviews', filter=Q(user__reviews__is_complete=True)),
+        ).select_related('user').annotate(
+            reviews_completed=Count('user__reviewer_reviews', filter=Q(user__reviewer_reviews__is_complete=True)),
             avg_review_time=Avg(
-                F('user__reviews__completion_date') - F('user__reviews__assigned_date'),
-                filter=Q(user__reviews__is_complete=True)
+                F('user__reviewer_reviews__completion_date') - F('user__reviewer_reviews__assigned_date'),
+                filter=Q(user__reviewer_reviews__is_complete=True)
             )
         )
     }
@@ -675,9 +920,9 @@ def review_statistics(request, dept_slug):
 @login_required
 def department_analytics(request, dept_slug):
     """View department analytics and metrics"""
-    department = get_object_or_404(Department, slug=dept_slug)
+    department = get_department_or_404(dept_slug)
     
-    if not request.user.profile.role in ['DEPT_ADMIN', 'ADMIN']:
+    if not request.permissions.is_admin(department):
         raise PermissionDenied
     
     # Time periods for analysis
@@ -716,10 +961,10 @@ def department_analytics(request, dept_slug):
             'reviewer_workload': Profile.objects.filter(
                 departments=department,
                 role='REVIEWER'
-            ).annotate(
+            ).select_related('user').annotate(
                 active_reviews=Count(
-                    'user__reviews',
-                    filter=Q(user__reviews__is_complete=False)
+                    'user__reviewer_reviews',
+                    filter=Q(user__reviewer_reviews__is_complete=False)
                 )
             )
         },
@@ -727,11 +972,11 @@ def department_analytics(request, dept_slug):
         'user_activity': {
             'active_authors': Profile.objects.filter(
                 departments=department,
-                user__articles__submission_date__gte=last_month
+                user__authored_articles__submission_date__gte=last_month
             ).distinct().count(),
             'active_reviewers': Profile.objects.filter(
                 departments=department,
-                user__reviews__assigned_date__gte=last_month
+                user__reviewer_reviews__assigned_date__gte=last_month
             ).distinct().count()
         }
     }
@@ -770,17 +1015,16 @@ def export_articles_csv(articles):
 @login_required
 def get_article_status(request, dept_slug, article_id):
     """API endpoint for article status updates"""
-    department = get_object_or_404(Department, slug=dept_slug)
+    department = get_department_or_404(dept_slug)
     article = get_object_or_404(Article, department=department, id=article_id)
     
-    if not (request.user == article.author or 
-            request.user.profile.role in ['EDITOR', 'DEPT_ADMIN', 'ADMIN']):
+    if not request.permissions.can_edit(article):
         raise PermissionDenied
     
     data = {
         'status': article.get_status_display(),
-        'reviews_completed': article.reviews.filter(is_complete=True).count(),
-        'reviews_pending': article.reviews.filter(is_complete=False).count(),
+        'reviews_completed': article.article_reviews.filter(is_complete=True).count(),
+        'reviews_pending': article.article_reviews.filter(is_complete=False).count(),
         'last_updated': article.updated_at.strftime('%Y-%m-%d %H:%M:%S')
     }
     
@@ -789,13 +1033,13 @@ def get_article_status(request, dept_slug, article_id):
 @login_required
 def get_review_summary(request, dept_slug, article_id):
     """API endpoint for review summary"""
-    department = get_object_or_404(Department, slug=dept_slug)
+    department = get_department_or_404(dept_slug)
     article = get_object_or_404(Article, department=department, id=article_id)
     
-    if not request.user.profile.role in ['EDITOR', 'DEPT_ADMIN', 'ADMIN']:
+    if not request.permissions.is_editor(department):
         raise PermissionDenied
     
-    reviews = article.reviews.filter(is_complete=True)
+    reviews = article.article_reviews.filter(is_complete=True)
     summary = {
         'accept': reviews.filter(recommendation='ACCEPT').count(),
         'minor_revision': reviews.filter(recommendation='MINOR_REVISION').count(),
@@ -808,9 +1052,9 @@ def get_review_summary(request, dept_slug, article_id):
 # Notification System
 def send_bulk_notifications(request, dept_slug):
     """Send bulk notifications to department users"""
-    department = get_object_or_404(Department, slug=dept_slug)
+    department = get_department_or_404(dept_slug)
     
-    if not request.user.profile.role in ['DEPT_ADMIN', 'ADMIN']:
+    if not request.permissions.is_admin(department):
         raise PermissionDenied
     
     if request.method == 'POST':
@@ -823,32 +1067,13 @@ def send_bulk_notifications(request, dept_slug):
             role=recipient_role
         ).values_list('user__email', flat=True)
         
-        for email in recipients:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [email],
-                fail_silently=True
-            )
-            
-            # Log the email
-            EmailLog.objects.create(
-                department=department,
-                subject=subject,
-                recipient=email,
-                content=message,
-                status='SENT'
-            )
+        count = enqueue_batch(department, subject, [(email, RenderedEmail('', message)) for email in recipients])
         
-        messages.success(request, f"Notifications sent to {len(recipients)} recipients.")
-        return redirect('department_dashboard', dept_slug=dept_slug)
+        messages.success(request, f"Notifications queued for {count} recipients.")
+        return redirect('journal_app:department_dashboard', dept_slug=dept_slug)
     
     return render(request, 'journal_app/send_bulk_notifications.html', {
         'department': department,
         'recipient_roles': Profile.ROLES
     })
 
-
-def bulk_article_management(request, dept_slug):
-    pass
\ No newline at end of file
@@ -34,10 +34,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'journal_app.instrumentation.QueryInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'journal_app.permissions.PermissionsMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -125,6 +127,12 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_REDIRECT_URL = 'journal_app:department_home'
 LOGOUT_REDIRECT_URL = 'journal_app:department_home'
 LOGIN_URL = 'login'
+# ProfileBackend loads request.user together with its Profile; ModelBackend
+# stays listed so that sessions created before it keep working
+AUTHENTICATION_BACKENDS = [
+    'journal_app.permissions.ProfileBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
 
 
 
@@ -137,7 +145,116 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = 'info@rutonalinkages.ng'
 
+# Notifications are queued in an outbox (journal_app.outbox) and sent by
+# `manage.py send_queued_email` with EMAIL_OUTBOX_WORKERS threads, each sending up
+# to EMAIL_BATCH_SIZE messages over one SMTP connection. Failed sends are
+# retried after EMAIL_OUTBOX_RETRY_DELAY seconds, doubling each time.
+EMAIL_OUTBOX_WORKERS = 4
+EMAIL_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_ATTEMPTS = 6
+EMAIL_OUTBOX_RETRY_DELAY = 60
+
+# Departments can batch editor notifications into a digest by setting
+# DepartmentSettings.notification_settings = {"editor_digest": "hourly"} (or
+# "daily"); `manage.py send_digests` queues the digests that are due.
+# SITE_URL prefixes links in emails sent outside a request.
+SITE_URL = config('SITE_URL', default='http://localhost:8000')
+
+# `manage.py send_review_reminders` (run from cron) reminds reviewers of open
+# reviews this many days before the due date, most distant first; 0 is the due
+# date and negative values are days overdue. Each tier is sent at most once.
+REVIEW_REMINDER_DAYS = [7, 2, 0, -7]
+REVIEW_REMINDER_BATCH_SIZE = 200
+
+# Reviewer recommendations on the assignment page (journal_app.recommendations):
+# how many to suggest, and how much each open review divides a reviewer's match.
+REVIEWER_RECOMMENDATIONS = 5
+REVIEWER_WORKLOAD_PENALTY = 0.25
+
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-MAX_UPLOAD_SIZE = 10 * 1024 * 1024
\ No newline at end of file
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+
+# Manuscripts, article files and review attachments are stored once per distinct
+# content (journal_app.storage): each name is a hard link to a blob named after its
+# SHA-256, so MEDIA_ROOT must be on a file system with hard links. Run
+# `manage.py dedupe_media` once to convert files stored before. Deleting a file
+# removes only its name: run `manage.py dedupe_media --garbage-only` daily to
+# remove the blobs no file links to any more.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'documents': {'BACKEND': 'journal_app.storage.ContentAddressedStorage'},
+}
+
+# Journal covers, department logos and profile pictures are served as resized
+# WebP/JPEG variants at these widths (journal_app.images, {% responsive_image %}).
+# `manage.py generate_image_derivatives` creates them for existing images.
+IMAGE_DERIVATIVE_WIDTHS = [160, 320, 640, 1280]
+IMAGE_DERIVATIVE_QUALITY = 80
+
+# File downloads (journal_app.downloads)
+# 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache, lighttpd) hands the transfer
+# to the web server; nginx needs an internal location at DOWNLOAD_ACCEL_PREFIX
+# aliased to MEDIA_ROOT. Empty streams the file from Django.
+DOWNLOAD_SENDFILE = config('DOWNLOAD_SENDFILE', default='')
+DOWNLOAD_ACCEL_PREFIX = '/protected-media/'
+
+# Resumable uploads (journal_app.uploads) are written chunk by chunk to
+# UPLOAD_TEMP_DIR, which should be on the same filesystem as MEDIA_ROOT so
+# finished files are moved into place rather than copied. Unfinished or
+# unattached uploads older than UPLOAD_EXPIRY_HOURS are removed by
+# `manage.py expire_uploads`.
+RESUMABLE_UPLOAD_MAX_SIZE = 512 * 1024 * 1024
+UPLOAD_TEMP_DIR = os.path.join(MEDIA_ROOT, 'uploads')
+UPLOAD_EXPIRY_HOURS = 24
+
+# Usage events (journal_app.usage) are buffered per process and written in batches
+# once a buffer holds USAGE_BUFFER_SIZE events or is USAGE_BUFFER_SECONDS old.
+# Run `manage.py aggregate_usage` periodically to fold them into the counters.
+USAGE_BUFFER_SIZE = 200
+USAGE_BUFFER_SECONDS = 10
+
+
+# Set CACHE_BACKEND and CACHE_LOCATION to a cache shared by all worker processes
+# in production, e.g. django.core.cache.backends.redis.RedisCache and
+# redis://127.0.0.1:6379. The default keeps a separate cache in each process.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+# Departments and their settings are read through a per-process LRU in front of
+# Django's cache (journal_app.departments). With a shared backend, changes reach
+# every worker at once and entries are kept DEPARTMENT_CACHE_TIMEOUT seconds;
+# with a per-process one, workers may serve a changed department for up to
+# DEPARTMENT_LOCAL_CACHE_TIMEOUT seconds.
+DEPARTMENT_CACHE_TIMEOUT = 60 * 60
+DEPARTMENT_LOCAL_CACHE_TIMEOUT = 30
+
+
+# Per-request SQL instrumentation (journal_app.instrumentation)
+# Maximum queries per URL name; requests over budget log a warning.
+# Every request is logged at INFO; set QUERY_LOG_LEVEL=WARNING to keep only
+# the budget warnings (journal_app/tests.py does so for its own run).
+QUERY_BUDGETS = {}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'journal_app.queries': {
+            'handlers': ['console'],
+            'level': config('QUERY_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}